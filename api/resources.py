@@ -0,0 +1,226 @@
+import datetime
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from candidates.models import Candidate, Application, Interview
+from candidates.views import _filter_candidates
+from vacancies.models import Skill, Vacancy
+from vacancies.views import _filter_vacancies
+
+
+# Ресурсы JSON API.
+# Поле ресурса - путь в ORM: строки читаются через values_list() без создания
+# объектов моделей, связи по внешнему ключу добавляются в тот же запрос (JOIN).
+# Поля-списки (навыки) читаются одним запросом к таблице связи на всю страницу.
+
+STAFF_ROLES = ('manager', 'admin')
+
+
+def _role(user):
+    return getattr(user, 'role', '')
+
+
+def _parse_moment(value):
+    """Дата (2026-10-19) или дата и время в ISO 8601"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError(f'Неверная дата: {value}')
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Resource:
+    model = None
+    # Имя поля в ответе -> путь в ORM
+    fields = {}
+    # Имя поля-списка -> (таблица связи, поле объекта, путь к значению)
+    many = {}
+    default_fields = []
+
+    def scope(self, user):
+        """Объекты, которые пользователю можно видеть"""
+        return self.model.objects.all()
+
+    def filter(self, queryset, params):
+        return queryset
+
+    def queryset(self, user, params):
+        return self.filter(self.scope(user), params)
+
+    def rows(self, queryset, names):
+        """Словари для JSON: один запрос на страницу и по одному на каждое поле-список"""
+        scalar = [name for name in names if name in self.fields]
+        rows = [dict(zip(scalar, values)) for values in queryset.values_list(*(self.fields[n] for n in scalar))]
+        ids = [row['id'] for row in rows]
+        for name in names:
+            if name not in self.many or not ids:
+                continue
+            through, owner, value = self.many[name]
+            related = defaultdict(list)
+            links = through.objects.filter(**{f'{owner}__in': ids}).order_by(value).values_list(owner, value)
+            for owner_id, item in links:
+                related[owner_id].append(item)
+            for row in rows:
+                row[name] = related[row['id']]
+        return rows
+
+
+class CandidateResource(Resource):
+    model = Candidate
+    fields = {
+        'id': 'id',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'patronymic': 'patronymic',
+        'email': 'email',
+        'phone': 'phone',
+        'phone_e164': 'phone_normalized',
+        'age': 'age',
+        'experience_years': 'experience_years',
+        'specialization': 'specialization',
+        'position_level': 'position_level',
+        'employment_status': 'employment_status',
+        'work_format': 'work_format',
+        'education_level': 'education_level',
+        'source': 'source',
+        'assigned_recruiter': 'assigned_recruiter',
+        'desired_salary': 'desired_salary',
+        'notice_period': 'notice_period',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    many = {'skills': (Candidate.skills.through, 'candidate_id', 'skill__name')}
+    default_fields = ['id', 'first_name', 'last_name', 'patronymic', 'email', 'phone',
+                      'experience_years', 'specialization', 'position_level', 'created_at']
+
+    def filter(self, queryset, params):
+        # Те же фильтры, что у candidate_list
+        return queryset & _filter_candidates(params)
+
+
+class VacancyResource(Resource):
+    model = Vacancy
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'required_experience': 'required_experience',
+        'salary': 'salary',
+        'work_format': 'work_format',
+        'status': 'status',
+        'location': 'location',
+        'employment_type': 'employment_type',
+        'created_by': 'created_by__username',
+        'assigned_recruiter': 'assigned_recruiter__username',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    many = {'required_skills': (Vacancy.required_skills.through, 'vacancy_id', 'skill__name')}
+    default_fields = ['id', 'title', 'status', 'work_format', 'salary', 'required_experience', 'created_at']
+
+    def scope(self, user):
+        # Как в vacancy_detail: остальным ролям - только открытые вакансии
+        if _role(user) not in STAFF_ROLES + ('recruiter',):
+            return Vacancy.objects.filter(status='open')
+        return Vacancy.objects.all()
+
+    def filter(self, queryset, params):
+        # Те же фильтры, что у vacancy_list
+        return queryset & _filter_vacancies(params)
+
+
+class ApplicationResource(Resource):
+    model = Application
+    fields = {
+        'id': 'id',
+        'candidate': 'candidate_id',
+        'vacancy': 'vacancy_id',
+        'vacancy_title': 'vacancy__title',
+        'status': 'status',
+        'status_changed_at': 'status_changed_at',
+        'applied_date': 'applied_date',
+        'notes': 'notes',
+        'updated_at': 'updated_at',
+    }
+    default_fields = ['id', 'candidate', 'vacancy', 'status', 'applied_date']
+
+    def scope(self, user):
+        # Как в vacancy_detail: рекрутер видит все отклики на свои вакансии,
+        # на остальные - только отклики своих кандидатов
+        applications = Application.objects.all()
+        if _role(user) == 'recruiter':
+            applications = applications.filter(
+                Q(vacancy__assigned_recruiter=user) | Q(candidate__assigned_recruiter=user.username)
+            )
+        return applications
+
+    def filter(self, queryset, params):
+        for name in ('status', 'vacancy', 'candidate'):
+            value = params.get(name, '')
+            if value:
+                queryset = queryset.filter(**{name: value})
+        return queryset
+
+
+class InterviewResource(Resource):
+    model = Interview
+    fields = {
+        'id': 'id',
+        'candidate': 'candidate_id',
+        'scheduled_date': 'scheduled_date',
+        'duration_minutes': 'duration_minutes',
+        'interview_type': 'interview_type',
+        'status': 'status',
+        'result': 'result',
+        'notes': 'notes',
+        'feedback': 'feedback',
+        'scheduled_by': 'scheduled_by__username',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    default_fields = ['id', 'candidate', 'scheduled_date', 'duration_minutes', 'interview_type', 'status']
+
+    def scope(self, user):
+        # Как в upcoming_interviews: рекрутеры видят собеседования, которые назначили сами
+        if _role(user) not in STAFF_ROLES:
+            return Interview.objects.filter(scheduled_by=user)
+        return Interview.objects.all()
+
+    def filter(self, queryset, params):
+        for name in ('status', 'candidate', 'interview_type'):
+            value = params.get(name, '')
+            if value:
+                queryset = queryset.filter(**{name: value})
+        for name, lookup in (('from', 'scheduled_date__gte'), ('to', 'scheduled_date__lt')):
+            if params.get(name):
+                queryset = queryset.filter(**{lookup: _parse_moment(params[name])})
+        return queryset
+
+
+class SkillResource(Resource):
+    model = Skill
+    fields = {'id': 'id', 'name': 'name'}
+    default_fields = ['id', 'name']
+
+    def filter(self, queryset, params):
+        search_query = params.get('search', '')
+        if search_query:
+            queryset = queryset.filter(name__icontains=search_query)
+        return queryset
+
+
+RESOURCES = {
+    'candidates': CandidateResource(),
+    'vacancies': VacancyResource(),
+    'applications': ApplicationResource(),
+    'interviews': InterviewResource(),
+    'skills': SkillResource(),
+}
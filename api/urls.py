@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+# Версия API - в адресе: несовместимые изменения появятся в /api/v2/
+urlpatterns = []
+for resource in ('candidates', 'vacancies', 'applications', 'interviews', 'skills'):
+    urlpatterns += [
+        path(f'v1/{resource}/', views.resource_list, {'resource': resource}, name=f'api_{resource}'),
+        path(f'v1/{resource}/<int:pk>/', views.resource_detail, {'resource': resource}, name=f'api_{resource}_detail'),
+    ]
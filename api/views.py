@@ -0,0 +1,133 @@
+import base64
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import urlencode
+from django.views.decorators.http import require_GET
+
+from hr_agency.replicas import use_replica
+from .resources import RESOURCES
+
+try:
+    import orjson
+
+    def dumps(data):
+        return orjson.dumps(data)
+except ImportError:  # orjson не установлен - стандартный json, медленнее
+    import json
+
+    from django.core.serializers.json import DjangoJSONEncoder
+
+    def dumps(data):
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+
+# JSON API только для чтения: /api/v1/<ресурс>/ и /api/v1/<ресурс>/<id>/.
+# ?fields=id,email - только нужные поля, ?limit= - размер страницы,
+# ?cursor= - продолжение списка (из поля next предыдущего ответа).
+# Списки отсортированы по id от новых к старым: курсор - последний выданный id,
+# страница выбирается по индексу первичного ключа без OFFSET.
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_view(view_func):
+    """Вход по сессии, как у страниц; ответы об ошибках - в JSON, чтение - с реплики"""
+
+    @require_GET
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Требуется вход в систему'}, status=401)
+        try:
+            with use_replica():
+                return view_func(request, *args, **kwargs)
+        except (BadRequest, ValidationError, ValueError) as e:
+            message = '; '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            return JsonResponse({'error': message}, status=400)
+
+    return wrapper
+
+
+def _fields(resource, params):
+    requested = params.get('fields', '')
+    if not requested:
+        return resource.default_fields
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource.fields and name not in resource.many]
+    if unknown:
+        allowed = ', '.join([*resource.fields, *resource.many])
+        raise BadRequest(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {allowed}")
+    # id нужен для курсора и полей-списков
+    return ['id'] + [name for name in names if name != 'id']
+
+
+def _limit(params):
+    try:
+        limit = int(params.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise BadRequest('Неверный курсор')
+
+
+def _json_response(request, data):
+    """Ответ с ETag по содержимому: совпал с If-None-Match - 304 без тела"""
+    body = dumps(data)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    # Содержимое зависит от пользователя (его роли)
+    patch_vary_headers(response, ['Cookie'])
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@api_view
+def resource_list(request, resource):
+    resource = RESOURCES[resource]
+    params = request.GET
+    names = _fields(resource, params)
+    limit = _limit(params)
+
+    queryset = resource.queryset(request.user, params).order_by('-id')
+    if params.get('cursor'):
+        queryset = queryset.filter(id__lt=decode_cursor(params['cursor']))
+    # Лишняя строка показывает, есть ли следующая страница
+    rows = resource.rows(queryset[:limit + 1], names)
+
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        query = params.copy()
+        query['cursor'] = encode_cursor(rows[-1]['id'])
+        next_url = request.build_absolute_uri(f'{request.path}?{urlencode(query, doseq=True)}')
+
+    return _json_response(request, {'results': rows, 'next': next_url})
+
+
+@api_view
+def resource_detail(request, resource, pk):
+    resource = RESOURCES[resource]
+    rows = resource.rows(resource.scope(request.user).filter(id=pk), _fields(resource, request.GET))
+    if not rows:
+        return JsonResponse({'error': 'Не найдено'}, status=404)
+    return _json_response(request, rows[0])
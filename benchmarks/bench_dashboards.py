@@ -0,0 +1,150 @@
+"""
+Задержка дашбордов под конкурентной нагрузкой: запросы страницы по очереди
+(как в синхронных WSGI-представлениях) против одновременных (асинхронные представления).
+
+Бенчмарк создает отдельную тестовую БД (как manage.py test) и удаляет ее после замера.
+Выигрыш заметен на PostgreSQL, где запросы выполняются параллельно; SQLite
+выполняет чтения одного процесса почти последовательно.
+Запуск:
+    python benchmarks/bench_dashboards.py
+    POSTGRES_DB=hr_agency POSTGRES_USER=postgres python benchmarks/bench_dashboards.py --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from candidates.models import Candidate, Application  # noqa: E402
+from candidates.views import manager_dashboard_queries  # noqa: E402
+from hr_agency.parallel import gather_queries  # noqa: E402
+from hr_agency.views import statistics_queries  # noqa: E402
+from vacancies.models import Vacancy  # noqa: E402
+
+PAGES = {
+    'statistics': ('/statistics/', statistics_queries),
+    'manager_dashboard': ('/manager/dashboard/', manager_dashboard_queries),
+}
+
+
+def report(title, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {title:<38} p50 {statistics.median(latencies) * 1000:7.1f} мс  "
+          f"p95 {p95 * 1000:7.1f} мс  ({len(latencies) / elapsed:7.1f} стр/с)")
+
+
+def fill(candidates):
+    User = get_user_model()
+    manager = User.objects.create_user('bench_manager', password='bench', role='manager')
+    recruiters = [User.objects.create_user(f'bench_recruiter{i}', password='bench', role='recruiter') for i in range(10)]
+    Candidate.objects.bulk_create([
+        Candidate(first_name=f'Имя{i}', last_name=f'Фамилия{i}', email=f'dash{i}@example.com')
+        for i in range(candidates)
+    ], batch_size=1000)
+    Vacancy.objects.bulk_create([
+        Vacancy(title=f'Вакансия {i}', description='-', created_by=manager, assigned_recruiter=recruiters[i % 10],
+                status=('open', 'closed', 'draft')[i % 3], work_format=('office', 'remote', 'hybrid')[i % 3])
+        for i in range(candidates // 20)
+    ], batch_size=1000)
+    vacancy_ids = list(Vacancy.objects.values_list('id', flat=True))
+    Application.objects.bulk_create([
+        Application(candidate_id=candidate_id, vacancy_id=vacancy_ids[n % len(vacancy_ids)],
+                    status=('pending', 'approved', 'rejected')[n % 3])
+        for n, candidate_id in enumerate(Candidate.objects.values_list('id', flat=True))
+    ], batch_size=1000)
+
+
+def bench_serial(queries, requests, concurrency):
+    """Синхронные представления: поток на запрос, запросы страницы по очереди"""
+    def one():
+        start = time.perf_counter()
+        {name: func() for name, func in queries().items()}
+        # Как в конце запроса (request_finished)
+        connection.close_if_unusable_or_obsolete()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(lambda _: one(), range(requests)))
+    report('по очереди (WSGI, потоки)', latencies, time.perf_counter() - start)
+
+
+async def bench_gathered(queries, requests, concurrency):
+    """Асинхронные представления: запросы страницы одновременно"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await gather_queries(**queries())
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    report('одновременно (gather_queries)', latencies, time.perf_counter() - start)
+
+
+async def bench_asgi(url, requests, concurrency):
+    """Страница целиком через ASGI-обработчик, с middleware и шаблоном"""
+    client = AsyncClient()
+    await client.alogin(username='bench_manager', password='bench')
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url)
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    report('страница через ASGI', latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Задержка дашбордов: WSGI против ASGI')
+    parser.add_argument('--candidates', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--conn-max-age', type=int, default=600)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        # Файловая БД: потоки пула открывают к ней собственные соединения
+        connection.settings_dict['TEST']['NAME'] = os.path.join(BASE_DIR, 'bench_db.sqlite3')
+    # Постоянные соединения - как в продакшен-профиле
+    connection.settings_dict['CONN_MAX_AGE'] = args.conn_max_age
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"БД: {connection.vendor}, кандидатов: {args.candidates}, одновременных запросов: {args.concurrency}")
+        fill(args.candidates)
+        for page, (url, queries) in PAGES.items():
+            print(page)
+            bench_serial(queries, args.requests, args.concurrency)
+            asyncio.run(bench_gathered(queries, args.requests, args.concurrency))
+            asyncio.run(bench_asgi(url, args.requests, args.concurrency))
+    finally:
+        connection.close()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
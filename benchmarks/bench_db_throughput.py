@@ -0,0 +1,126 @@
+"""
+Сравнение пропускной способности БД (SQLite / PostgreSQL) на типичных операциях.
+
+Бенчмарк создает отдельную тестовую БД (как manage.py test) и удаляет ее после замера.
+Запуск:
+    python benchmarks/bench_db_throughput.py
+    POSTGRES_DB=hr_agency POSTGRES_USER=postgres python benchmarks/bench_db_throughput.py
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from candidates.models import Candidate  # noqa: E402
+
+
+def timed(title, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{title:<45} {count:>7} оп. за {elapsed:7.3f} с  ({count / elapsed:10.0f} оп/с)")
+
+
+def make_candidate(prefix, i):
+    return Candidate(
+        first_name=f'Имя{i}', last_name=f'Фамилия{i % 500}', email=f'{prefix}{i}@example.com',
+        experience_years=i % 15, specialization='Python' if i % 3 else 'Java',
+    )
+
+
+def bench_bulk_insert(n):
+    def run():
+        Candidate.objects.bulk_create([make_candidate('bulk', i) for i in range(n)], batch_size=1000)
+    timed('Массовая вставка (bulk_create)', n, run)
+
+
+def bench_single_inserts(n):
+    def run():
+        for i in range(n):
+            make_candidate('single', i).save()
+    timed('Вставка по одной (autocommit)', n, run)
+
+
+def bench_concurrent_writes(n, threads):
+    per_thread = n // threads
+    errors = []
+
+    def worker(t):
+        try:
+            for i in range(per_thread):
+                with transaction.atomic():
+                    make_candidate(f'thread{t}-', i).save()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def run():
+        pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+    timed(f'Конкурентная вставка ({threads} потоков)', per_thread * threads, run)
+    if errors:
+        print(f"  ошибок: {len(errors)}, первая: {errors[0]}")
+
+
+def bench_search(n):
+    def run():
+        for i in range(n):
+            query = f'Фамилия{i % 500}'
+            list(Candidate.objects.filter(
+                Q(first_name__icontains=query) | Q(last_name__icontains=query) | Q(email__icontains=query)
+            ).order_by('-created_at')[:12])
+    timed('Поиск как в candidate_list', n, run)
+
+
+def bench_export():
+    total = Candidate.objects.count()
+
+    def run():
+        for _ in Candidate.objects.values_list('id', 'email').iterator(chunk_size=settings.DB_ITERATOR_CHUNK_SIZE):
+            pass
+    timed('Потоковое чтение (.iterator)', total, run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пропускная способность БД')
+    parser.add_argument('--candidates', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        # Файловая БД вместо in-memory, чтобы блокировки были как в реальной работе
+        connection.settings_dict['TEST']['NAME'] = os.path.join(BASE_DIR, 'bench_db.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"БД: {connection.vendor}")
+        bench_bulk_insert(args.candidates)
+        bench_single_inserts(args.candidates // 10)
+        bench_concurrent_writes(args.candidates // 10, args.threads)
+        bench_search(args.candidates // 20)
+        bench_export()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
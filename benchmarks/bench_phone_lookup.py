@@ -0,0 +1,121 @@
+"""
+Поиск кандидата по телефону: LIKE по исходным строкам против индекса по нормализованному номеру.
+
+Бенчмарк создает отдельную тестовую БД (как manage.py test) и удаляет ее после замера.
+Запуск:
+    python benchmarks/bench_phone_lookup.py
+    python benchmarks/bench_phone_lookup.py --candidates 100000 --lookups 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from candidates.models import Candidate  # noqa: E402
+from candidates.normalization import normalize_phone  # noqa: E402
+
+BATCH_SIZE = 5000
+
+# Так телефоны вводят рекрутеры: один номер - много вариантов записи
+FORMATS = [
+    '+7 {0}{1}{2} {3}{4}{5}-{6}{7}-{8}{9}',
+    '8 ({0}{1}{2}) {3}{4}{5}-{6}{7}-{8}{9}',
+    '+7{0}{1}{2}{3}{4}{5}{6}{7}{8}{9}',
+    '8-{0}{1}{2}-{3}{4}{5}-{6}{7}-{8}{9}',
+    '+7 ({0}{1}{2}) {3}{4}{5} {6}{7} {8}{9}',
+]
+
+
+def timed(title, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{title:<45} {count:>7} оп. за {elapsed:8.3f} с  ({count / elapsed:10.0f} оп/с)")
+    return result
+
+
+def number(i):
+    return f'9{i:09d}'
+
+
+def format_phone(digits, i):
+    return FORMATS[i % len(FORMATS)].format(*digits)
+
+
+def fill(n):
+    def run():
+        batch = []
+        for i in range(n):
+            phone = format_phone(number(i), i)
+            # bulk_create не вызывает save(), нормализованный номер заполняем сами
+            batch.append(Candidate(
+                first_name=f'Имя{i}', last_name=f'Фамилия{i % 500}', email=f'phone{i}@example.com',
+                phone=phone, phone_normalized=normalize_phone(phone),
+            ))
+            if len(batch) >= BATCH_SIZE:
+                Candidate.objects.bulk_create(batch)
+                batch = []
+        Candidate.objects.bulk_create(batch)
+    timed('Заполнение таблицы', n, run)
+
+
+def like_lookup(digits):
+    # Как искали раньше: перебор известных форматов записи номера
+    condition = Q()
+    for template in FORMATS:
+        condition |= Q(phone__icontains=template.format(*digits))
+    return list(Candidate.objects.filter(condition).values_list('id', flat=True))
+
+
+def indexed_lookup(query):
+    return list(Candidate.objects.filter(phone_normalized=normalize_phone(query)).values_list('id', flat=True))
+
+
+def bench_lookups(n, lookups, slow_lookups):
+    samples = random.Random(1).sample(range(n), lookups)
+    # Номер приходит в формате, отличном от сохраненного
+    queries = [(number(i), format_phone(number(i), i + 1)) for i in samples]
+
+    found = timed('LIKE по форматам записи', slow_lookups,
+                  lambda: [like_lookup(digits) for digits, _ in queries[:slow_lookups]])
+    print(f"  найдено: {sum(bool(ids) for ids in found)} из {slow_lookups}")
+    found = timed('Индекс по phone_normalized', lookups,
+                  lambda: [indexed_lookup(query) for _, query in queries])
+    print(f"  найдено: {sum(bool(ids) for ids in found)} из {lookups}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Поиск по телефону')
+    parser.add_argument('--candidates', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--slow-lookups', type=int, default=20,
+                        help='число поисков через LIKE (каждый - полный проход по таблице)')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(BASE_DIR, 'bench_db.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"БД: {connection.vendor}, кандидатов: {args.candidates}")
+        fill(args.candidates)
+        bench_lookups(args.candidates, min(args.lookups, args.candidates), min(args.slow_lookups, args.lookups))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Конкурентные писатели на SQLite: стандартный режим, режим производительности
+(WAL + BEGIN IMMEDIATE + busy_timeout) и режим производительности с очередью записи.
+
+Каждый режим запускается в отдельном процессе с файловой БД.
+Каждая транзакция читает число кандидатов и вставляет нового - так ведет себя
+сохранение формы с проверкой уникальности.
+Запуск:
+    python benchmarks/bench_sqlite_writers.py --threads 16 --transactions 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = [
+    ('Стандартный', {'SQLITE_TUNED': '0', 'SQLITE_WRITE_QUEUE': '0'}),
+    ('WAL + IMMEDIATE', {'SQLITE_TUNED': '1', 'SQLITE_WRITE_QUEUE': '0'}),
+    ('WAL + IMMEDIATE + очередь', {'SQLITE_TUNED': '1', 'SQLITE_WRITE_QUEUE': '1'}),
+]
+
+
+def run_mode(threads, transactions):
+    """Выполняется в дочернем процессе: настройки уже выбраны переменными окружения"""
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from candidates.models import Candidate
+    from hr_agency.sqlite import run_write
+
+    setup_test_environment()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'writers.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    errors = []
+    done = []
+
+    def write(t, i):
+        Candidate.objects.filter(email__startswith=f'w{t}-').count()
+        Candidate.objects.create(first_name='Имя', last_name='Фамилия', email=f'w{t}-{i}@example.com')
+
+    def worker(t):
+        for i in range(transactions):
+            try:
+                run_write(write, t, i)
+                done.append(1)
+            except Exception as e:
+                errors.append(str(e))
+        connection.close()
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    print(json.dumps({'ok': len(done), 'errors': len(errors), 'elapsed': elapsed,
+                      'first_error': errors[0] if errors else ''}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Конкурентные писатели SQLite')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--transactions', type=int, default=50)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.threads, args.transactions)
+        return
+
+    print(f"Потоков: {args.threads}, транзакций на поток: {args.transactions}")
+    for title, env in MODES:
+        result = subprocess.run(
+            [sys.executable, __file__, '--child', '--threads', str(args.threads),
+             '--transactions', str(args.transactions)],
+            env={**os.environ, **env}, capture_output=True, text=True, check=True
+        )
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{title:<28} успешно {r['ok']:>5}, ошибок {r['errors']:>5}, "
+              f"{r['ok'] / r['elapsed']:8.0f} транз/с")
+        if r['first_error']:
+            print(f"  {r['first_error']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Замер времени запуска воркера: импорт WSGI-приложения и первый запрос.
+
+Каждый замер выполняется в отдельном процессе, как при старте нового воркера.
+Запуск:
+    python benchmarks/bench_startup.py --runs 10
+    DJANGO_ENV=production DJANGO_SECRET_KEY=x python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код, выполняемый в дочернем процессе
+WORKER_CODE = r'''
+import io, json, sys, time
+t0 = time.perf_counter()
+from hr_agency.wsgi import application
+t1 = time.perf_counter()
+
+from django.db import connections
+boot_db_connections = sum(1 for conn in connections.all(initialized_only=True) if conn.connection is not None)
+
+def start_response(status, headers):
+    start_response.status = status
+
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+}
+t2 = time.perf_counter()
+body = b''.join(application(environ, start_response))
+t3 = time.perf_counter()
+print(json.dumps({
+    'import': t1 - t0,
+    'first_request': t3 - t2,
+    'status': start_response.status,
+    'boot_db_connections': boot_db_connections,
+}))
+'''
+
+
+def run_once(path):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_ALLOWED_HOSTS', 'localhost')
+    result = subprocess.run(
+        [sys.executable, '-c', WORKER_CODE, path],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время запуска воркера')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/login/', help='URL первого запроса')
+    args = parser.parse_args()
+
+    results = [run_once(args.path) for _ in range(args.runs)]
+
+    print(f"Профиль: {os.environ.get('DJANGO_ENV', 'development')}, запусков: {args.runs}, URL: {args.path}")
+    print(f"Статус первого запроса: {results[0]['status']}")
+    for key, title in (('import', 'Импорт приложения'), ('first_request', 'Первый запрос')):
+        values = [r[key] * 1000 for r in results]
+        print(f"{title}: медиана {statistics.median(values):.1f} мс, "
+              f"мин {min(values):.1f} мс, макс {max(values):.1f} мс")
+    print(f"Соединений с БД при запуске: {max(r['boot_db_connections'] for r in results)}")
+
+
+if __name__ == '__main__':
+    main()
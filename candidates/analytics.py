@@ -0,0 +1,258 @@
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from hr_agency.replicas import use_primary
+from jobs.queue import task
+from .models import (Candidate, Application, ApplicationStatusChange, Interview, CandidateFunnel, FunnelDeletion,
+                     FunnelRollup, RollupWatermark)
+
+
+# Воронка подбора: кандидат -> отклик -> собеседование -> одобрение.
+# Для каждого кандидата хранится факт (CandidateFunnel), из фактов собираются
+# агрегаты по месяцу/источнику/специализации/рекрутеру (FunnelRollup).
+# Пересчет инкрементальный: обрабатываются только кандидаты, у которых после
+# отметки изменились сами данные, отклики или собеседования (удаления откликов и
+# собеседований записывает сигнал в FunnelDeletion). Старый вклад кандидата
+# вычитается из агрегата, новый - прибавляется.
+# Пересчитывает команда update_funnel_rollups по крону или фоновая задача;
+# страница аналитики только читает агрегаты.
+
+FUNNEL = 'funnel'
+
+FUNNEL_DIMENSIONS = {
+    'source': 'Источник',
+    'specialization': 'Специализация',
+    'recruiter': 'Рекрутер',
+    'month': 'Месяц',
+}
+
+INTEGER_COUNTERS = ('candidates', 'applied', 'interviewed', 'approved')
+COUNTERS = INTEGER_COUNTERS + ('days_to_interview_total', 'days_to_approval_total')
+
+# Изменения, закоммиченные с задержкой, попадают в перекрытие и не теряются.
+# Повторная обработка кандидата безопасна: вклад пересчитывается, а не добавляется
+WATERMARK_OVERLAP = datetime.timedelta(minutes=1)
+
+BATCH_SIZE = 500
+
+
+def _days_between(start, end):
+    if start is None or end is None:
+        return None
+    return max((end - start).total_seconds() / 86400, 0)
+
+
+def _compute_facts(candidate_ids):
+    """Факты воронки для кандидатов: по одному групповому запросу на каждую таблицу"""
+    facts = {}
+    candidate_ids = list(candidate_ids)
+    for start in range(0, len(candidate_ids), BATCH_SIZE):
+        batch = candidate_ids[start:start + BATCH_SIZE]
+
+        first_application = dict(
+            Application.objects.filter(candidate_id__in=batch)
+            .values('candidate_id').annotate(first=Min('applied_date'))
+            .values_list('candidate_id', 'first')
+        )
+        # Время одобрения - из журнала статусов: updated_at меняется при любом сохранении отклика
+        approved_at = Subquery(
+            ApplicationStatusChange.objects.filter(application=OuterRef('pk'), to_status='approved')
+            .order_by('changed_at').values('changed_at')[:1]
+        )
+        first_approval = dict(
+            Application.objects.filter(candidate_id__in=batch, status='approved')
+            .values('candidate_id').annotate(first=Min(Coalesce(approved_at, 'status_changed_at')))
+            .values_list('candidate_id', 'first')
+        )
+        first_interview = dict(
+            Interview.objects.filter(candidate_id__in=batch).exclude(status='cancelled')
+            .values('candidate_id').annotate(first=Min('scheduled_date'))
+            .values_list('candidate_id', 'first')
+        )
+
+        candidates = Candidate.objects.filter(id__in=batch).values_list(
+            'id', 'created_at', 'source', 'specialization', 'assigned_recruiter'
+        )
+        for candidate_id, created_at, source, specialization, recruiter in candidates:
+            interview_at = first_interview.get(candidate_id)
+            approved_at = first_approval.get(candidate_id)
+            facts[candidate_id] = CandidateFunnel(
+                candidate_id=candidate_id,
+                month=timezone.localtime(created_at).date().replace(day=1),
+                source=source,
+                specialization=specialization.strip(),
+                recruiter=recruiter.strip(),
+                applied=candidate_id in first_application,
+                interviewed=interview_at is not None,
+                approved=approved_at is not None,
+                days_to_interview=_days_between(created_at, interview_at),
+                days_to_approval=_days_between(created_at, approved_at),
+            )
+    return facts
+
+
+def _rollup_key(fact):
+    return fact.month, fact.source, fact.specialization, fact.recruiter
+
+
+def _add_contribution(deltas, fact, sign):
+    delta = deltas[_rollup_key(fact)]
+    delta['candidates'] += sign
+    delta['applied'] += sign * fact.applied
+    delta['interviewed'] += sign * fact.interviewed
+    delta['approved'] += sign * fact.approved
+    delta['days_to_interview_total'] += sign * (fact.days_to_interview or 0)
+    delta['days_to_approval_total'] += sign * (fact.days_to_approval or 0)
+
+
+def _changed_candidate_ids(since, deletions):
+    changed = set(Candidate.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+    changed.update(Application.objects.filter(updated_at__gt=since).values_list('candidate_id', flat=True))
+    changed.update(Interview.objects.filter(updated_at__gt=since).values_list('candidate_id', flat=True))
+    changed.update(candidate_id for _, candidate_id in deletions)
+    return changed
+
+
+def update_funnel_rollups(full=False):
+    """Инкрементальный пересчет агрегатов воронки. Возвращает число обработанных кандидатов"""
+    with use_primary(), transaction.atomic():
+        # Блокировка отметки не дает двум пересчетам посчитать одно изменение дважды
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=FUNNEL)
+        now = timezone.now()
+        # Удаляются только прочитанные записи: записанные во время пересчета дождутся следующего
+        deletions = list(FunnelDeletion.objects.values_list('id', 'candidate_id'))
+
+        if full or watermark.value is None:
+            CandidateFunnel.objects.all().delete()
+            FunnelRollup.objects.all().delete()
+            changed_ids = set(Candidate.objects.values_list('id', flat=True))
+        else:
+            changed_ids = _changed_candidate_ids(watermark.value - WATERMARK_OVERLAP, deletions)
+
+        deltas = defaultdict(lambda: defaultdict(float))
+
+        # Удаленные кандидаты: вычитаем вклад и убираем факт
+        orphans = list(CandidateFunnel.objects.filter(candidate__isnull=True))
+        for fact in orphans:
+            _add_contribution(deltas, fact, -1)
+        CandidateFunnel.objects.filter(id__in=[fact.id for fact in orphans]).delete()
+
+        old_facts = {}
+        changed_list = list(changed_ids)
+        for start in range(0, len(changed_list), BATCH_SIZE):
+            for fact in CandidateFunnel.objects.filter(candidate_id__in=changed_list[start:start + BATCH_SIZE]):
+                old_facts[fact.candidate_id] = fact
+
+        new_facts = _compute_facts(changed_ids)
+        to_create, to_update = [], []
+        for candidate_id, fact in new_facts.items():
+            old = old_facts.get(candidate_id)
+            if old is not None:
+                _add_contribution(deltas, old, -1)
+                fact.id = old.id
+                to_update.append(fact)
+            else:
+                to_create.append(fact)
+            _add_contribution(deltas, fact, 1)
+
+        CandidateFunnel.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        CandidateFunnel.objects.bulk_update(
+            to_update,
+            ['month', 'source', 'specialization', 'recruiter', 'applied', 'interviewed',
+             'approved', 'days_to_interview', 'days_to_approval'],
+            batch_size=BATCH_SIZE,
+        )
+
+        _apply_deltas(deltas)
+
+        for start in range(0, len(deletions), BATCH_SIZE):
+            FunnelDeletion.objects.filter(id__in=[pk for pk, _ in deletions[start:start + BATCH_SIZE]]).delete()
+        watermark.value = now
+        watermark.save()
+
+    return len(new_facts) + len(orphans)
+
+
+def _apply_deltas(deltas):
+    # Агрегатов немного (сотни строк), поэтому читаем их все
+    rollups = {_rollup_key(rollup): rollup for rollup in FunnelRollup.objects.all()}
+    touched = {}
+
+    for key, delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        rollup = rollups.get(key)
+        if rollup is None:
+            month, source, specialization, recruiter = key
+            rollup = FunnelRollup(month=month, source=source, specialization=specialization, recruiter=recruiter)
+        for counter in COUNTERS:
+            value = getattr(rollup, counter) + delta[counter]
+            if counter in INTEGER_COUNTERS:
+                value = int(round(value))
+            setattr(rollup, counter, value)
+        touched[key] = rollup
+
+    FunnelRollup.objects.bulk_create(
+        [rollup for rollup in touched.values() if rollup.pk is None and rollup.candidates > 0]
+    )
+    FunnelRollup.objects.bulk_update(
+        [rollup for rollup in touched.values() if rollup.pk is not None and rollup.candidates > 0], COUNTERS
+    )
+    FunnelRollup.objects.filter(
+        id__in=[rollup.pk for rollup in touched.values() if rollup.pk is not None and rollup.candidates <= 0]
+    ).delete()
+
+
+@task
+def refresh_funnel_rollups(job, full=False):
+    """Пересчет воронки фоновой задачей (кнопка на странице аналитики)"""
+    return {'candidates': update_funnel_rollups(full=full)}
+
+
+def funnel_updated_at():
+    """До какого момента учтены изменения в агрегатах; None - агрегаты еще не считались"""
+    return RollupWatermark.objects.filter(name=FUNNEL).values_list('value', flat=True).first()
+
+
+def _rate(part, total):
+    return round(part * 100 / total, 1) if total else 0
+
+
+def _with_rates(row):
+    row['application_rate'] = _rate(row['applied'], row['candidates'])
+    row['interview_rate'] = _rate(row['interviewed'], row['applied'])
+    row['approval_rate'] = _rate(row['approved'], row['interviewed'])
+    row['overall_rate'] = _rate(row['approved'], row['candidates'])
+    row['avg_days_to_interview'] = (
+        round(row['days_to_interview_total'] / row['interviewed'], 1) if row['interviewed'] else None
+    )
+    row['avg_days_to_approval'] = (
+        round(row['days_to_approval_total'] / row['approved'], 1) if row['approved'] else None
+    )
+    return row
+
+
+def funnel_report(by='source'):
+    """Воронка в разрезе одного измерения - группировка по таблице агрегатов"""
+    rows = (
+        FunnelRollup.objects.values(by)
+        .annotate(**{counter: Sum(counter) for counter in COUNTERS})
+        .order_by(by)
+    )
+    labels = dict(Candidate._meta.get_field('source').choices) if by == 'source' else {}
+    report = []
+    for row in rows:
+        row = _with_rates(dict(row))
+        row['label'] = labels.get(row[by], row[by]) if by != 'month' else row[by]
+        report.append(row)
+    return report
+
+
+def funnel_totals():
+    totals = FunnelRollup.objects.aggregate(**{counter: Sum(counter) for counter in COUNTERS})
+    return _with_rates({counter: totals[counter] or 0 for counter in COUNTERS})
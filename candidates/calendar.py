@@ -0,0 +1,155 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from users.models import new_calendar_feed_key
+from .models import Interview
+
+
+# Календарь собеседований.
+# Все выборки - по окну scheduled_date (индексы interview_scheduled_idx и
+# interview_interviewer_idx), без чтения всей таблицы.
+# Лента iCalendar отдается потоком: события пишутся по мере чтения строк из БД.
+
+FEED_SALT = 'candidates.calendar.feed'
+
+
+def interviews_in_window(start, end, interviewers=None):
+    """Собеседования с start (включительно) по end (не включая), кроме отмененных"""
+    interviews = (
+        Interview.objects.filter(scheduled_date__gte=start, scheduled_date__lt=end)
+        .exclude(status='cancelled')
+        .select_related('candidate', 'scheduled_by')
+        .order_by('scheduled_date')
+    )
+    if interviewers is not None:
+        interviews = interviews.filter(scheduled_by__in=interviewers)
+    return interviews
+
+
+def week_start(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def day_bounds(start_day, days):
+    """Границы [start_day 00:00, start_day + days 00:00) в часовом поясе проекта"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.datetime.combine(start_day, datetime.time.min), tz)
+    end = timezone.make_aware(datetime.datetime.combine(start_day + datetime.timedelta(days=days),
+                                                        datetime.time.min), tz)
+    return start, end
+
+
+# Лента .ics
+
+def feed_token(user):
+    """Токен ленты для подписки в календаре (клиенты календарей не передают сессию).
+    Содержит ключ ленты пользователя: после выпуска нового ключа старые ссылки не работают"""
+    return signing.Signer(salt=FEED_SALT).sign(f'{user.pk}:{user.calendar_feed_key}')
+
+
+def user_id_from_token(token):
+    """Id владельца ленты; None - если токен подделан или отозван, а пользователь удален или отключен"""
+    try:
+        user_id, key = signing.Signer(salt=FEED_SALT).unsign(token).split(':')
+        user_id = int(user_id)
+    except (signing.BadSignature, ValueError):
+        return None
+    current_key = (
+        get_user_model().objects.filter(pk=user_id, is_active=True)
+        .values_list('calendar_feed_key', flat=True).first()
+    )
+    if current_key is None or not constant_time_compare(key, current_key):
+        return None
+    return user_id
+
+
+def reset_feed_key(user):
+    """Новый ключ ленты: ссылки, выданные раньше, перестают работать"""
+    user.calendar_feed_key = new_calendar_feed_key()
+    user.save(update_fields=['calendar_feed_key'])
+
+
+def feed_window():
+    now = timezone.now()
+    return (now - datetime.timedelta(days=settings.CALENDAR_FEED_PAST_DAYS),
+            now + datetime.timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS))
+
+
+def feed_interviews(user_id):
+    start, end = feed_window()
+    return interviews_in_window(start, end, interviewers=[user_id])
+
+
+def feed_etag(user_id):
+    """ETag ленты: один агрегат по индексу. Меняется при любом изменении, добавлении
+    или удалении собеседования в окне ленты"""
+    start, end = feed_window()
+    state = (
+        Interview.objects.filter(scheduled_by_id=user_id, scheduled_date__gte=start, scheduled_date__lt=end)
+        .aggregate(count=Count('id'), changed=Max('updated_at'))
+    )
+    changed = int(state['changed'].timestamp() * 1000000) if state['changed'] else 0
+    # Окно ленты сдвигается раз в сутки - учитываем дату, чтобы не отдавать 304 со старым окном
+    return f'"{user_id}-{state["count"]}-{changed}-{timezone.localdate():%Y%m%d}"'
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Строки длиннее 75 октетов переносятся (RFC 5545, 3.1)"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        # Не разрываем многобайтовый символ UTF-8
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(encoded[:size].decode('utf-8'))
+        encoded = encoded[size:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _stamp(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(interview, host):
+    start = interview.scheduled_date
+    end = interview.end_date
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:interview-{interview.pk}@{host}',
+        f'DTSTAMP:{_stamp(interview.updated_at)}',
+        f'DTSTART:{_stamp(start)}',
+        f'DTEND:{_stamp(end)}',
+        f'SUMMARY:{_escape(f"{interview.get_interview_type_display()}: {interview.candidate}")}',
+    ]
+    if interview.notes:
+        lines.append(f'DESCRIPTION:{_escape(interview.notes)}')
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def iter_feed(user_id, host):
+    """Лента iCalendar по частям: заголовок, события по мере чтения из БД, окончание"""
+    yield ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//HR Agency//Interviews//RU',
+        'CALSCALE:GREGORIAN',
+        'X-WR-CALNAME:Собеседования',
+    ])
+    for interview in feed_interviews(user_id).iterator(chunk_size=settings.DB_ITERATOR_CHUNK_SIZE):
+        yield _event(interview, host)
+    yield 'END:VCALENDAR\r\n'
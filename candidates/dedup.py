@@ -0,0 +1,198 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from hr_agency.cache import bump_version
+from hr_agency.replicas import use_primary
+from .models import Candidate, CandidateMatchKey, DuplicateCandidate
+from .normalization import match_record, blocking_keys, score, score_pairs
+
+
+# Поиск дубликатов кандидатов.
+# Кандидаты сравниваются только внутри блоков - групп с общим ключом (телефон,
+# имя ящика, ФИО), а не каждый с каждым. Ключи хранятся в CandidateMatchKey:
+# при сохранении кандидата его ключи обновляются, и он сравнивается только
+# с кандидатами из своих блоков (поиск по индексу). Полный пересчет
+# (find_all_duplicates) оценивает пары в нескольких процессах.
+
+RECORD_FIELDS = ['id', 'first_name', 'last_name', 'patronymic', 'phone', 'email']
+
+BATCH_SIZE = 2000
+PAIRS_PER_TASK = 5000
+
+# Поля, которые при слиянии заполняются из дубликата, если у основной записи пусто
+MERGE_FIELDS = [
+    'patronymic', 'phone', 'age', 'specialization', 'position_level', 'work_format',
+    'last_workplace', 'last_position', 'work_period', 'responsibilities',
+    'education_level', 'education_institution', 'education_specialty', 'graduation_year',
+    'source_details', 'assigned_recruiter', 'resume', 'desired_salary', 'notice_period',
+]
+
+
+def _record(candidate):
+    return match_record(*(getattr(candidate, field) for field in RECORD_FIELDS))
+
+
+def _ordered(first_id, second_id):
+    return (first_id, second_id) if first_id < second_id else (second_id, first_id)
+
+
+def _save_pairs(scored):
+    """Добавляет пары в очередь; у существующих обновляется оценка, решение не трогается"""
+    DuplicateCandidate.objects.bulk_create(
+        [DuplicateCandidate(candidate_id=first_id, duplicate_id=second_id, score=value, reasons=reasons)
+         for first_id, second_id, value, reasons in scored],
+        update_conflicts=True, unique_fields=['candidate', 'duplicate'], update_fields=['score', 'reasons'],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def update_candidate_matches(candidate):
+    """Инкрементальная проверка одного кандидата (вызывается при сохранении)"""
+    record = _record(candidate)
+    keys = blocking_keys(record)
+    threshold = settings.DUPLICATE_SCORE_THRESHOLD
+
+    with use_primary(), transaction.atomic():
+        CandidateMatchKey.objects.filter(candidate=candidate).delete()
+        CandidateMatchKey.objects.bulk_create([CandidateMatchKey(candidate=candidate, key=key) for key in keys])
+
+        # Как и при полном пересчете, слишком большие блоки пропускаются: кандидат
+        # сравнивается со всеми соседями из остальных блоков, а не с частью
+        block_sizes = (
+            CandidateMatchKey.objects.filter(key__in=keys).values('key')
+            .annotate(size=Count('id')).values_list('key', 'size')
+        )
+        compared_keys = [key for key, size in block_sizes if size <= settings.DUPLICATE_MAX_BLOCK]
+        neighbour_ids = set(
+            CandidateMatchKey.objects.filter(key__in=compared_keys).exclude(candidate=candidate)
+            .values_list('candidate_id', flat=True)
+        )
+        scored = []
+        for neighbour in Candidate.objects.filter(id__in=neighbour_ids).only(*RECORD_FIELDS):
+            value, reasons = score(record, _record(neighbour))
+            if value >= threshold:
+                scored.append((*_ordered(candidate.pk, neighbour.pk), value, ', '.join(reasons)))
+        _save_pairs(scored)
+
+        # Кандидат изменился и больше не похож - убираем его из очереди (как и при полном
+        # пересчете, в том числе пары, у которых общие только слишком большие блоки)
+        matched = {(first_id, second_id) for first_id, second_id, _, _ in scored}
+        stale = [
+            pair.pk for pair in DuplicateCandidate.objects.filter(
+                Q(candidate=candidate) | Q(duplicate=candidate), status='pending'
+            ) if (pair.candidate_id, pair.duplicate_id) not in matched
+        ]
+        DuplicateCandidate.objects.filter(pk__in=stale).delete()
+    return len(scored)
+
+
+def find_all_duplicates(workers=4):
+    """Полный пересчет: ключи всех кандидатов, пары внутри блоков, оценка в процессах.
+    Возвращает (число оцененных пар, число пар в очереди)"""
+    threshold = settings.DUPLICATE_SCORE_THRESHOLD
+    max_block = settings.DUPLICATE_MAX_BLOCK
+
+    with use_primary():
+        records = {}
+        blocks = defaultdict(list)
+        keys = []
+        rows = Candidate.objects.order_by('id').values_list(*RECORD_FIELDS).iterator(chunk_size=BATCH_SIZE)
+        for row in rows:
+            record = match_record(*row)
+            records[record[0]] = record
+            for key in blocking_keys(record):
+                blocks[key].append(record[0])
+                keys.append(CandidateMatchKey(candidate_id=record[0], key=key))
+
+        with transaction.atomic():
+            CandidateMatchKey.objects.all().delete()
+            CandidateMatchKey.objects.bulk_create(keys, batch_size=BATCH_SIZE)
+
+        # Слишком большие блоки (частые ФИО) не дают сравнений, которые стоят своей цены
+        pairs = set()
+        for ids in blocks.values():
+            if 1 < len(ids) <= max_block:
+                pairs.update(combinations(sorted(ids), 2))
+        pairs = sorted(pairs)
+
+        tasks = []
+        for start in range(0, len(pairs), PAIRS_PER_TASK):
+            chunk = pairs[start:start + PAIRS_PER_TASK]
+            needed = {candidate_id for pair in chunk for candidate_id in pair}
+            tasks.append((chunk, {candidate_id: records[candidate_id] for candidate_id in needed}, threshold))
+
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(score_pairs, *zip(*tasks)))
+        else:
+            results = [score_pairs(*task) for task in tasks]
+
+        scored = [pair for result in results for pair in result]
+        with transaction.atomic():
+            _save_pairs(scored)
+            # Пары, которые больше не набирают порог, убираются из очереди
+            matched = {(first_id, second_id) for first_id, second_id, _, _ in scored}
+            stale = [
+                pk for pk, first_id, second_id in DuplicateCandidate.objects.filter(status='pending')
+                .values_list('pk', 'candidate_id', 'duplicate_id')
+                if (first_id, second_id) not in matched
+            ]
+            DuplicateCandidate.objects.filter(pk__in=stale).delete()
+
+    return len(pairs), len(scored)
+
+
+def merge_candidates(pair, keep, user=None):
+    """Слияние пары в одной транзакции: навыки, отклики и собеседования переходят
+    к основной записи, пустые поля заполняются из дубликата, дубликат удаляется"""
+    other = pair.duplicate if keep.pk == pair.candidate_id else pair.candidate
+    now = timezone.now()
+
+    with transaction.atomic():
+        keep = Candidate.objects.select_for_update().get(pk=keep.pk)
+        other = Candidate.objects.select_for_update().get(pk=other.pk)
+
+        keep.skills.add(*other.skills.all())
+
+        for field in MERGE_FIELDS:
+            if not getattr(keep, field) and getattr(other, field):
+                setattr(keep, field, getattr(other, field))
+        if other.recruiter_notes and other.recruiter_notes not in keep.recruiter_notes:
+            keep.recruiter_notes = '\n\n'.join(filter(None, [keep.recruiter_notes, other.recruiter_notes]))
+
+        # Отклик на вакансию, на которую уже откликнулась основная запись, не переносится
+        kept_vacancies = set(keep.applications.values_list('vacancy_id', flat=True))
+        moved_vacancies = set(
+            other.applications.exclude(vacancy_id__in=kept_vacancies).values_list('vacancy_id', flat=True)
+        )
+        other.applications.exclude(vacancy_id__in=kept_vacancies).update(candidate=keep, updated_at=now)
+        other.interviews.update(candidate=keep, updated_at=now)
+
+        pair.status = 'merged'
+        pair.resolved_at = now
+        pair.resolved_by = user
+        pair.save()
+        # Остальные пары с дубликатом теряют смысл
+        DuplicateCandidate.objects.filter(
+            Q(candidate=other) | Q(duplicate=other), status='pending'
+        ).delete()
+
+        other.delete()
+        keep.save()
+
+    for vacancy_id in moved_vacancies | kept_vacancies:
+        bump_version('vacancy', vacancy_id)
+    return keep
+
+
+def dismiss_pair(pair, user=None):
+    pair.status = 'dismissed'
+    pair.resolved_at = timezone.now()
+    pair.resolved_by = user
+    pair.save()
@@ -0,0 +1,201 @@
+import datetime
+import functools
+import itertools
+import secrets
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+from django.db import connections
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.text import slugify
+
+from jobs.queue import task
+from .models import Candidate, PersonnelForm
+from .pdf import render_many, render_pdf
+
+
+# PDF-документы: анкета сотрудника и профиль кандидата.
+# Текст документа - Django-шаблон (templates/documents/), верстка - candidates/pdf.py.
+# Готовый PDF хранится в закрытом хранилище STORAGES['private'] (не в MEDIA_ROOT,
+# в документах персональные данные) под именем с updated_at объекта: пока объект
+# не изменился, документ не верстается заново. При пакетной генерации основной процесс
+# читает объекты и рендерит шаблоны, а верстка идет в пуле процессов.
+
+# Меняется вместе с шаблонами документов - старые файлы перестают использоваться
+LAYOUT_VERSION = 1
+
+DOCUMENTS = {
+    'personnel_form': {
+        'model': PersonnelForm,
+        'template': 'documents/personnel_form.txt',
+        'filename': 'anketa',
+        'related': ['skills'],
+    },
+    'candidate': {
+        'model': Candidate,
+        'template': 'documents/candidate.txt',
+        'filename': 'candidate',
+        'related': ['skills'],
+    },
+}
+
+RENDER_BATCH_SIZE = 50
+PROGRESS_EVERY = 100
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    return get_template(name)
+
+
+def _fonts():
+    return settings.PDF_FONT_PATH, settings.PDF_BOLD_FONT_PATH
+
+
+def document_storage():
+    return storages['private']
+
+
+def storage_name(kind, obj):
+    return f'documents/{kind}/{obj.pk}/{obj.updated_at:%Y%m%d%H%M%S%f}-v{LAYOUT_VERSION}.pdf'
+
+
+def download_name(kind, obj):
+    return f"{DOCUMENTS[kind]['filename']}-{obj.pk}-{slugify(str(obj), allow_unicode=True)}.pdf"
+
+
+def document_markup(kind, obj):
+    return _template(DOCUMENTS[kind]['template']).render({'object': obj})
+
+
+def _save(kind, obj, content):
+    storage = document_storage()
+    name = storage_name(kind, obj)
+    folder = name.rsplit('/', 1)[0]
+    # Версии документа по прежнему updated_at больше не нужны
+    if storage.exists(folder):
+        for stale in storage.listdir(folder)[1]:
+            storage.delete(f'{folder}/{stale}')
+    return storage.save(name, ContentFile(content))
+
+
+def get_document(kind, obj):
+    """Имя PDF в хранилище; документ верстается, если его еще нет для текущего updated_at"""
+    name = storage_name(kind, obj)
+    if document_storage().exists(name):
+        return name
+    content, _ = render_pdf(document_markup(kind, obj), *_fonts())
+    return _save(kind, obj, content)
+
+
+def render_documents(kind, queryset, workers=None):
+    """Документы для всех объектов queryset: генератор (объект, имя в хранилище,
+    число страниц или None, если документ взят из хранилища).
+
+    Пока пул верстает одну пачку, основной процесс сохраняет предыдущую
+    и готовит следующую.
+    """
+    workers = workers or settings.DOCUMENT_WORKERS
+    queryset = queryset.prefetch_related(*DOCUMENTS[kind]['related']).order_by('id')
+    batches = _batched(queryset.iterator(chunk_size=RENDER_BATCH_SIZE), RENDER_BATCH_SIZE)
+
+    if workers <= 1:
+        for batch in batches:
+            yield from _finish(kind, *_submit(kind, batch, None, 1))
+        return
+
+    # Процессы создаются до первого запроса к БД: при fork им не должно
+    # достаться открытое соединение основного процесса
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        executor.submit(int).result()
+        pending = None
+        for batch in batches:
+            submitted = _submit(kind, batch, executor, workers)
+            if pending is not None:
+                yield from _finish(kind, *pending)
+            pending = submitted
+        if pending is not None:
+            yield from _finish(kind, *pending)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _submit(kind, batch, executor, workers):
+    """Отправляет на верстку документы пачки, которых нет в хранилище.
+    Возвращает (готовые объекты, объекты на верстку, futures с результатами по порядку)"""
+    cached, todo = [], []
+    for obj in batch:
+        (cached if document_storage().exists(storage_name(kind, obj)) else todo).append(obj)
+    markups = [document_markup(kind, obj) for obj in todo]
+    if executor is None:
+        return cached, todo, [_completed(render_many(markups, *_fonts()))]
+    # Пачка делится между процессами кусками по несколько документов
+    size = max(1, -(-len(markups) // workers))
+    return cached, todo, [executor.submit(render_many, markups[start:start + size], *_fonts())
+                          for start in range(0, len(markups), size)]
+
+
+def _finish(kind, cached, todo, futures):
+    for obj in cached:
+        yield obj, storage_name(kind, obj), None
+    rendered = itertools.chain.from_iterable(future.result() for future in futures)
+    for obj, (content, pages) in zip(todo, rendered):
+        yield obj, _save(kind, obj, content), pages
+
+
+def write_zip(kind, documents, fileobj):
+    """Пишет документы в ZIP-архив по мере готовности, не собирая его в памяти.
+    fileobj может не поддерживать seek (например, stdout)"""
+    # PDF уже сжаты - повторное сжатие только тратит время
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for obj, name, pages in documents:
+            with document_storage().open(name, 'rb') as source, archive.open(download_name(kind, obj), 'w') as target:
+                shutil.copyfileobj(source, target)
+            yield obj, name, pages
+
+
+def documents_queryset(kind, approved=False, since=None):
+    queryset = DOCUMENTS[kind]['model'].objects.all()
+    if approved:
+        queryset = queryset.filter(is_approved=True)
+    if since:
+        queryset = queryset.filter(updated_at__date__gte=since)
+    return queryset
+
+
+@task
+def render_documents_archive(job, kind, approved=False, since=None):
+    """Фоновая сборка ZIP с документами. Результат - путь к архиву в хранилище"""
+    queryset = documents_queryset(kind, approved, since and datetime.date.fromisoformat(since))
+    total = queryset.count()
+    count = 0
+    with tempfile.TemporaryFile() as raw:
+        for count, _ in enumerate(write_zip(kind, render_documents(kind, queryset), raw), 1):
+            if count % PROGRESS_EVERY == 0:
+                job.report_progress(count * 100 // max(total, 1), f'Готово {count} из {total}')
+        raw.seek(0)
+        name = default_storage.save(f'exports/documents-{job.pk}-{secrets.token_hex(8)}.zip', File(raw))
+
+    return {
+        'file': name,
+        'filename': f"{DOCUMENTS[kind]['filename']}-{timezone.localdate():%Y-%m-%d}.zip",
+        'documents': count,
+    }
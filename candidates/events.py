@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+
+# Доменные события. Отправляются внутри транзакции изменения: обработчики
+# могут записать что-то в той же транзакции, но медленную работу (письма)
+# выполняют в фоне.
+
+# Смена статуса отклика или собеседования (StatusTrackedModel.save, history.bulk_set_status).
+# sender - модель, changes - список (id, прежний статус или '' для нового объекта, новый статус),
+# actor - пользователь или None
+status_changed = Signal()
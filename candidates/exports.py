@@ -0,0 +1,67 @@
+import csv
+import io
+import secrets
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobs.queue import task
+from .models import Candidate
+
+
+# Выгрузка кандидатов в CSV: потоком в ответе (candidate_export) или фоновой задачей,
+# которая пишет файл в хранилище и сообщает прогресс
+
+EXPORT_FIELDS = [
+    ('last_name', 'Фамилия'),
+    ('first_name', 'Имя'),
+    ('patronymic', 'Отчество'),
+    ('email', 'Email'),
+    ('phone', 'Телефон'),
+    ('specialization', 'Специализация'),
+    ('position_level', 'Уровень позиции'),
+    ('experience_years', 'Опыт работы (лет)'),
+    ('source', 'Источник'),
+    ('assigned_recruiter', 'Ответственный рекрутер'),
+    ('created_at', 'Дата добавления'),
+]
+
+PROGRESS_EVERY = 5000
+
+
+def export_rows():
+    # Строки читаются пачками через .iterator() (на PostgreSQL - серверный курсор)
+    return Candidate.objects.order_by('id').values_list(
+        *[name for name, _ in EXPORT_FIELDS]
+    ).iterator(chunk_size=settings.DB_ITERATOR_CHUNK_SIZE)
+
+
+@task
+def export_candidates_csv(job):
+    """Фоновая выгрузка всех кандидатов. Результат - путь к файлу в хранилище"""
+    total = Candidate.objects.count()
+    count = 0
+    with tempfile.TemporaryFile() as raw:
+        # BOM, чтобы Excel распознал UTF-8
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        writer = csv.writer(text, delimiter=';')
+        writer.writerow([title for _, title in EXPORT_FIELDS])
+        for row in export_rows():
+            writer.writerow(row)
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                job.report_progress(count * 100 // max(total, 1), f'Выгружено {count} из {total}')
+        text.flush()
+        raw.seek(0)
+        # Случайная часть имени - файл с персональными данными нельзя угадать по адресу
+        name = default_storage.save(f'exports/candidates-{job.pk}-{secrets.token_hex(8)}.csv', File(raw))
+        text.detach()
+
+    return {
+        'file': name,
+        'filename': f'candidates-{timezone.localdate():%Y-%m-%d}.csv',
+        'rows': count,
+    }
@@ -0,0 +1,98 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min
+from django.utils import timezone
+
+from hr_agency.audit import get_current_actor
+from .events import status_changed
+from .models import Application
+
+
+# Журнал смены статусов: массовая смена статуса и запросы по журналу.
+# Текущий этап берется из status_changed_at (индекс status + status_changed_at),
+# завершенные этапы - из time_in_previous в журнале (индекс from_status + changed_at):
+# ни один запрос не сопоставляет соседние строки журнала и не обходит все отклики.
+
+BULK_BATCH_SIZE = 1000
+
+
+def bulk_set_status(queryset, status):
+    """Перевод объектов queryset в статус одним UPDATE с записью журнала через bulk_create.
+
+    Возвращает (id измененных, id уже бывших в этом статусе). Сигналы post_save
+    не отправляются - кэш сбрасывает вызывающий код; status_changed отправляется
+    один раз на всю операцию.
+    """
+    model = queryset.model
+    change_model = model.status_changes.rel.related_model
+    fk = model.status_changes.field.attname
+    now = timezone.now()
+    actor = get_current_actor()
+
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values_list('id', 'status', 'status_changed_at'))
+        changed = [row for row in rows if row[1] != status]
+        changed_ids = [pk for pk, _, _ in changed]
+        # update() не заполняет auto_now - updated_at задаем явно (по нему считаются агрегаты воронки)
+        model.objects.filter(id__in=changed_ids).update(status=status, status_changed_at=now, updated_at=now)
+        change_model.objects.bulk_create([
+            change_model(**{fk: pk}, from_status=previous, to_status=status, changed_at=now, changed_by=actor,
+                         time_in_previous=now - entered_at if entered_at else None)
+            for pk, previous, entered_at in changed
+        ], batch_size=BULK_BATCH_SIZE)
+        if changed:
+            status_changed.send(sender=model, changes=[(pk, previous, status) for pk, previous, _ in changed],
+                                actor=actor)
+
+    return changed_ids, [pk for pk, previous, _ in rows if previous == status]
+
+
+def _days(duration):
+    return round(duration.total_seconds() / 86400, 1) if duration is not None else None
+
+
+def current_stage_durations(model=Application, now=None):
+    """Сколько объектов сейчас в каждом статусе и как давно"""
+    now = now or timezone.now()
+    rows = (
+        model.objects.filter(status_changed_at__isnull=False)
+        .values('status')
+        .annotate(count=Count('id'), oldest=Min('status_changed_at'), newest=Max('status_changed_at'))
+        .order_by('status')
+    )
+    labels = dict(model.STATUS_CHOICES)
+    return [{
+        'status': row['status'],
+        'label': labels.get(row['status'], row['status']),
+        'count': row['count'],
+        'max_days': _days(now - row['oldest']),
+        'min_days': _days(now - row['newest']),
+    } for row in rows]
+
+
+def completed_stage_durations(model=Application, since=None):
+    """Среднее и максимальное время в статусе по завершенным этапам"""
+    change_model = model.status_changes.rel.related_model
+    changes = change_model.objects.filter(time_in_previous__isnull=False)
+    if since is not None:
+        changes = changes.filter(changed_at__gte=since)
+    rows = (
+        changes.values('from_status')
+        .annotate(count=Count('id'), avg=Avg('time_in_previous'), max=Max('time_in_previous'))
+        .order_by('from_status')
+    )
+    labels = dict(model.STATUS_CHOICES)
+    return [{
+        'status': row['from_status'],
+        'label': labels.get(row['from_status'], row['from_status']),
+        'count': row['count'],
+        'avg_days': _days(row['avg']),
+        'max_days': _days(row['max']),
+    } for row in rows]
+
+
+def stuck(days, status='pending', model=Application):
+    """Объекты, которые находятся в статусе дольше days дней (самые старые первыми)"""
+    threshold = timezone.now() - datetime.timedelta(days=days)
+    return model.objects.filter(status=status, status_changed_at__lt=threshold).order_by('status_changed_at')
@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from candidates.models import Candidate
+from candidates.snapshots import backfill_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Дозаполняет дневные срезы за прошлые даты (параллельно по диапазонам дат)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=datetime.date.fromisoformat,
+                            help='Начальная дата ГГГГ-ММ-ДД (по умолчанию - дата первого кандидата)')
+        parser.add_argument('--end', type=datetime.date.fromisoformat, help='Конечная дата (по умолчанию сегодня)')
+        parser.add_argument('--workers', type=int, default=4, help='Число параллельных потоков')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Дней в одном диапазоне')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        start = options['start']
+        if start is None:
+            first = Candidate.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            start = timezone.localtime(first).date() if first else end
+        if start > end:
+            raise CommandError('Начальная дата позже конечной')
+
+        days = backfill_snapshots(start, end, workers=options['workers'], chunk_days=options['chunk_days'])
+        self.stdout.write(self.style.SUCCESS(f'Рассчитано дней: {days} ({start:%d.%m.%Y} - {end:%d.%m.%Y})'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from hr_agency.page_cache import get_page_cache
+
+
+class Command(BaseCommand):
+    help = 'Счетчики кэша страниц (статистика, панели, список вакансий) по всем процессам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счетчики после вывода')
+
+    def handle(self, *args, **options):
+        page_cache = get_page_cache()
+        metrics = page_cache.metrics()
+        for name, value in metrics.items():
+            self.stdout.write(f'{name}: {value}')
+
+        hits = metrics['local_hits'] + metrics['shared_hits']
+        total = hits + metrics['misses'] + metrics['expired'] + metrics['early_refreshes']
+        if total:
+            self.stdout.write(self.style.SUCCESS(f'Попаданий: {hits * 100 / total:.1f}% из {total} обращений'))
+
+        if options['reset']:
+            page_cache.reset_metrics()
+            self.stdout.write('Счетчики обнулены')
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from candidates.dedup import find_all_duplicates
+
+
+class Command(BaseCommand):
+    help = 'Полный поиск дубликатов кандидатов: пересчет ключей блоков и оценка пар в нескольких процессах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Число процессов для оценки пар')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        compared, found = find_all_duplicates(workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сравнено пар: {compared}, возможных дубликатов: {found} ({time.perf_counter() - started:.1f} с)'
+        ))
@@ -0,0 +1,60 @@
+import datetime
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from candidates.documents import DOCUMENTS, documents_queryset, render_documents, write_zip
+from candidates.pdf import PdfUnavailable
+
+
+class Command(BaseCommand):
+    help = ('PDF-документы анкет или профилей кандидатов в пуле процессов; с --output - '
+            'ZIP-архив, который пишется по мере готовности документов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(DOCUMENTS), help='Тип документов')
+        parser.add_argument('--approved', action='store_true', help='Только проверенные анкеты')
+        parser.add_argument('--since', type=datetime.date.fromisoformat,
+                            help='Только измененные начиная с даты ГГГГ-ММ-ДД')
+        parser.add_argument('--output', help='Путь к ZIP-архиву или "-" для stdout')
+        parser.add_argument('--workers', type=int, default=settings.DOCUMENT_WORKERS, help='Число процессов')
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        if options['approved'] and kind != 'personnel_form':
+            raise CommandError('--approved есть только у анкет')
+        # Если архив пишется в stdout, статистика выводится в stderr
+        log = self.stderr if options['output'] == '-' else self.stdout
+
+        documents = render_documents(kind, documents_queryset(kind, options['approved'], options['since']),
+                                     options['workers'])
+        output = None
+        if options['output']:
+            output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+            documents = write_zip(kind, documents, output)
+
+        started = time.perf_counter()
+        rendered = cached = pages = 0
+        try:
+            for _, _, page_count in documents:
+                if page_count is None:
+                    cached += 1
+                else:
+                    rendered += 1
+                    pages += page_count
+                if (rendered + cached) % 500 == 0:
+                    log.write(f'Готово документов: {rendered + cached}')
+        except PdfUnavailable as e:
+            raise CommandError(str(e))
+        finally:
+            if output is not None and output is not sys.stdout.buffer:
+                output.close()
+
+        elapsed = time.perf_counter() - started
+        log.write(self.style.SUCCESS(
+            f'Документов: {rendered + cached} (сверстано {rendered}, из хранилища {cached}), '
+            f'страниц: {pages}, {elapsed:.1f} с, {pages / elapsed if elapsed else 0:.1f} стр/с, '
+            f'{(rendered + cached) / elapsed if elapsed else 0:.1f} док/с'
+        ))
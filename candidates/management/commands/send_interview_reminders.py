@@ -1,13 +1,13 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
 from candidates.models import Interview
+from outbox.mail import queue_email
 import datetime
 
 
 class Command(BaseCommand):
-    help = 'Отправляет напоминания о предстоящих собеседованиях'
+    help = 'Ставит в очередь напоминания о предстоящих собеседованиях (отправляет send_outbox)'
 
     def handle(self, *args, **options):
         now = timezone.now()
@@ -19,13 +19,11 @@ class Command(BaseCommand):
             scheduled_date__gt=now,
             status='scheduled',
             reminder_sent=False
-        )
+        ).select_related('candidate', 'scheduled_by')
 
         for interview in upcoming_interviews:
-            try:
-                # Отправляем email напоминание
-                subject = f'Напоминание: Собеседование с {interview.candidate}'
-                message = f'''
+            subject = f'Напоминание: Собеседование с {interview.candidate}'
+            message = f'''
 Здравствуйте!
 
 Напоминаем о запланированном собеседовании:
@@ -38,28 +36,23 @@ class Command(BaseCommand):
 
 С уважением,
 HR System
-                '''
-
-                # Отправляем email рекрутеру
-                if interview.scheduled_by.email:
-                    send_mail(
-                        subject,
-                        message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [interview.scheduled_by.email],
-                        fail_silently=False,
-                    )
-
-                # Помечаем, что напоминание отправлено
+            '''
+
+            # Письмо и отметка о напоминании сохраняются в одной транзакции: после сбоя
+            # не будет ни отметки без письма, ни письма без отметки. Ключ с датой
+            # собеседования не даст поставить напоминание дважды при параллельном запуске,
+            # а после переноса собеседования напоминание уйдет снова
+            with transaction.atomic():
+                queue_email(
+                    subject,
+                    message,
+                    [interview.scheduled_by.email],
+                    key=f'interview-reminder:{interview.pk}:{interview.scheduled_date:%Y%m%d%H%M}',
+                )
                 interview.reminder_sent = True
                 interview.reminder_date = now
-                interview.save()
-
-                self.stdout.write(
-                    self.style.SUCCESS(f'Напоминание отправлено для собеседования с {interview.candidate}')
-                )
+                interview.save(update_fields=['reminder_sent', 'reminder_date'])
 
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Ошибка при отправке напоминания: {e}')
-                )
\ No newline at end of file
+            self.stdout.write(
+                self.style.SUCCESS(f'Напоминание поставлено в очередь для собеседования с {interview.candidate}')
+            )
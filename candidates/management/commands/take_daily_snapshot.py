@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from candidates.snapshots import take_daily_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Сохраняет дневной срез метрик для графиков статистики (запускать по крону)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=datetime.date.fromisoformat, help='Дата в формате ГГГГ-ММ-ДД (по умолчанию сегодня)')
+
+    def handle(self, *args, **options):
+        snapshot = take_daily_snapshot(options['date'])
+        open_vacancies = '-' if snapshot.open_vacancies is None else snapshot.open_vacancies
+        self.stdout.write(self.style.SUCCESS(
+            f'Срез за {snapshot.date:%d.%m.%Y}: кандидатов {snapshot.new_candidates}, '
+            f'откликов {snapshot.new_applications}, открытых вакансий {open_vacancies}'
+        ))
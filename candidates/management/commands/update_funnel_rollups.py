@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from candidates.analytics import update_funnel_rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает агрегаты воронки подбора (только изменения после прошлого пересчета)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Пересчитать все с нуля')
+
+    def handle(self, *args, **options):
+        processed = update_funnel_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано кандидатов: {processed}'))
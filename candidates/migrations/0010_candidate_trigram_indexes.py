@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+# Триграммные GIN-индексы для поиска в candidate_list (first_name/last_name/email__icontains).
+# Только для PostgreSQL, на SQLite миграция ничего не делает
+
+TRIGRAM_INDEXES = [
+    ('candidate_first_name_trgm_idx', 'first_name'),
+    ('candidate_last_name_trgm_idx', 'last_name'),
+    ('candidate_email_trgm_idx', 'email'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON candidates_candidate USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0009_interview_reminder_date_interview_reminder_sent'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_application_updated_at(apps, schema_editor):
+    # До этой миграции статус менялся без отметки времени - берем дату отклика
+    Application = apps.get_model('candidates', 'Application')
+    Application.objects.update(updated_at=models.F('applied_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0010_candidate_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Агрегат')),
+                ('value', models.DateTimeField(null=True, verbose_name='Учтено до')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Последний пересчет')),
+            ],
+            options={
+                'verbose_name': 'Отметка пересчета',
+                'verbose_name_plural': 'Отметки пересчета',
+            },
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата обновления'),
+        ),
+        migrations.RunPython(backfill_application_updated_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='CandidateFunnel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц добавления')),
+                ('source', models.CharField(max_length=100, verbose_name='Источник')),
+                ('specialization', models.CharField(max_length=200, verbose_name='Специализация')),
+                ('recruiter', models.CharField(max_length=100, verbose_name='Рекрутер')),
+                ('applied', models.BooleanField(default=False, verbose_name='Есть отклик')),
+                ('interviewed', models.BooleanField(default=False, verbose_name='Было собеседование')),
+                ('approved', models.BooleanField(default=False, verbose_name='Одобрен')),
+                ('days_to_interview', models.FloatField(null=True, verbose_name='Дней до первого собеседования')),
+                ('days_to_approval', models.FloatField(null=True, verbose_name='Дней до одобрения')),
+                ('candidate', models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='funnel', to='candidates.candidate', verbose_name='Кандидат')),
+            ],
+            options={
+                'verbose_name': 'Факт воронки',
+                'verbose_name_plural': 'Факты воронки',
+            },
+        ),
+        migrations.CreateModel(
+            name='FunnelRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('source', models.CharField(max_length=100, verbose_name='Источник')),
+                ('specialization', models.CharField(max_length=200, verbose_name='Специализация')),
+                ('recruiter', models.CharField(max_length=100, verbose_name='Рекрутер')),
+                ('candidates', models.IntegerField(default=0, verbose_name='Кандидатов')),
+                ('applied', models.IntegerField(default=0, verbose_name='С откликом')),
+                ('interviewed', models.IntegerField(default=0, verbose_name='С собеседованием')),
+                ('approved', models.IntegerField(default=0, verbose_name='Одобрено')),
+                ('days_to_interview_total', models.FloatField(default=0, verbose_name='Сумма дней до собеседования')),
+                ('days_to_approval_total', models.FloatField(default=0, verbose_name='Сумма дней до одобрения')),
+            ],
+            options={
+                'verbose_name': 'Агрегат воронки',
+                'verbose_name_plural': 'Агрегаты воронки',
+                'unique_together': {('month', 'source', 'specialization', 'recruiter')},
+            },
+        ),
+    ]
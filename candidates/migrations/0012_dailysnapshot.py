@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0011_funnel_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('new_candidates', models.IntegerField(default=0, verbose_name='Новых кандидатов')),
+                ('new_applications', models.IntegerField(default=0, verbose_name='Новых откликов')),
+                ('applications_pending', models.IntegerField(default=0, verbose_name='Из них на рассмотрении')),
+                ('applications_approved', models.IntegerField(default=0, verbose_name='Из них одобрено')),
+                ('applications_rejected', models.IntegerField(default=0, verbose_name='Из них отклонено')),
+                ('new_vacancies', models.IntegerField(default=0, verbose_name='Новых вакансий')),
+                ('open_vacancies', models.IntegerField(default=0, verbose_name='Открытых вакансий на конец дня')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата расчета')),
+            ],
+            options={
+                'verbose_name': 'Дневной срез',
+                'verbose_name_plural': 'Дневные срезы',
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def _backfill(model, change_model, fk, created_field, initial_status):
+    # Текущий статус: начальный - с момента создания, остальные - с последнего
+    # изменения строки (точнее время до появления журнала неизвестно)
+    model.objects.filter(status=initial_status).update(status_changed_at=models.F(created_field))
+    model.objects.exclude(status=initial_status).update(status_changed_at=models.F('updated_at'))
+
+    batch = []
+    rows = model.objects.order_by('id').values_list('id', 'status', created_field, 'updated_at')
+    for pk, status, created_at, updated_at in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(change_model(**{fk: pk}, from_status='', to_status=initial_status, changed_at=created_at))
+        if status != initial_status:
+            batch.append(change_model(**{fk: pk}, from_status=initial_status, to_status=status,
+                                      changed_at=updated_at, time_in_previous=updated_at - created_at))
+        if len(batch) >= BATCH_SIZE:
+            change_model.objects.bulk_create(batch)
+            batch = []
+    change_model.objects.bulk_create(batch)
+
+
+def backfill_status_history(apps, schema_editor):
+    _backfill(apps.get_model('candidates', 'Application'), apps.get_model('candidates', 'ApplicationStatusChange'),
+              'application_id', 'applied_date', 'pending')
+    _backfill(apps.get_model('candidates', 'Interview'), apps.get_model('candidates', 'InterviewStatusChange'),
+              'interview_id', 'created_at', 'scheduled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0012_dailysnapshot'),
+        ('vacancies', '0004_skilldemand'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20, verbose_name='Предыдущий статус')),
+                ('to_status', models.CharField(max_length=20, verbose_name='Новый статус')),
+                ('changed_at', models.DateTimeField(verbose_name='Дата изменения')),
+                ('time_in_previous', models.DurationField(blank=True, null=True, verbose_name='Время в предыдущем статусе')),
+            ],
+            options={
+                'verbose_name': 'Смена статуса отклика',
+                'verbose_name_plural': 'Журнал статусов откликов',
+                'ordering': ['changed_at', 'id'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='InterviewStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20, verbose_name='Предыдущий статус')),
+                ('to_status', models.CharField(max_length=20, verbose_name='Новый статус')),
+                ('changed_at', models.DateTimeField(verbose_name='Дата изменения')),
+                ('time_in_previous', models.DurationField(blank=True, null=True, verbose_name='Время в предыдущем статусе')),
+            ],
+            options={
+                'verbose_name': 'Смена статуса собеседования',
+                'verbose_name_plural': 'Журнал статусов собеседований',
+                'ordering': ['changed_at', 'id'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Статус изменен'),
+        ),
+        migrations.AddField(
+            model_name='interview',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Статус изменен'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['status', 'status_changed_at'], name='application_status_since_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['status', 'status_changed_at'], name='interview_status_since_idx'),
+        ),
+        migrations.AddField(
+            model_name='applicationstatuschange',
+            name='application',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='candidates.application', verbose_name='Отклик'),
+        ),
+        migrations.AddField(
+            model_name='applicationstatuschange',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Изменил'),
+        ),
+        migrations.AddField(
+            model_name='interviewstatuschange',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Изменил'),
+        ),
+        migrations.AddField(
+            model_name='interviewstatuschange',
+            name='interview',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='candidates.interview', verbose_name='Собеседование'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatuschange',
+            index=models.Index(fields=['application', 'changed_at'], name='app_status_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatuschange',
+            index=models.Index(fields=['from_status', 'changed_at'], name='app_status_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewstatuschange',
+            index=models.Index(fields=['interview', 'changed_at'], name='interview_status_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewstatuschange',
+            index=models.Index(fields=['from_status', 'changed_at'], name='interview_status_stage_idx'),
+        ),
+        migrations.RunPython(backfill_status_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0015_interview_duration'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateMatchKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=255, verbose_name='Ключ')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_keys', to='candidates.candidate')),
+            ],
+            options={
+                'verbose_name': 'Ключ поиска дубликатов',
+                'verbose_name_plural': 'Ключи поиска дубликатов',
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('reasons', models.CharField(blank=True, max_length=200, verbose_name='Совпадения')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает решения'), ('merged', 'Объединены'), ('dismissed', 'Не дубликаты')], default='pending', max_length=20, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата решения')),
+                ('candidate', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='candidates.candidate', verbose_name='Кандидат')),
+                ('duplicate', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='candidates.candidate', verbose_name='Возможный дубликат')),
+                ('resolved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Решение принял')),
+            ],
+            options={
+                'verbose_name': 'Возможный дубликат',
+                'verbose_name_plural': 'Возможные дубликаты',
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicate_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'duplicate'), name='unique_duplicate_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:47
+
+from django.db import migrations, models
+
+from candidates.normalization import normalize_phone
+
+BATCH_SIZE = 2000
+
+
+def _backfill(model):
+    # Пачками по id: память не растет с размером таблицы, обновляются только строки с телефоном
+    batch = []
+    rows = model.objects.exclude(phone='').order_by('id').values_list('id', 'phone')
+    for pk, phone in rows.iterator(chunk_size=BATCH_SIZE):
+        normalized = normalize_phone(phone)
+        if normalized:
+            batch.append(model(id=pk, phone_normalized=normalized))
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, ['phone_normalized'])
+            batch = []
+    model.objects.bulk_update(batch, ['phone_normalized'])
+
+
+def backfill_phone_normalized(apps, schema_editor):
+    _backfill(apps.get_model('candidates', 'Candidate'))
+    _backfill(apps.get_model('candidates', 'PersonnelForm'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0016_duplicate_candidates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, verbose_name='Телефон (E.164)'),
+        ),
+        migrations.AddField(
+            model_name='personnelform',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, verbose_name='Телефон (E.164)'),
+        ),
+        migrations.RunPython(backfill_phone_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0017_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunnelDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidate_id', models.IntegerField(verbose_name='Кандидат')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаление для пересчета воронки',
+                'verbose_name_plural': 'Удаления для пересчета воронки',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0018_funnel_deletion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailysnapshot',
+            name='open_vacancies',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Открытых вакансий на конец дня'),
+        ),
+    ]
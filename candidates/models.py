@@ -1,9 +1,73 @@
-from django.db import models
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
+from hr_agency.audit import get_current_actor
 from vacancies.models import Skill
+from .events import status_changed
+from .normalization import normalize_phone
+
+
+class StatusTrackedModel(models.Model):
+    """Модель со статусом, каждая смена которого пишется в журнал status_changes
+    в той же транзакции, что и само сохранение"""
+    status_changed_at = models.DateTimeField(null=True, blank=True, verbose_name="Статус изменен")
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        previous = None if self._state.adding else getattr(self, '_loaded_status', None)
+        if not self._state.adding and previous == self.status:
+            return super().save(*args, **kwargs)
+
+        now = timezone.now()
+        entered_at = self.status_changed_at
+        self.status_changed_at = now
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'status', 'status_changed_at'}
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            actor = get_current_actor()
+            self.status_changes.create(
+                from_status=previous or '',
+                to_status=self.status,
+                changed_at=now,
+                changed_by=actor,
+                time_in_previous=now - entered_at if previous and entered_at else None,
+            )
+            status_changed.send(sender=type(self), changes=[(self.pk, previous or '', self.status)], actor=actor)
+        self._loaded_status = self.status
+
+
+class NormalizedPhoneModel(models.Model):
+    """Модель с телефоном в свободной форме и его нормализованной копией (E.164)
+    для поиска по индексу; копия обновляется при каждом сохранении телефона"""
+    phone_normalized = models.CharField(max_length=16, blank=True, db_index=True, editable=False,
+                                        verbose_name="Телефон (E.164)")
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if 'phone' not in self.get_deferred_fields() and (update_fields is None or 'phone' in update_fields):
+            self.phone_normalized = normalize_phone(self.phone)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'phone_normalized'}
+        super().save(*args, **kwargs)
 
 
-class Candidate(models.Model):
+class Candidate(NormalizedPhoneModel):
     # Основная информация
     first_name = models.CharField(max_length=100, verbose_name="Имя")
     last_name = models.CharField(max_length=100, verbose_name="Фамилия")
@@ -93,15 +157,35 @@ class Candidate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Поля, по которым ищутся дубликаты (candidates/dedup.py)
+    MATCH_FIELDS = ('first_name', 'last_name', 'patronymic', 'phone', 'email')
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} {self.patronymic}".strip()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_match_fields = instance._match_fields()
+        return instance
+
+    def _match_fields(self):
+        return tuple(self.__dict__.get(name) for name in self.MATCH_FIELDS)
+
+    def match_fields_changed(self):
+        """Изменились ли поля поиска дубликатов с загрузки или прошлого сохранения"""
+        return getattr(self, '_loaded_match_fields', None) != self._match_fields()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_match_fields = self._match_fields()
+
     class Meta:
         verbose_name = "Кандидат"
         verbose_name_plural = "Кандидаты"
 
 
-class Application(models.Model):
+class Application(StatusTrackedModel):
     STATUS_CHOICES = (
         ('pending', 'На рассмотрении'),
         ('approved', 'Одобрен'),
@@ -115,17 +199,22 @@ class Application(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Статус заявки")
     applied_date = models.DateTimeField(auto_now_add=True, verbose_name="Дата отклика")
     notes = models.TextField(blank=True, verbose_name="Комментарий рекрутера")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата обновления")
 
     class Meta:
         unique_together = ['candidate', 'vacancy']
         verbose_name = "Отклик"
         verbose_name_plural = "Отклики"
+        indexes = [
+            # Зависшие отклики: статус + с какого момента
+            models.Index(fields=['status', 'status_changed_at'], name='application_status_since_idx'),
+        ]
 
     def __str__(self):
         return f"{self.candidate} -> {self.vacancy} ({self.status})"
 
 
-class Interview(models.Model):
+class Interview(StatusTrackedModel):
     INTERVIEW_TYPE_CHOICES = (
         ('phone', '📞 Телефонное'),
         ('video', '🎥 Видео-собеседование'),
@@ -134,6 +223,8 @@ class Interview(models.Model):
         ('hr', '👔 HR-собеседование'),
     )
 
+    MAX_DURATION_MINUTES = 8 * 60
+
     STATUS_CHOICES = (
         ('scheduled', 'Запланировано'),
         ('completed', 'Завершено'),
@@ -143,6 +234,9 @@ class Interview(models.Model):
 
     candidate = models.ForeignKey('Candidate', on_delete=models.CASCADE, related_name='interviews')
     scheduled_date = models.DateTimeField(verbose_name="Дата и время собеседования")
+    duration_minutes = models.PositiveIntegerField(default=60, validators=[
+        MinValueValidator(5), MaxValueValidator(MAX_DURATION_MINUTES)
+    ], verbose_name="Длительность (мин)")
     interview_type = models.CharField(max_length=20, choices=INTERVIEW_TYPE_CHOICES, verbose_name="Тип собеседования")
     notes = models.TextField(blank=True, verbose_name="Заметки")
     scheduled_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Запланировал")
@@ -160,14 +254,41 @@ class Interview(models.Model):
     def __str__(self):
         return f"Собеседование {self.candidate} - {self.scheduled_date.strftime('%d.%m.%Y %H:%M')}"
 
+    @property
+    def end_date(self):
+        return self.scheduled_date + datetime.timedelta(minutes=self.duration_minutes)
+
+    def clean(self):
+        # Пересечения проверяются и при правке через админку
+        from .scheduling import find_conflicts
+
+        if self.status == 'cancelled' or not self.scheduled_date or not self.duration_minutes:
+            return
+        if self.scheduled_by_id is None or self.candidate_id is None:
+            return
+        conflicts = find_conflicts(self.scheduled_date, self.duration_minutes, self.scheduled_by_id,
+                                   self.candidate_id, exclude_id=self.pk)
+        if conflicts:
+            raise ValidationError(
+                "Время пересекается с другим собеседованием: "
+                + ", ".join(f"{timezone.localtime(c.scheduled_date):%d.%m.%Y %H:%M} ({c.candidate})" for c in conflicts)
+            )
+
     class Meta:
         verbose_name = "Собеседование"
         verbose_name_plural = "Собеседования"
         ordering = ['-scheduled_date']
+        indexes = [
+            models.Index(fields=['status', 'status_changed_at'], name='interview_status_since_idx'),
+            # Календарь: окно по времени для всех и для одного интервьюера
+            models.Index(fields=['scheduled_date'], name='interview_scheduled_idx'),
+            models.Index(fields=['scheduled_by', 'scheduled_date'], name='interview_interviewer_idx'),
+            models.Index(fields=['candidate', 'scheduled_date'], name='interview_candidate_idx'),
+        ]
 
 
 # форма кандидатов
-class PersonnelForm(models.Model):
+class PersonnelForm(NormalizedPhoneModel):
     # Форма для отдела кадров предприятия
 
     EDUCATION_CHOICES = (
@@ -245,4 +366,180 @@ class PersonnelForm(models.Model):
     class Meta:
         verbose_name = "Анкета сотрудника"
         verbose_name_plural = "Анкеты сотрудников"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+
+# Аналитика воронки подбора (candidates/analytics.py)
+
+class CandidateFunnel(models.Model):
+    """Факт воронки по одному кандидату - из него собираются агрегаты FunnelRollup"""
+    # SET_NULL: после удаления кандидата строка остается, пока ее вклад не вычтут из агрегатов
+    candidate = models.OneToOneField('Candidate', on_delete=models.SET_NULL, null=True,
+                                     related_name='funnel', verbose_name="Кандидат")
+    month = models.DateField(verbose_name="Месяц добавления")
+    source = models.CharField(max_length=100, verbose_name="Источник")
+    specialization = models.CharField(max_length=200, verbose_name="Специализация")
+    recruiter = models.CharField(max_length=100, verbose_name="Рекрутер")
+    applied = models.BooleanField(default=False, verbose_name="Есть отклик")
+    interviewed = models.BooleanField(default=False, verbose_name="Было собеседование")
+    approved = models.BooleanField(default=False, verbose_name="Одобрен")
+    days_to_interview = models.FloatField(null=True, verbose_name="Дней до первого собеседования")
+    days_to_approval = models.FloatField(null=True, verbose_name="Дней до одобрения")
+
+    class Meta:
+        verbose_name = "Факт воронки"
+        verbose_name_plural = "Факты воронки"
+
+
+class FunnelRollup(models.Model):
+    """Агрегаты воронки по месяцу, источнику, специализации и рекрутеру"""
+    month = models.DateField(verbose_name="Месяц")
+    source = models.CharField(max_length=100, verbose_name="Источник")
+    specialization = models.CharField(max_length=200, verbose_name="Специализация")
+    recruiter = models.CharField(max_length=100, verbose_name="Рекрутер")
+    candidates = models.IntegerField(default=0, verbose_name="Кандидатов")
+    applied = models.IntegerField(default=0, verbose_name="С откликом")
+    interviewed = models.IntegerField(default=0, verbose_name="С собеседованием")
+    approved = models.IntegerField(default=0, verbose_name="Одобрено")
+    days_to_interview_total = models.FloatField(default=0, verbose_name="Сумма дней до собеседования")
+    days_to_approval_total = models.FloatField(default=0, verbose_name="Сумма дней до одобрения")
+
+    class Meta:
+        verbose_name = "Агрегат воронки"
+        verbose_name_plural = "Агрегаты воронки"
+        unique_together = ['month', 'source', 'specialization', 'recruiter']
+
+
+class RollupWatermark(models.Model):
+    """Отметка, до которой изменения уже учтены в агрегатах"""
+    name = models.CharField(max_length=50, unique=True, verbose_name="Агрегат")
+    value = models.DateTimeField(null=True, verbose_name="Учтено до")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Последний пересчет")
+
+    class Meta:
+        verbose_name = "Отметка пересчета"
+        verbose_name_plural = "Отметки пересчета"
+
+
+class FunnelDeletion(models.Model):
+    """Кандидат, у которого удалили отклик или собеседование: удаленных строк
+    пересчет воронки по updated_at не видит, поэтому они записываются сигналом"""
+    # Не внешний ключ: кандидат мог быть удален вместе с откликами
+    candidate_id = models.IntegerField(verbose_name="Кандидат")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата удаления")
+
+    class Meta:
+        verbose_name = "Удаление для пересчета воронки"
+        verbose_name_plural = "Удаления для пересчета воронки"
+
+
+class DailySnapshot(models.Model):
+    """Дневной срез метрик для графиков статистики (candidates/snapshots.py)"""
+    date = models.DateField(unique=True, verbose_name="Дата")
+    new_candidates = models.IntegerField(default=0, verbose_name="Новых кандидатов")
+    new_applications = models.IntegerField(default=0, verbose_name="Новых откликов")
+    applications_pending = models.IntegerField(default=0, verbose_name="Из них на рассмотрении")
+    applications_approved = models.IntegerField(default=0, verbose_name="Из них одобрено")
+    applications_rejected = models.IntegerField(default=0, verbose_name="Из них отклонено")
+    new_vacancies = models.IntegerField(default=0, verbose_name="Новых вакансий")
+    # Известно только для срезов, снятых в тот же день (candidates/snapshots.py)
+    open_vacancies = models.IntegerField(null=True, blank=True, verbose_name="Открытых вакансий на конец дня")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата расчета")
+
+    class Meta:
+        verbose_name = "Дневной срез"
+        verbose_name_plural = "Дневные срезы"
+        ordering = ['date']
+
+
+# Журнал смены статусов (candidates/history.py). Строки только добавляются
+
+class StatusChange(models.Model):
+    from_status = models.CharField(max_length=20, blank=True, verbose_name="Предыдущий статус")
+    to_status = models.CharField(max_length=20, verbose_name="Новый статус")
+    changed_at = models.DateTimeField(verbose_name="Дата изменения")
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='+', verbose_name="Изменил")
+    # Сколько объект пробыл в предыдущем статусе - считается при записи,
+    # чтобы длительность этапов не требовала сопоставления соседних строк
+    time_in_previous = models.DurationField(null=True, blank=True, verbose_name="Время в предыдущем статусе")
+
+    class Meta:
+        abstract = True
+        ordering = ['changed_at', 'id']
+
+    def __str__(self):
+        return f"{self.from_status or '—'} -> {self.to_status} ({self.changed_at:%d.%m.%Y %H:%M})"
+
+
+class ApplicationStatusChange(StatusChange):
+    application = models.ForeignKey('Application', on_delete=models.CASCADE, related_name='status_changes',
+                                    verbose_name="Отклик")
+
+    class Meta(StatusChange.Meta):
+        verbose_name = "Смена статуса отклика"
+        verbose_name_plural = "Журнал статусов откликов"
+        indexes = [
+            models.Index(fields=['application', 'changed_at'], name='app_status_change_idx'),
+            models.Index(fields=['from_status', 'changed_at'], name='app_status_stage_idx'),
+        ]
+
+
+class InterviewStatusChange(StatusChange):
+    interview = models.ForeignKey('Interview', on_delete=models.CASCADE, related_name='status_changes',
+                                  verbose_name="Собеседование")
+
+    class Meta(StatusChange.Meta):
+        verbose_name = "Смена статуса собеседования"
+        verbose_name_plural = "Журнал статусов собеседований"
+        indexes = [
+            models.Index(fields=['interview', 'changed_at'], name='interview_status_change_idx'),
+            models.Index(fields=['from_status', 'changed_at'], name='interview_status_stage_idx'),
+        ]
+
+
+# Поиск дубликатов кандидатов (candidates/dedup.py)
+
+class CandidateMatchKey(models.Model):
+    """Ключ блока для поиска дубликатов: нормализованный телефон, имя ящика или ФИО"""
+    candidate = models.ForeignKey('Candidate', on_delete=models.CASCADE, related_name='match_keys')
+    key = models.CharField(max_length=255, db_index=True, verbose_name="Ключ")
+
+    class Meta:
+        verbose_name = "Ключ поиска дубликатов"
+        verbose_name_plural = "Ключи поиска дубликатов"
+
+
+class DuplicateCandidate(models.Model):
+    """Пара возможных дубликатов в очереди на слияние"""
+    STATUS_CHOICES = (
+        ('pending', 'Ожидает решения'),
+        ('merged', 'Объединены'),
+        ('dismissed', 'Не дубликаты'),
+    )
+
+    # SET_NULL: после слияния запись остается как история решения
+    candidate = models.ForeignKey('Candidate', on_delete=models.SET_NULL, null=True, related_name='+',
+                                  verbose_name="Кандидат")
+    duplicate = models.ForeignKey('Candidate', on_delete=models.SET_NULL, null=True, related_name='+',
+                                  verbose_name="Возможный дубликат")
+    score = models.FloatField(verbose_name="Оценка")
+    reasons = models.CharField(max_length=200, blank=True, verbose_name="Совпадения")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Статус")
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата решения")
+    resolved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='+', verbose_name="Решение принял")
+
+    class Meta:
+        verbose_name = "Возможный дубликат"
+        verbose_name_plural = "Возможные дубликаты"
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'duplicate'], name='unique_duplicate_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score'], name='duplicate_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate} ~ {self.duplicate} ({self.score})"
@@ -0,0 +1,130 @@
+import re
+
+try:
+    from rapidfuzz.fuzz import ratio as _ratio
+
+    def similarity(first, second):
+        return _ratio(first, second) / 100
+except ImportError:  # rapidfuzz не установлен - стандартная библиотека, медленнее
+    from difflib import SequenceMatcher
+
+    def similarity(first, second):
+        return SequenceMatcher(None, first, second).ratio()
+
+
+# Нормализация контактов и ФИО и оценка похожести кандидатов.
+# Модуль не импортирует модели: функции оценки выполняются в процессах
+# пакетного поиска дубликатов (candidates/dedup.py).
+
+_NOT_LETTERS = re.compile(r'[^a-zа-я ]+')
+_NOT_DIGITS = re.compile(r'\D+')
+_PHONE_QUERY = re.compile(r'^\+?[\d\s().-]+$')
+
+# Поисковый запрос из цифр и разделителей короче этого - не телефон (год, опыт и т.п.)
+PHONE_QUERY_MIN_DIGITS = 5
+
+# Веса совпадений: одного ФИО мало (однофамильцы), ФИО с телефоном или почтой - дубликат
+PHONE_WEIGHT = 0.4
+EMAIL_WEIGHT = 0.3
+NAME_WEIGHT = 0.45
+# Разные отчества при совпадающем телефоне - чаще родственники, чем один человек
+PATRONYMIC_PENALTY = 0.2
+
+
+def normalize_phone(phone):
+    """Телефон в виде +79991234567 (E.164); российские 8XXXXXXXXXX и 10 цифр без кода
+    приводятся к +7. Пустая строка, если цифр слишком мало"""
+    digits = _NOT_DIGITS.sub('', phone or '')
+    if len(digits) == 11 and digits[0] == '8':
+        digits = '7' + digits[1:]
+    elif len(digits) == 10 and not (phone or '').strip().startswith('+'):
+        digits = '7' + digits
+    if not 10 <= len(digits) <= 15:
+        return ''
+    return '+' + digits
+
+
+def phone_query(query):
+    """Разбор поискового запроса, похожего на телефон: (номер E.164 или '' для неполного
+    номера, цифры запроса). None, если запрос не похож на телефон"""
+    query = (query or '').strip()
+    if not _PHONE_QUERY.match(query):
+        return None
+    digits = _NOT_DIGITS.sub('', query)
+    if len(digits) < PHONE_QUERY_MIN_DIGITS:
+        return None
+    return normalize_phone(query), digits
+
+
+def normalize_name(value):
+    """Нижний регистр, ё -> е, только буквы и одиночные пробелы"""
+    value = (value or '').lower().replace('ё', 'е')
+    return ' '.join(_NOT_LETTERS.sub(' ', value).split())
+
+
+def email_local(email):
+    """Имя ящика без точек и +метки: ivan.petrov+hh@mail.ru -> ivanpetrov"""
+    local = (email or '').lower().split('@')[0].split('+')[0]
+    return local.replace('.', '')
+
+
+def match_record(candidate_id, first_name, last_name, patronymic, phone, email):
+    """Нормализованные поля кандидата для сравнения (кортеж - легко передать в процесс)"""
+    return (
+        candidate_id,
+        normalize_name(last_name),
+        normalize_name(first_name),
+        normalize_name(patronymic),
+        normalize_phone(phone),
+        email_local(email),
+    )
+
+
+def blocking_keys(record):
+    """Ключи блоков: сравниваются только кандидаты с общим ключом"""
+    _, last, first, _, phone, local = record
+    keys = set()
+    if phone:
+        keys.add(f'phone:{phone}')
+    if len(local) >= 4:
+        keys.add(f'email:{local}')
+    if last and first:
+        # Порядок слов не важен: "Петров Иван" и "Иван Петров" в одном блоке
+        keys.add('name:' + ' '.join(sorted([last, first])))
+    return keys
+
+
+def score(first, second):
+    """Оценка 0..1 и причины совпадения для пары записей match_record"""
+    _, last_a, first_a, patronymic_a, phone_a, local_a = first
+    _, last_b, first_b, patronymic_b, phone_b, local_b = second
+    value = 0.0
+    reasons = []
+
+    if phone_a and phone_a == phone_b:
+        value += PHONE_WEIGHT
+        reasons.append('телефон')
+    if local_a and local_a == local_b:
+        value += EMAIL_WEIGHT
+        reasons.append('email')
+
+    name_a = ' '.join(sorted([last_a, first_a]))
+    name_b = ' '.join(sorted([last_b, first_b]))
+    name_similarity = similarity(name_a, name_b)
+    value += NAME_WEIGHT * name_similarity
+    if name_similarity >= 0.9:
+        reasons.append('ФИО')
+
+    if patronymic_a and patronymic_b and similarity(patronymic_a, patronymic_b) < 0.7:
+        value -= PATRONYMIC_PENALTY
+    return round(min(max(value, 0.0), 1.0), 3), reasons
+
+
+def score_pairs(pairs, records, threshold):
+    """Оценка пар (id, id); возвращает пары не ниже порога. Выполняется в процессах пула"""
+    result = []
+    for first_id, second_id in pairs:
+        value, reasons = score(records[first_id], records[second_id])
+        if value >= threshold:
+            result.append((first_id, second_id, value, ', '.join(reasons)))
+    return result
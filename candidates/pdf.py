@@ -0,0 +1,121 @@
+import functools
+import io
+from xml.sax.saxutils import escape
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFError, TTFont
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:  # reportlab не установлен - PDF недоступны
+    pdfmetrics = None
+
+
+# Верстка PDF-документов (анкеты, профили кандидатов) средствами reportlab.
+# Модуль не импортирует Django: документы верстаются в процессах пакетной
+# генерации (candidates/documents.py), шаблоны рендерит основной процесс.
+#
+# Разметка документа - текст из шаблона, по строкам:
+#   # Заголовок документа
+#   ## Раздел
+#   Название поля | значение    - строка таблицы; следующие строки без " | "
+#                                 продолжают значение (многострочный адрес)
+#   пустая строка               - конец таблицы, отступ
+#   остальное                   - абзац текста
+
+class PdfUnavailable(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _fonts(font_path, bold_font_path):
+    """Регистрирует шрифты (один раз на процесс) и возвращает их имена.
+    Нужен TTF-шрифт с кириллицей: встроенные шрифты PDF ее не содержат"""
+    if pdfmetrics is None:
+        raise PdfUnavailable('Для PDF нужен пакет reportlab')
+    try:
+        pdfmetrics.registerFont(TTFont('DocumentFont', font_path))
+        if bold_font_path:
+            pdfmetrics.registerFont(TTFont('DocumentFont-Bold', bold_font_path))
+    except TTFError as e:
+        raise PdfUnavailable(f'Не найден шрифт для PDF: {e}')
+    return 'DocumentFont', 'DocumentFont-Bold' if bold_font_path else 'DocumentFont'
+
+
+@functools.lru_cache(maxsize=None)
+def _styles(font_path, bold_font_path):
+    regular, bold = _fonts(font_path, bold_font_path)
+    return {
+        'title': ParagraphStyle('title', fontName=bold, fontSize=16, leading=20, spaceAfter=4 * mm),
+        'heading': ParagraphStyle('heading', fontName=bold, fontSize=12, leading=15,
+                                  spaceBefore=3 * mm, spaceAfter=2 * mm),
+        'text': ParagraphStyle('text', fontName=regular, fontSize=10, leading=13),
+        'label': ParagraphStyle('label', fontName=regular, fontSize=9, leading=12, textColor=colors.grey),
+    }
+
+
+def _paragraph(text, style):
+    return Paragraph(escape(text).replace('\n', '<br/>'), style)
+
+
+def _table(rows, styles):
+    table = Table(
+        [[_paragraph(label, styles['label']), _paragraph(value, styles['text'])] for label, value in rows],
+        colWidths=[55 * mm, None],
+    )
+    table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ]))
+    return table
+
+
+def _flowables(markup, styles):
+    flowables = []
+    rows = []
+
+    def close_table():
+        if rows:
+            flowables.append(_table(rows, styles))
+            rows.clear()
+
+    for line in markup.splitlines():
+        line = line.rstrip()
+        if line.startswith('# '):
+            close_table()
+            flowables.append(_paragraph(line[2:], styles['title']))
+        elif line.startswith('## '):
+            close_table()
+            flowables.append(_paragraph(line[3:], styles['heading']))
+        elif ' | ' in line:
+            label, value = line.split(' | ', 1)
+            rows.append((label.strip(), value.strip() or '—'))
+        elif not line.strip():
+            if rows:
+                close_table()
+                flowables.append(Spacer(0, 2 * mm))
+        elif rows:
+            label, value = rows[-1]
+            rows[-1] = (label, f'{value}\n{line.strip()}' if value != '—' else line.strip())
+        else:
+            flowables.append(_paragraph(line.strip(), styles['text']))
+    close_table()
+    return flowables
+
+
+def render_pdf(markup, font_path, bold_font_path=''):
+    """PDF по разметке документа. Возвращает (содержимое, число страниц)"""
+    styles = _styles(font_path, bold_font_path)
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(buffer, pagesize=A4, pageCompression=1,
+                                 leftMargin=20 * mm, rightMargin=20 * mm, topMargin=15 * mm, bottomMargin=15 * mm)
+    document.build(_flowables(markup, styles))
+    return buffer.getvalue(), document.page
+
+
+def render_many(markups, font_path, bold_font_path=''):
+    """Пачка документов в одном процессе (задача для пула процессов)"""
+    return [render_pdf(markup, font_path, bold_font_path) for markup in markups]
@@ -0,0 +1,127 @@
+import datetime
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Candidate, Interview
+
+
+# Проверка пересечений собеседований и поиск свободного времени.
+#
+# Выборка из БД - диапазон по индексам (scheduled_by, scheduled_date) и
+# (candidate, scheduled_date): собеседование длится не дольше MAX_DURATION, поэтому
+# пересечь интервал [start, end) могут только собеседования, начавшиеся
+# в [start - MAX_DURATION, end). Для поиска свободных слотов занятые интервалы
+# сливаются в отсортированный список (IntervalIndex), и каждая проверка - бинарный поиск.
+
+MAX_DURATION = datetime.timedelta(minutes=Interview.MAX_DURATION_MINUTES)
+
+
+def _busy_queryset(start, end, interviewer_ids=(), candidate_ids=(), exclude_id=None):
+    participants = Q(scheduled_by_id__in=list(interviewer_ids)) | Q(candidate_id__in=list(candidate_ids))
+    interviews = (
+        Interview.objects.filter(participants, scheduled_date__gte=start - MAX_DURATION, scheduled_date__lt=end)
+        .exclude(status='cancelled')
+    )
+    if exclude_id is not None:
+        interviews = interviews.exclude(pk=exclude_id)
+    return interviews
+
+
+def lock_participants(interviewer_id, candidate_id):
+    """Блокирует строки интервьюера и кандидата до конца транзакции: параллельные
+    планирования для них ждут друг друга, и проверка пересечений не устаревает.
+    Порядок блокировок постоянный - без взаимных блокировок"""
+    get_user_model().objects.select_for_update().filter(pk=interviewer_id).exists()
+    Candidate.objects.select_for_update().filter(pk=candidate_id).exists()
+
+
+def find_conflicts(start, duration_minutes, interviewer_id, candidate_id, exclude_id=None):
+    """Собеседования интервьюера или кандидата, пересекающиеся с [start, start + duration)"""
+    end = start + datetime.timedelta(minutes=duration_minutes)
+    interviews = _busy_queryset(start, end, [interviewer_id], [candidate_id], exclude_id).select_related('candidate')
+    return [interview for interview in interviews if interview.end_date > start]
+
+
+class IntervalIndex:
+    """Слитые непересекающиеся занятые интервалы, отсортированные по началу"""
+
+    def __init__(self, intervals):
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def blocking(self, start, end):
+        """Конец занятого интервала, пересекающего [start, end), или None - O(log n)"""
+        # Последний интервал, начавшийся раньше end - единственный кандидат на пересечение,
+        # остальные раньше него заканчиваются до его начала
+        position = bisect_left(self.starts, end) - 1
+        if position >= 0 and self.ends[position] > start:
+            return self.ends[position]
+        return None
+
+
+def _slot_step():
+    return datetime.timedelta(minutes=settings.INTERVIEW_SLOT_MINUTES)
+
+
+def _round_up(moment):
+    step = _slot_step()
+    local = timezone.localtime(moment)
+    midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    steps = -(-(local - midnight) // step)
+    return midnight + steps * step
+
+
+def _working_start(moment, duration):
+    """Ближайшее начало не раньше moment, при котором собеседование укладывается в рабочий день"""
+    local = timezone.localtime(moment)
+    while True:
+        day_start = local.replace(hour=settings.INTERVIEW_WORKDAY_START, minute=0, second=0, microsecond=0)
+        day_end = local.replace(hour=settings.INTERVIEW_WORKDAY_END, minute=0, second=0, microsecond=0)
+        if local.weekday() < 5 and local + duration <= day_end:
+            return max(local, day_start)
+        local = day_start + datetime.timedelta(days=1)
+
+
+def free_slots(duration_minutes, after, interviewer_ids=(), candidate_ids=(), count=3,
+               search_days=None, exclude_id=None):
+    """Ближайшие свободные для всех участников слоты начиная с after (в рабочее время)"""
+    search_days = search_days or settings.INTERVIEW_SLOT_SEARCH_DAYS
+    duration = datetime.timedelta(minutes=duration_minutes)
+    if duration > datetime.timedelta(hours=settings.INTERVIEW_WORKDAY_END - settings.INTERVIEW_WORKDAY_START):
+        return []
+    after = max(after, timezone.now())
+    horizon = after + datetime.timedelta(days=search_days)
+
+    busy = _busy_queryset(after, horizon + duration, interviewer_ids, candidate_ids, exclude_id)
+    index = IntervalIndex(
+        (interview.scheduled_date, interview.end_date)
+        for interview in busy.only('scheduled_date', 'duration_minutes')
+    )
+
+    slots = []
+    moment = _working_start(_round_up(after), duration)
+    while len(slots) < count and moment < horizon:
+        blocked_until = index.blocking(moment, moment + duration)
+        if blocked_until is None:
+            slots.append(moment)
+            moment += _slot_step()
+        else:
+            moment = _round_up(blocked_until)
+        moment = _working_start(moment, duration)
+    return slots
+
+
+def common_slot(interviewer_ids, duration_minutes, after, candidate_ids=()):
+    """Первое время, когда свободны все интервьюеры (и кандидаты), или None"""
+    slots = free_slots(duration_minutes, after, interviewer_ids, candidate_ids, count=1)
+    return slots[0] if slots else None
@@ -0,0 +1,108 @@
+from django.db import connections, router, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from hr_agency.audit import get_current_actor
+from hr_agency.cache import bump_version, bump_versions
+from hr_agency.sqlite import run_write
+from .models import Application, ApplicationStatusChange
+
+
+# Массовое прикрепление кандидатов к вакансиям.
+# Уже существующие пары (unique_together candidate + vacancy) отсеивает сама база:
+# INSERT ... ON CONFLICT DO NOTHING, без предварительной проверки и без гонки
+# между проверкой и вставкой.
+
+# Строк откликов в одной вставке
+BATCH_SIZE = 1000
+
+
+def _insert_new(objs, candidate_ids, vacancy_ids):
+    """Вставляет отклики, пропуская существующие пары. Возвращает [(id, candidate_id, vacancy_id)]
+    только вставленных строк"""
+    db = router.db_for_write(Application)
+    meta = Application._meta
+    if connections[db].features.can_return_rows_from_bulk_insert:
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING - база сама возвращает вставленные строки
+        # (bulk_create с ignore_conflicts их не возвращает). QuerySet._insert - закрытый API:
+        # поведение на обеих базах проверяет InsertNewTests, версия Django закреплена там же
+        fields = [field for field in meta.concrete_fields if field is not meta.pk]
+        returning = [meta.pk, meta.get_field('candidate'), meta.get_field('vacancy')]
+        size = max(connections[db].ops.bulk_batch_size(fields, objs), 1)
+        created = []
+        for start in range(0, len(objs), size):
+            rows = Application.objects._insert(
+                objs[start:start + size], fields, returning_fields=returning, using=db,
+                on_conflict=OnConflict.IGNORE,
+            )
+            # Для пачки из одной строки, пропущенной из-за конфликта, Django возвращает [None]
+            created.extend(tuple(row) for row in rows if row is not None)
+        return created
+
+    # Без RETURNING - сравнение с парами, существовавшими до вставки. Точно, потому что
+    # на SQLite транзакция начинается с BEGIN IMMEDIATE и других записей в это время нет
+    pairs = Application.objects.filter(candidate_id__in=candidate_ids, vacancy_id__in=vacancy_ids)
+    before = set(pairs.values_list('id', flat=True))
+    Application.objects.bulk_create(objs, ignore_conflicts=True)
+    return [row for row in pairs.values_list('id', 'candidate_id', 'vacancy_id') if row[0] not in before]
+
+
+def _attach_batch(candidate_ids, vacancy_ids, notes):
+    now = timezone.now()
+    with transaction.atomic():
+        created = _insert_new([
+            Application(candidate_id=candidate_id, vacancy_id=vacancy_id, status='pending',
+                        notes=notes, status_changed_at=now)
+            for candidate_id in candidate_ids
+            for vacancy_id in vacancy_ids
+        ], candidate_ids, vacancy_ids)
+        actor = get_current_actor()
+        ApplicationStatusChange.objects.bulk_create([
+            ApplicationStatusChange(application_id=application_id, from_status='', to_status='pending',
+                                    changed_at=now, changed_by=actor)
+            for application_id, _, _ in created
+        ])
+    return created
+
+
+def attach_candidates(candidate_ids, vacancy_ids, notes=''):
+    """Прикрепляет кандидатов ко всем вакансиям из vacancy_ids.
+
+    candidate_ids может быть итератором (например, .iterator() по результатам поиска) -
+    кандидаты обрабатываются пачками. Возвращает (прикреплено новых, уже были прикреплены).
+    """
+    vacancy_ids = list(dict.fromkeys(vacancy_ids))
+    if not vacancy_ids:
+        return 0, 0
+    per_batch = max(BATCH_SIZE // len(vacancy_ids), 1)
+
+    attached = existing = 0
+    touched_candidates, touched_vacancies = set(), set()
+    seen = set()
+    batch = []
+
+    def flush():
+        nonlocal attached, existing
+        created = run_write(_attach_batch, batch, vacancy_ids, notes)
+        attached += len(created)
+        existing += len(batch) * len(vacancy_ids) - len(created)
+        for _, candidate_id, vacancy_id in created:
+            touched_candidates.add(candidate_id)
+            touched_vacancies.add(vacancy_id)
+        batch.clear()
+
+    for candidate_id in candidate_ids:
+        if candidate_id in seen:
+            continue
+        seen.add(candidate_id)
+        batch.append(candidate_id)
+        if len(batch) >= per_batch:
+            flush()
+    if batch:
+        flush()
+
+    # Сигналы post_save при bulk_create не отправляются - сбрасываем кэш один раз
+    for vacancy_id in touched_vacancies:
+        bump_version('vacancy', vacancy_id)
+    bump_versions('candidate', touched_candidates)
+    return attached, existing
@@ -0,0 +1,83 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from hr_agency.cache import bump_version
+from vacancies.skill_demand import recount_skills
+from .dedup import update_candidate_matches
+from .models import Candidate, Application, Interview, FunnelDeletion
+
+
+# Инвалидация закэшированных фрагментов candidate_detail и vacancy_detail
+
+@receiver([post_save, post_delete], sender=Candidate)
+def candidate_changed(sender, instance, **kwargs):
+    bump_version('candidate', instance.pk)
+    # Имя и опыт кандидата выводятся в списках откликов на вакансии
+    vacancy_ids = Application.objects.filter(candidate_id=instance.pk).values_list('vacancy_id', flat=True)
+    for vacancy_id in vacancy_ids:
+        bump_version('vacancy', vacancy_id)
+
+
+@receiver(m2m_changed, sender=Candidate.skills.through)
+def candidate_skills_changed(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Candidate):
+        bump_version('candidate', instance.pk)
+    else:
+        # Изменение со стороны навыка
+        for candidate_id in pk_set or ():
+            bump_version('candidate', candidate_id)
+
+
+@receiver([post_save, post_delete], sender=Application)
+def application_changed(sender, instance, **kwargs):
+    bump_version('candidate', instance.candidate_id)
+    bump_version('vacancy', instance.vacancy_id)
+
+
+@receiver([post_save, post_delete], sender=Interview)
+def interview_changed(sender, instance, **kwargs):
+    bump_version('candidate', instance.candidate_id)
+
+
+# Воронка (candidates/analytics.py): удаленные отклики и собеседования не видны по updated_at
+
+@receiver(post_delete, sender=Application)
+@receiver(post_delete, sender=Interview)
+def funnel_row_deleted(sender, instance, **kwargs):
+    FunnelDeletion.objects.create(candidate_id=instance.candidate_id)
+
+
+# Счетчики спроса и предложения по навыкам (vacancies/skill_demand.py)
+
+@receiver(m2m_changed, sender=Candidate.skills.through)
+def candidate_skills_demand(sender, instance, action, pk_set, **kwargs):
+    if action == 'pre_clear' and isinstance(instance, Candidate):
+        # После очистки связей уже не узнать, какие навыки были
+        instance._cleared_skill_ids = list(instance.skills.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        recount_skills(pk_set if isinstance(instance, Candidate) else [instance.pk])
+    elif action == 'post_clear':
+        recount_skills(getattr(instance, '_cleared_skill_ids', None) if isinstance(instance, Candidate)
+                       else [instance.pk])
+
+
+@receiver(pre_delete, sender=Candidate)
+def candidate_deleting(sender, instance, **kwargs):
+    # Связи с навыками удаляются каскадно, без m2m_changed
+    instance._deleted_skill_ids = list(instance.skills.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Candidate)
+def candidate_deleted_demand(sender, instance, **kwargs):
+    recount_skills(getattr(instance, '_deleted_skill_ids', []))
+
+
+# Поиск дубликатов для нового или измененного кандидата (candidates/dedup.py)
+
+@receiver(post_save, sender=Candidate)
+def candidate_check_duplicates(sender, instance, raw=False, **kwargs):
+    # Правка других полей (заметки, опыт) на поиск дубликатов не влияет
+    if not raw and instance.match_fields_changed():
+        update_candidate_matches(instance)
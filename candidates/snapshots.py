@@ -0,0 +1,145 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from hr_agency.replicas import use_primary
+from vacancies.models import Vacancy
+from .models import Candidate, Application, ApplicationStatusChange, DailySnapshot
+
+
+# Дневные срезы для графиков статистики.
+# Метрики за диапазон дат считаются групповыми запросами по дате (TruncDate),
+# без обхода строк в Python; повторный расчет дня перезаписывает срез.
+#
+# Срез не зависит от того, когда он посчитан: статусы откликов берутся из журнала
+# статусов на конец дня отклика, а не текущие. Число открытых вакансий истории
+# не имеет - оно записывается только в срез текущего дня (задача take_daily_snapshot
+# запускается по крону); у дней, дозаполненных позже, оно не известно (NULL).
+
+FLOW_FIELDS = ['new_candidates', 'new_applications', 'applications_pending',
+               'applications_approved', 'applications_rejected', 'new_vacancies']
+
+
+def _day_bounds(start, end):
+    """Границы [start 00:00, end+1 00:00) в часовом поясе проекта"""
+    tz = timezone.get_current_timezone()
+    since = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min), tz)
+    until = timezone.make_aware(datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min), tz)
+    return since, until
+
+
+def _count_by_day(queryset, field, *extra):
+    return (
+        queryset.annotate(day=TruncDate(field))
+        .values('day', *extra)
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def compute_snapshots(start, end):
+    """Срезы за дни с start по end включительно (без сохранения)"""
+    since, until = _day_bounds(start, end)
+    snapshots = {}
+    day = start
+    while day <= end:
+        snapshots[day] = DailySnapshot(date=day)
+        day += datetime.timedelta(days=1)
+
+    for row in _count_by_day(Candidate.objects.filter(created_at__gte=since, created_at__lt=until), 'created_at'):
+        snapshots[row['day']].new_candidates = row['count']
+
+    # Статус на конец дня отклика - последняя запись журнала за этот день
+    # (первая запись журнала делается при создании отклика)
+    day_status = Subquery(
+        ApplicationStatusChange.objects.filter(application=OuterRef('pk'))
+        .annotate(day=TruncDate('changed_at')).filter(day=OuterRef('day'))
+        .order_by('-changed_at', '-id').values('to_status')[:1]
+    )
+    applications = (
+        Application.objects.filter(applied_date__gte=since, applied_date__lt=until)
+        .annotate(day=TruncDate('applied_date'), day_status=day_status)
+        .values('day', 'day_status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in applications:
+        snapshot = snapshots[row['day']]
+        snapshot.new_applications += row['count']
+        if row['day_status'] in ('pending', 'approved', 'rejected'):
+            setattr(snapshot, f"applications_{row['day_status']}", row['count'])
+
+    for row in _count_by_day(Vacancy.objects.filter(created_at__gte=since, created_at__lt=until), 'created_at'):
+        snapshots[row['day']].new_vacancies = row['count']
+
+    return list(snapshots.values())
+
+
+def save_snapshots(snapshots, overwrite_open_vacancies=False):
+    update_fields = FLOW_FIELDS + ['updated_at']
+    if overwrite_open_vacancies:
+        update_fields.append('open_vacancies')
+    DailySnapshot.objects.bulk_create(
+        snapshots, update_conflicts=True, unique_fields=['date'], update_fields=update_fields
+    )
+
+
+def take_daily_snapshot(day=None):
+    """Срез за день (по умолчанию - сегодня). Идемпотентен"""
+    today = timezone.localdate()
+    day = day or today
+    with use_primary():
+        snapshots = compute_snapshots(day, day)
+        if day == today:
+            # Число открытых вакансий известно только на текущий момент
+            snapshots[0].open_vacancies = Vacancy.objects.filter(status='open').count()
+        save_snapshots(snapshots, overwrite_open_vacancies=day == today)
+    return snapshots[0]
+
+
+def _backfill_range(start, end):
+    try:
+        with use_primary():
+            snapshots = compute_snapshots(start, end)
+            save_snapshots(snapshots)
+        return len(snapshots)
+    finally:
+        # У каждого потока свое соединение с БД
+        connection.close()
+
+
+def backfill_snapshots(start, end, workers=4, chunk_days=31):
+    """Дозаполнение срезов: диапазон делится на части, части считаются параллельно"""
+    ranges = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + datetime.timedelta(days=chunk_days - 1), end)
+        ranges.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + datetime.timedelta(days=1)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(lambda bounds: _backfill_range(*bounds), ranges))
+
+
+def trend_series(days):
+    """Ряды для графиков за последние days дней - только из срезов"""
+    end = timezone.localdate()
+    start = end - datetime.timedelta(days=days - 1)
+    by_date = {snapshot.date: snapshot for snapshot in DailySnapshot.objects.filter(date__range=(start, end))}
+
+    series = {'labels': []}
+    fields = FLOW_FIELDS + ['open_vacancies']
+    for field in fields:
+        series[field] = []
+    day = start
+    while day <= end:
+        snapshot = by_date.get(day)
+        series['labels'].append(day.isoformat())
+        for field in fields:
+            series[field].append(getattr(snapshot, field) if snapshot else None)
+        day += datetime.timedelta(days=1)
+    return series
@@ -1,3 +1,449 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import django
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim_job, run_job
+from users.models import User
+from vacancies.models import Vacancy
+from .analytics import funnel_totals, update_funnel_rollups
+from .exports import EXPORT_FIELDS, export_rows
+from .calendar import feed_token
+from .models import (Application, ApplicationStatusChange, Candidate, CandidateFunnel, CandidateMatchKey,
+                     DailySnapshot, DuplicateCandidate, FunnelDeletion, Interview, PersonnelForm)
+from .pdf import pdfmetrics
+from .shortlist import _insert_new, attach_candidates
+from .snapshots import compute_snapshots, save_snapshots, take_daily_snapshot
+
+
+def create_candidate(number, **fields):
+    fields.setdefault('first_name', 'Иван')
+    fields.setdefault('last_name', f'Иванов{number}')
+    return Candidate.objects.create(email=f'candidate{number}@example.com', **fields)
+
+
+def create_vacancy(user, title='Разработчик', **fields):
+    fields.setdefault('status', 'open')
+    return Vacancy.objects.create(title=title, description='Описание', work_format='office',
+                                  required_experience=1, created_by=user, **fields)
+
+
+def create_personnel_form(number=0, **fields):
+    return PersonnelForm.objects.create(
+        last_name=f'Петров{number}', first_name='Иван', patronymic='Сергеевич', birth_date=datetime.date(1990, 1, 1),
+        birth_place='Москва', address='Москва', phone='+79001112233', email='petrov@example.com',
+        education='higher', institution='МГУ', specialty='Экономика', graduation_year=2012,
+        marital_status='single', passport_series='4510', passport_number='123456',
+        passport_issued_by='ОВД', passport_issue_date=datetime.date(2010, 1, 1),
+        passport_department_code='770-001', work_experience_total=10, work_experience_specialty=8, **fields
+    )
+
+
+class CandidateExportTests(TestCase):
+    """Выгрузка в CSV: поток из .iterator() (на PostgreSQL - серверный курсор) и фоновая задача"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        cls.recruiter = User.objects.create_user('recruiter', 'recruiter@example.com', 'pass', role='recruiter')
+        cls.candidates = [create_candidate(number, experience_years=number) for number in range(5)]
+
+    def read_csv(self, content):
+        self.assertTrue(content.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(content[1:]), delimiter=';'))
+
+    def test_streams_all_candidates_in_id_order(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('candidate_export'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = self.read_csv(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual(rows[0], [title for _, title in EXPORT_FIELDS])
+        self.assertEqual([row[3] for row in rows[1:]], [candidate.email for candidate in self.candidates])
+        self.assertEqual(rows[1][:2], ['Иванов0', 'Иван'])
+
+    @override_settings(DB_ITERATOR_CHUNK_SIZE=2)
+    def test_rows_are_read_in_chunks(self):
+        rows = list(export_rows())
+        self.assertEqual([row[3] for row in rows], [candidate.email for candidate in self.candidates])
+
+    def test_recruiter_cannot_export(self):
+        self.client.force_login(self.recruiter)
+        response = self.client.get(reverse('candidate_export'))
+        self.assertRedirects(response, reverse('candidate_list'), fetch_redirect_response=False)
+
+    def test_background_export_writes_file(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.client.force_login(self.manager)
+
+        with override_settings(MEDIA_ROOT=media_root, DB_ITERATOR_CHUNK_SIZE=2):
+            response = self.client.post(reverse('candidate_export'))
+            job = Job.objects.get()
+            self.assertRedirects(response, reverse('job_detail', args=[job.id]), fetch_redirect_response=False)
+
+            run_job(claim_job('test-worker'))
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'succeeded', job.error)
+            self.assertEqual(job.result['rows'], 5)
+
+            response = self.client.get(reverse('job_download', args=[job.id]))
+            rows = self.read_csv(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual(len(rows), 6)
+
+
+class CandidateSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        cls.petrov = Candidate.objects.create(first_name='Петр', last_name='Петров', email='petrov@example.com')
+        cls.sidorov = Candidate.objects.create(first_name='Сидор', last_name='Сидоров', email='sidorov@example.com')
+
+    def search(self, query):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('candidate_list'), {'search': query})
+        return [candidate.pk for candidate in response.context['candidates']]
+
+    def test_search_by_name_and_email(self):
+        self.assertEqual(self.search('Петров'), [self.petrov.pk])
+        # icontains: регистр не важен (LIKE в SQLite - только для латиницы)
+        self.assertEqual(self.search('SIDOROV@'), [self.sidorov.pk])
+        self.assertEqual(self.search('нет такого'), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Триграммные индексы создаются только на PostgreSQL')
+    def test_trigram_indexes_exist(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'candidates_candidate')
+        for name in ('candidate_first_name_trgm_idx', 'candidate_last_name_trgm_idx', 'candidate_email_trgm_idx'):
+            self.assertIn(name, constraints)
+
+
+class FunnelRollupTests(TestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        self.vacancy = create_vacancy(self.manager)
+        self.candidate = create_candidate(1)
+        Candidate.objects.filter(pk=self.candidate.pk).update(created_at=timezone.now() - datetime.timedelta(days=10))
+
+    def approve(self):
+        application = Application.objects.create(candidate=self.candidate, vacancy=self.vacancy)
+        application.status = 'approved'
+        application.save()
+        ApplicationStatusChange.objects.filter(to_status='approved').update(
+            changed_at=timezone.now() - datetime.timedelta(days=7)
+        )
+        return application
+
+    def test_time_to_approval_comes_from_status_log(self):
+        application = self.approve()
+        update_funnel_rollups(full=True)
+        self.assertAlmostEqual(CandidateFunnel.objects.get().days_to_approval, 3, places=2)
+
+        # Правка одобренного отклика не сдвигает время одобрения
+        application.notes = 'Комментарий'
+        application.save()
+        update_funnel_rollups()
+        self.assertAlmostEqual(CandidateFunnel.objects.get().days_to_approval, 3, places=2)
+
+    def test_analytics_page_only_reads_and_refresh_runs_in_background(self):
+        self.approve()
+        admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('candidate_analytics'))
+        self.assertIsNone(response.context['funnel_updated'])
+        self.assertFalse(CandidateFunnel.objects.exists())
+
+        response = self.client.post(reverse('candidate_analytics_refresh'))
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.id]), fetch_redirect_response=False)
+        run_job(claim_job('test-worker'))
+
+        response = self.client.get(reverse('candidate_analytics'))
+        self.assertFalse(response.context['funnel_stale'])
+        self.assertEqual(response.context['approved_candidates'], 1)
+
+    def test_deleted_applications_are_picked_up_incrementally(self):
+        self.approve()
+        update_funnel_rollups(full=True)
+        self.assertEqual(funnel_totals()['approved'], 1)
+
+        # Отклики удаляются каскадно вместе с вакансией
+        self.vacancy.delete()
+        self.assertEqual(FunnelDeletion.objects.count(), 1)
+        update_funnel_rollups()
+
+        fact = CandidateFunnel.objects.get()
+        self.assertFalse(fact.applied)
+        self.assertFalse(fact.approved)
+        self.assertEqual(funnel_totals()['applied'], 0)
+        self.assertFalse(FunnelDeletion.objects.exists())
+
+
+class AttachCandidatesTests(TestCase):
+
+    def test_attaches_new_pairs_and_logs_only_them(self):
+        manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        vacancies = [create_vacancy(manager, f'Вакансия {number}') for number in range(2)]
+        candidates = [create_candidate(number) for number in range(3)]
+        Application.objects.create(candidate=candidates[0], vacancy=vacancies[0])
+
+        attached, existing = attach_candidates([candidate.pk for candidate in candidates],
+                                               [vacancy.pk for vacancy in vacancies], notes='Подборка')
+
+        self.assertEqual((attached, existing), (5, 1))
+        self.assertEqual(Application.objects.count(), 6)
+        # У каждого отклика - одна запись журнала о создании
+        self.assertEqual(ApplicationStatusChange.objects.count(), 6)
+        self.assertEqual(Application.objects.filter(notes='Подборка').count(), 5)
+        self.assertEqual(attach_candidates([candidates[1].pk], [vacancies[1].pk]), (0, 1))
+
+    def test_only_open_vacancies_are_attached(self):
+        manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        open_vacancy = create_vacancy(manager, 'Открытая')
+        closed = create_vacancy(manager, 'Закрытая', status='closed')
+        draft = create_vacancy(manager, 'Черновик', status='draft')
+        candidate = create_candidate(1)
+
+        self.client.force_login(manager)
+        response = self.client.post(reverse('candidate_bulk_attach'), {
+            'candidate_ids': [candidate.pk], 'vacancy_ids': [open_vacancy.pk, closed.pk, draft.pk],
+        }, follow=True)
+
+        self.assertEqual(list(Application.objects.values_list('vacancy_id', flat=True)), [open_vacancy.pk])
+        self.assertContains(response, f'не открыты, кандидаты к ним не прикреплены: {closed.pk}, {draft.pk}')
+
+
+class InsertNewTests(TestCase):
+    """_insert_new вызывает закрытый QuerySet._insert (ON CONFLICT DO NOTHING RETURNING).
+    Тесты выполняются на SQLite и PostgreSQL; при обновлении Django их нужно пройти заново"""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        cls.vacancy = create_vacancy(manager)
+        cls.candidates = [create_candidate(number) for number in range(3)]
+        cls.existing = Application.objects.create(candidate=cls.candidates[0], vacancy=cls.vacancy)
+
+    def insert(self, candidates):
+        ids = [candidate.pk for candidate in candidates]
+        return _insert_new([Application(candidate_id=pk, vacancy_id=self.vacancy.pk) for pk in ids],
+                           ids, [self.vacancy.pk])
+
+    def test_django_version_is_pinned(self):
+        self.assertEqual(django.VERSION[:2], (5, 2), 'Проверьте QuerySet._insert в shortlist._insert_new')
+
+    def test_returns_only_inserted_rows(self):
+        self.assertTrue(connection.features.can_return_rows_from_bulk_insert)
+        created = self.insert(self.candidates)
+        self.assertEqual(sorted((candidate_id, vacancy_id) for _, candidate_id, vacancy_id in created),
+                         [(self.candidates[1].pk, self.vacancy.pk), (self.candidates[2].pk, self.vacancy.pk)])
+        self.assertEqual(set(Application.objects.exclude(pk=self.existing.pk).values_list('id', flat=True)),
+                         {application_id for application_id, _, _ in created})
+
+        # Пачка из одной строки, пропущенной из-за конфликта
+        self.assertEqual(self.insert(self.candidates[:1]), [])
+
+    def test_without_returning_compares_with_existing_pairs(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            created = self.insert(self.candidates)
+        self.assertEqual(sorted(candidate_id for _, candidate_id, _ in created),
+                         [self.candidates[1].pk, self.candidates[2].pk])
+
+
+class InterviewFeedTests(TestCase):
+
+    def setUp(self):
+        self.recruiter = User.objects.create_user('recruiter', 'recruiter@example.com', 'pass', role='recruiter')
+        Interview.objects.create(candidate=create_candidate(1), scheduled_by=self.recruiter, interview_type='phone',
+                                 scheduled_date=timezone.now() + datetime.timedelta(days=1))
+
+    def get_feed(self, token, **headers):
+        return self.client.get(reverse('interview_feed', args=[token]), headers=headers)
+
+    def test_feed_lists_interviews_and_answers_304(self):
+        response = self.get_feed(feed_token(self.recruiter))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Иванов1', b''.join(response.streaming_content).decode('utf-8'))
+
+        response = self.get_feed(feed_token(self.recruiter), if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_deactivated_user_feed_is_not_found(self):
+        token = feed_token(self.recruiter)
+        self.recruiter.is_active = False
+        self.recruiter.save()
+        self.assertEqual(self.get_feed(token).status_code, 404)
+
+    def test_new_link_revokes_old_one(self):
+        token = feed_token(self.recruiter)
+        self.client.force_login(self.recruiter)
+        self.client.post(reverse('interview_feed_reset'))
+
+        self.recruiter.refresh_from_db()
+        self.assertEqual(self.get_feed(token).status_code, 404)
+        new_token = feed_token(self.recruiter)
+        self.assertEqual(self.get_feed(new_token).status_code, 200)
+        self.assertEqual(self.get_feed(new_token[:-1]).status_code, 404)
+
+
+@override_settings(DUPLICATE_MAX_BLOCK=2)
+class DuplicateMatchTests(TestCase):
+
+    def create(self, email, phone='', last_name='Петров'):
+        return Candidate.objects.create(first_name='Иван', last_name=last_name, email=email, phone=phone)
+
+    def setUp(self):
+        self.petrov = self.create('petrov@example.com', phone='+7 900 111-22-33')
+        # Тезки без общего телефона: блок по ФИО больше DUPLICATE_MAX_BLOCK
+        for number in range(3):
+            self.create(f'namesake{number}@example.com')
+        self.duplicate = self.create('ivan.petrov@example.com', phone='89001112233')
+
+    def pending_pairs(self):
+        return list(DuplicateCandidate.objects.filter(status='pending').values_list('candidate_id', 'duplicate_id'))
+
+    def test_pair_from_small_block_survives_rescoring(self):
+        self.assertEqual(self.pending_pairs(), [(self.petrov.pk, self.duplicate.pk)])
+
+        self.petrov.email = 'i.petrov@example.com'
+        self.petrov.save()
+        self.assertEqual(self.pending_pairs(), [(self.petrov.pk, self.duplicate.pk)])
+
+        self.petrov.phone = ''
+        self.petrov.save()
+        self.assertEqual(self.pending_pairs(), [])
+
+    def test_unrelated_changes_are_not_rescored(self):
+        CandidateMatchKey.objects.filter(candidate=self.petrov).delete()
+        petrov = Candidate.objects.get(pk=self.petrov.pk)
+        petrov.recruiter_notes = 'Перезвонить'
+        petrov.save()
+        self.assertFalse(CandidateMatchKey.objects.filter(candidate=petrov).exists())
+
+        petrov.patronymic = 'Сергеевич'
+        petrov.save()
+        self.assertTrue(CandidateMatchKey.objects.filter(candidate=petrov).exists())
+
+
+class DailySnapshotTests(TestCase):
+
+    def setUp(self):
+        self.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        self.vacancy = create_vacancy(self.manager)
+        self.day = timezone.localdate() - datetime.timedelta(days=3)
+
+    def apply(self, number, status=None):
+        """Отклик, поданный self.day; status - смена статуса в тот же день"""
+        applied = timezone.make_aware(datetime.datetime.combine(self.day, datetime.time(10)))
+        application = Application.objects.create(candidate=create_candidate(number), vacancy=self.vacancy)
+        if status:
+            application.status = status
+            application.save()
+        Application.objects.filter(pk=application.pk).update(applied_date=applied)
+        application.status_changes.update(changed_at=applied)
+        return Application.objects.get(pk=application.pk)
+
+    def test_statuses_are_taken_at_the_end_of_the_day(self):
+        moved_on = self.apply(1)
+        self.apply(2, status='rejected')
+        take_daily_snapshot(self.day)
+
+        # Отклик одобрен позже - пересчет дня (как при дозаполнении) не переписывает историю
+        moved_on.status = 'approved'
+        moved_on.save()
+        save_snapshots(compute_snapshots(self.day, self.day))
+
+        snapshot = DailySnapshot.objects.get(date=self.day)
+        self.assertEqual((snapshot.new_applications, snapshot.applications_pending,
+                          snapshot.applications_approved, snapshot.applications_rejected), (2, 1, 0, 1))
+
+    def test_open_vacancies_are_recorded_only_on_the_day(self):
+        take_daily_snapshot(self.day)
+        self.assertIsNone(DailySnapshot.objects.get(date=self.day).open_vacancies)
+
+        today = timezone.localdate()
+        self.assertEqual(take_daily_snapshot().open_vacancies, 1)
+        self.vacancy.status = 'closed'
+        self.vacancy.save()
+        save_snapshots(compute_snapshots(today, today))
+        self.assertEqual(DailySnapshot.objects.get(date=today).open_vacancies, 1)
+
+
+@skipUnless(pdfmetrics is not None and os.path.exists(settings.PDF_FONT_PATH), 'Нужны reportlab и шрифт PDF_FONT_PATH')
+class PersonnelFormDocumentTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.private_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, self.private_root)
+        storages = {**settings.STORAGES, 'private': {**settings.STORAGES['private'],
+                                                     'OPTIONS': {'location': self.private_root}}}
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, STORAGES=storages)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        self.form = create_personnel_form(inn='771234567890', snils='123-456-789 01')
+
+    def stored_files(self, root):
+        return [os.path.join(folder, name) for folder, _, names in os.walk(root) for name in names]
+
+    def test_pdf_is_stored_outside_media_root(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('personnel_form_pdf', args=[self.form.id]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        self.assertEqual(self.stored_files(self.media_root), [])
+        self.assertEqual(len(self.stored_files(self.private_root)), 1)
+
+        # Анкета изменилась - документ верстается заново, прежний удаляется
+        self.form.is_approved = True
+        self.form.save()
+        self.client.get(reverse('personnel_form_pdf', args=[self.form.id]))
+        self.assertEqual(len(self.stored_files(self.private_root)), 1)
+
+    def test_recruiter_cannot_download_personnel_form(self):
+        recruiter = User.objects.create_user('recruiter', 'recruiter@example.com', 'pass', role='recruiter')
+        self.client.force_login(recruiter)
+        response = self.client.get(reverse('personnel_form_pdf', args=[self.form.id]))
+        self.assertRedirects(response, reverse('candidate_list'), fetch_redirect_response=False)
+
+
+class PersonnelFormBulkApproveTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager'))
+
+    def approve(self, ids):
+        return self.client.post(reverse('personnel_form_bulk_approve'), {'form_ids': ids}, follow=True)
+
+    def test_approves_selected_forms(self):
+        forms = [create_personnel_form(number) for number in range(3)]
+        self.approve([forms[0].pk, forms[2].pk])
+        self.assertEqual(list(PersonnelForm.objects.filter(is_approved=True).order_by('pk')
+                              .values_list('pk', flat=True)), [forms[0].pk, forms[2].pk])
+
+    @override_settings(BULK_ACTION_LIMIT=2)
+    def test_explicit_ids_are_capped(self):
+        forms = [create_personnel_form(number) for number in range(3)]
+        response = self.approve([form.pk for form in forms])
+        self.assertContains(response, 'Не больше 2 анкет за раз')
+        self.assertFalse(PersonnelForm.objects.filter(is_approved=True).exists())
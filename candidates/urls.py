@@ -6,18 +6,34 @@ urlpatterns = [
     path('', views.candidate_list, name='candidate_list'),
     path('<int:candidate_id>/', views.candidate_detail, name='candidate_detail'),
     path('create/', views.candidate_create, name='candidate_create'),
+    path('phone-lookup/', views.phone_lookup, name='phone_lookup'),
+    path('bulk-attach/', views.candidate_bulk_attach, name='candidate_bulk_attach'),
+    path('duplicates/', views.duplicate_queue, name='duplicate_queue'),
+    path('duplicates/<int:pair_id>/', views.duplicate_resolve, name='duplicate_resolve'),
     path('<int:candidate_id>/download-resume/', views.download_resume, name='download_resume'),
     path('<int:candidate_id>/attach-vacancy/', views.attach_candidate_to_vacancy, name='attach_candidate_to_vacancy'),
+    path('<int:candidate_id>/pdf/', views.candidate_pdf, name='candidate_pdf'),
     path('<int:candidate_id>/schedule-interview/', views.schedule_interview, name='schedule_interview'),
     path('<int:candidate_id>/edit/', views.candidate_edit, name='candidate_edit'),
+    # Собеседования
+    path('interviews/', views.upcoming_interviews, name='upcoming_interviews'),
+    path('interviews/calendar/', views.interview_calendar, name='interview_calendar'),
+    path('interviews/feed/reset/', views.interview_feed_reset, name='interview_feed_reset'),
+    path('interviews/feed/<str:token>.ics', views.interview_feed, name='interview_feed'),
+    path('interviews/<int:interview_id>/reschedule/', views.reschedule_interview, name='reschedule_interview'),
+    path('interviews/common-slots/', views.interview_common_slots, name='interview_common_slots'),
     # Формы кадров
     path('personnel/form/', views.personnel_form, name='personnel_form'),
     path('personnel/forms/', views.personnel_form_list, name='personnel_form_list'),
+    path('personnel/forms/approve/', views.personnel_form_bulk_approve, name='personnel_form_bulk_approve'),
+    path('personnel/forms/<int:form_id>/pdf/', views.personnel_form_pdf, name='personnel_form_pdf'),
+    path('personnel/forms/archive/', views.personnel_form_archive, name='personnel_form_archive'),
 
     # Только для администраторов
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('admin/users/', views.user_management, name='user_management'),
     path('admin/analytics/', views.candidate_analytics, name='candidate_analytics'),
+    path('admin/analytics/refresh/', views.candidate_analytics_refresh, name='candidate_analytics_refresh'),
     path('admin/settings/', views.system_settings, name='system_settings'),
     path('admin/export/', views.candidate_export, name='candidate_export'),
 
@@ -1,20 +1,61 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.contrib import messages
 from django.core.paginator import Paginator
-from .models import Candidate, PersonnelForm, Application, Interview
+from .models import Candidate, PersonnelForm, Application, Interview, DuplicateCandidate
 from .forms import PersonnelFormForm, CandidateCreateForm
 from .forms import RecruiterCandidateForm
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_POST
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from hr_agency.cache import object_version, get_version, fragment_timeout
+from hr_agency.conditional import conditional_page, page_etag, queryset_fingerprint
+from hr_agency.sqlite import run_write
+from hr_agency.page_cache import acached
+from hr_agency.parallel import gather_queries
+from hr_agency.replicas import read_from_replica
+from .analytics import (FUNNEL_DIMENSIONS, refresh_funnel_rollups, funnel_updated_at, funnel_report,
+                        funnel_totals)
+from .history import current_stage_durations, completed_stage_durations, stuck
+from .shortlist import attach_candidates
+from .calendar import (interviews_in_window, week_start, day_bounds, feed_window, feed_token,
+                       user_id_from_token, reset_feed_key, feed_etag, iter_feed)
+from .scheduling import find_conflicts, free_slots, lock_participants
+from .dedup import merge_candidates, dismiss_pair
+from .normalization import normalize_phone, phone_query
+from .exports import EXPORT_FIELDS, export_rows, export_candidates_csv
+from .documents import document_storage, download_name, get_document, render_documents_archive
+from .pdf import PdfUnavailable
+from jobs.queue import enqueue
+from vacancies.models import Vacancy
+import csv
+import datetime
 import os
+from functools import partial, wraps
 
 
 def role_required(allowed_roles):
-    """Декоратор для проверки ролей пользователя"""
+    """Декоратор для проверки ролей пользователя (синхронных и асинхронных страниц)"""
 
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @login_required
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                user = await request.auser()
+                if hasattr(user, 'role') and user.role in allowed_roles:
+                    return await view_func(request, *args, **kwargs)
+                messages.error(request, "У вас нет прав для доступа к этой странице")
+                return redirect('candidate_list')
+
+            return async_wrapper
+
         @login_required
         def wrapper(request, *args, **kwargs):
             if hasattr(request.user, 'role') and request.user.role in allowed_roles:
@@ -78,14 +119,67 @@ def vacancy_detail(request, vacancy_id):
         'user_role': user_role,
     })
 
+def _candidate_list_etag(request):
+    # В списке - статус первого отклика и названия вакансий
+    return page_etag(
+        request,
+        queryset_fingerprint(_filter_candidates(request.GET)),
+        queryset_fingerprint(Application.objects.all()),
+        get_version('vacancies'),
+    )
+
+
 @login_required
+@read_from_replica
+@conditional_page(_candidate_list_etag)
 def candidate_list(request):
     """Список кандидатов с поиском и фильтрацией"""
-    candidates_list = Candidate.objects.all().order_by('-created_at')
-
-    # Поиск по имени, фамилии или email
+    candidates_list = _filter_candidates(request.GET).order_by('-created_at')
     search_query = request.GET.get('search', '')
-    if search_query:
+    min_experience = request.GET.get('min_experience', '')
+    education_filter = request.GET.get('education', '')
+    position_level_filter = request.GET.get('position_level', '')
+
+    # Статистика
+    total_candidates = candidates_list.count()
+    experienced_candidates = candidates_list.filter(experience_years__gte=3).count()
+
+    # Пагинация
+    paginator = Paginator(candidates_list, 12)  # 12 кандидатов на страницу
+    page_number = request.GET.get('page')
+    candidates = paginator.get_page(page_number)
+
+    return render(request, 'candidates/candidate_list.html', {
+        'candidates': candidates,
+        'search_query': search_query,
+        'min_experience': min_experience,
+        'education_filter': education_filter,
+        'position_level_filter': position_level_filter,
+        'total_candidates': total_candidates,
+        'experienced_candidates': experienced_candidates,
+        # Вакансии для массового прикрепления
+        'open_vacancies': Vacancy.objects.filter(status='open').only('id', 'title').order_by('title'),
+    })
+
+
+CANDIDATE_FILTERS = ['search', 'min_experience', 'education', 'position_level']
+
+
+def _filter_candidates(params):
+    """Кандидаты по параметрам поиска и фильтров списка (GET или POST)"""
+    candidates_list = Candidate.objects.all()
+
+    # Поиск по имени, фамилии или email; запрос из цифр - по нормализованному телефону
+    search_query = params.get('search', '')
+    phone = phone_query(search_query)
+    if phone is not None:
+        normalized, digits = phone
+        if normalized:
+            candidates_list = candidates_list.filter(phone_normalized=normalized)
+        else:
+            # Часть номера - индекс не помогает, но формат записи уже не важен
+            candidates_list = candidates_list.filter(phone_normalized__contains=digits)
+    elif search_query:
         candidates_list = candidates_list.filter(
             Q(first_name__icontains=search_query) |
             Q(last_name__icontains=search_query) |
@@ -93,7 +187,7 @@ def candidate_list(request):
         )
 
     # Фильтрация по опыту работы
-    min_experience = request.GET.get('min_experience', '')
+    min_experience = params.get('min_experience', '')
     if min_experience:
         try:
             candidates_list = candidates_list.filter(experience_years__gte=int(min_experience))
@@ -101,45 +195,113 @@ def candidate_list(request):
             pass
 
     # Фильтрация по образованию
-    education_filter = request.GET.get('education', '')
+    education_filter = params.get('education', '')
     if education_filter:
         candidates_list = candidates_list.filter(education_level=education_filter)
 
     # Фильтрация по уровню позиции
-    position_level_filter = request.GET.get('position_level', '')
+    position_level_filter = params.get('position_level', '')
     if position_level_filter:
         candidates_list = candidates_list.filter(position_level=position_level_filter)
 
-    # Статистика
-    total_candidates = candidates_list.count()
-    experienced_candidates = candidates_list.filter(experience_years__gte=3).count()
+    return candidates_list
 
-    # Пагинация
-    paginator = Paginator(candidates_list, 12)  # 12 кандидатов на страницу
-    page_number = request.GET.get('page')
-    candidates = paginator.get_page(page_number)
 
-    return render(request, 'candidates/candidate_list.html', {
-        'candidates': candidates,
-        'search_query': search_query,
-        'min_experience': min_experience,
-        'total_candidates': total_candidates,
-        'experienced_candidates': experienced_candidates
-    })
+@login_required
+@read_from_replica
+def phone_lookup(request):
+    """Поиск кандидатов (и анкет сотрудников - для менеджеров и админов) по номеру
+    телефона в любом формате, например при входящем звонке"""
+    phone = normalize_phone(request.GET.get('phone', ''))
+    if not phone:
+        return JsonResponse({'error': 'Укажите номер телефона полностью'}, status=400)
+
+    candidates = Candidate.objects.filter(phone_normalized=phone).order_by('-created_at')
+    data = {
+        'phone': phone,
+        'candidates': [
+            {'id': candidate.pk, 'name': str(candidate), 'email': candidate.email,
+             'url': reverse('candidate_detail', args=[candidate.pk])}
+            for candidate in candidates.only('id', 'first_name', 'last_name', 'patronymic', 'email')
+        ],
+    }
+    if getattr(request.user, 'role', None) in ('manager', 'admin'):
+        forms = PersonnelForm.objects.filter(phone_normalized=phone)
+        data['personnel_forms'] = [
+            {'id': form.pk, 'name': str(form), 'email': form.email}
+            for form in forms.only('id', 'last_name', 'first_name', 'patronymic', 'email')
+        ]
+    return JsonResponse(data)
+
+
+@role_required(['manager', 'admin', 'recruiter'])
+@require_POST
+def candidate_bulk_attach(request):
+    """Прикрепление выбранных кандидатов (или всех найденных) к одной или нескольким вакансиям"""
+    filters = {name: request.POST[name] for name in CANDIDATE_FILTERS if request.POST.get(name)}
+    back_url = reverse('candidate_list') + (f'?{urlencode(filters)}' if filters else '')
+
+    try:
+        vacancy_ids = [int(value) for value in request.POST.getlist('vacancy_ids')]
+        candidate_ids = [int(value) for value in request.POST.getlist('candidate_ids')]
+    except ValueError:
+        messages.error(request, "Некорректный выбор кандидатов или вакансий")
+        return redirect(back_url)
+
+    # Как и в форме - только открытые вакансии
+    requested_ids = vacancy_ids
+    vacancy_ids = list(Vacancy.objects.filter(id__in=requested_ids, status='open').values_list('id', flat=True))
+    rejected_ids = sorted(set(requested_ids) - set(vacancy_ids))
+    if rejected_ids:
+        messages.warning(request, "Вакансии не найдены или не открыты, кандидаты к ним не прикреплены: "
+                                  + ', '.join(map(str, rejected_ids)))
+    if not vacancy_ids:
+        messages.error(request, "Выберите открытую вакансию")
+        return redirect(back_url)
+
+    if request.POST.get('select_all'):
+        # Все кандидаты по текущему поиску - id читаются пачками, не целиком
+        candidates = _filter_candidates(request.POST)
+    elif candidate_ids:
+        candidates = Candidate.objects.filter(id__in=candidate_ids)
+    else:
+        messages.error(request, "Выберите кандидатов")
+        return redirect(back_url)
+
+    attached, existing = attach_candidates(
+        candidates.order_by('id').values_list('id', flat=True).iterator(chunk_size=settings.DB_ITERATOR_CHUNK_SIZE),
+        vacancy_ids,
+        request.POST.get('notes', ''),
+    )
+    messages.success(request, f"Прикреплено новых откликов: {attached}, уже были прикреплены: {existing}")
+    return redirect(back_url)
+
+def _candidate_detail_etag(request, candidate_id):
+    candidate = Candidate.objects.filter(id=candidate_id).only('id', 'updated_at').first()
+    if candidate is None:
+        return None
+    return page_etag(request, object_version(candidate, 'candidate'), get_version('vacancies'))
+
 
 @login_required
+@conditional_page(_candidate_detail_etag)
 def candidate_detail(request, candidate_id):
     """Детальная страница кандидата"""
     candidate = get_object_or_404(Candidate, id=candidate_id)
 
     # Получаем открытые вакансии для модального окна
+    # (queryset ленивый - при попадании в кэш фрагмента запрос не выполняется)
     from vacancies.models import Vacancy
     open_vacancies = Vacancy.objects.filter(status='open')
 
     return render(request, 'candidates/candidate_detail.html', {
         'candidate': candidate,
         'user_role': getattr(request.user, 'role', ''),
-        'open_vacancies': open_vacancies
+        'open_vacancies': open_vacancies,
+        # Версии для кэширования фрагментов шаблона
+        'candidate_version': object_version(candidate, 'candidate'),
+        'vacancies_version': get_version('vacancies'),
+        'fragment_timeout': fragment_timeout(),
     })
 
 # Функции для форм - только менеджеры и админы
@@ -160,34 +322,189 @@ def personnel_form(request):
         'form': form
     })
 
+PERSONNEL_FORM_FILTERS = ['search', 'is_approved', 'education', 'marital_status']
+
+# Колонки списка анкет. Паспортные данные, адрес, ИНН и СНИЛС в список не загружаются
+PERSONNEL_LIST_FIELDS = ['id', 'last_name', 'first_name', 'patronymic', 'email', 'phone',
+                         'education', 'marital_status', 'is_approved', 'created_at']
+
+PERSONNEL_FORMS_PAGE_SIZE = 50
+
+
+def _filter_personnel_forms(params):
+    """Анкеты по параметрам поиска и фильтров списка (GET или POST)"""
+    forms = PersonnelForm.objects.all()
+
+    search_query = params.get('search', '')
+    phone = phone_query(search_query)
+    if phone is not None:
+        normalized, digits = phone
+        forms = forms.filter(phone_normalized=normalized) if normalized else forms.filter(
+            phone_normalized__contains=digits)
+    elif search_query:
+        forms = forms.filter(
+            Q(first_name__icontains=search_query) |
+            Q(last_name__icontains=search_query) |
+            Q(email__icontains=search_query)
+        )
+
+    if params.get('is_approved') in ('0', '1'):
+        forms = forms.filter(is_approved=params['is_approved'] == '1')
+    if params.get('education'):
+        forms = forms.filter(education=params['education'])
+    if params.get('marital_status'):
+        forms = forms.filter(marital_status=params['marital_status'])
+    return forms
+
+
+def _int_param(params, name):
+    try:
+        return int(params[name])
+    except (KeyError, ValueError):
+        return None
+
+
 @role_required(['manager', 'admin'])
+@read_from_replica
 def personnel_form_list(request):
-    """Список заполненных форм"""
-    forms = PersonnelForm.objects.all()
+    """Список анкет сотрудников: поиск, фильтры, постраничный вывод по курсору.
+
+    Страница - анкеты с id меньше ?after (следующая) или больше ?before (предыдущая):
+    без OFFSET и COUNT по всей таблице, одинаково быстро на любой странице.
+    """
+    filters = {name: request.GET[name] for name in PERSONNEL_FORM_FILTERS if request.GET.get(name)}
+    forms = _filter_personnel_forms(request.GET).only(*PERSONNEL_LIST_FIELDS)
+    size = PERSONNEL_FORMS_PAGE_SIZE
+
+    after, before = _int_param(request.GET, 'after'), _int_param(request.GET, 'before')
+    if before is not None:
+        # Лишняя строка показывает, есть ли страница еще новее
+        page = list(forms.filter(id__gt=before).order_by('id')[:size + 1])
+        has_newer = len(page) > size
+        page = page[:size][::-1]
+        has_older = True
+    else:
+        if after is not None:
+            forms = forms.filter(id__lt=after)
+        page = list(forms.order_by('-id')[:size + 1])
+        has_older = len(page) > size
+        page = page[:size]
+        has_newer = after is not None
+
+    base = f'?{urlencode(filters)}&' if filters else '?'
     return render(request, 'candidates/personnel_form_list.html', {
-        'forms': forms
+        'forms': page,
+        'filters': filters,
+        'newer_url': f'{base}before={page[0].id}' if has_newer and page else None,
+        'older_url': f'{base}after={page[-1].id}' if has_older and page else None,
+        'education_choices': PersonnelForm.EDUCATION_CHOICES,
+        'marital_status_choices': PersonnelForm.MARITAL_STATUS_CHOICES,
     })
 
+
+def _approve_personnel_forms(forms):
+    # update() не заполняет auto_now - updated_at задаем явно
+    return forms.filter(is_approved=False).update(is_approved=True, updated_at=timezone.now())
+
+
+@role_required(['manager', 'admin'])
+@require_POST
+def personnel_form_bulk_approve(request):
+    """Отметка выбранных анкет (или всех найденных) как проверенных - одним UPDATE"""
+    filters = {name: request.POST[name] for name in PERSONNEL_FORM_FILTERS if request.POST.get(name)}
+    back_url = reverse('personnel_form_list') + (f'?{urlencode(filters)}' if filters else '')
+
+    if request.POST.get('select_all'):
+        forms = _filter_personnel_forms(request.POST)
+    else:
+        try:
+            ids = [int(value) for value in request.POST.getlist('form_ids')]
+        except ValueError:
+            messages.error(request, "Некорректный выбор анкет")
+            return redirect(back_url)
+        if not ids:
+            messages.error(request, "Выберите анкеты")
+            return redirect(back_url)
+        if len(ids) > settings.BULK_ACTION_LIMIT:
+            messages.error(request, f"Не больше {settings.BULK_ACTION_LIMIT} анкет за раз")
+            return redirect(back_url)
+        forms = PersonnelForm.objects.filter(id__in=ids)
+
+    approved = run_write(_approve_personnel_forms, forms)
+    messages.success(request, f"Отмечено как проверенные: {approved}")
+    return redirect(back_url)
+
 # Дополнительные функции для разных ролей
 @role_required(['admin'])
+@read_from_replica
 def candidate_analytics(request):
-    """Аналитика кандидатов - только для администраторов"""
-    candidates = Candidate.objects.all()  # ИСПРАВЛЕНО: Candidate вместо PersonnelForm
-    total_candidates = candidates.count()
-    # Для Candidate нет поля is_approved, убираем эту статистику
-    approved_candidates = 0
+    """Аналитика кандидатов - воронка подбора из предрассчитанных агрегатов.
+    Страница только читает: агрегаты пересчитывает команда или фоновая задача"""
+    funnel_updated = funnel_updated_at()
+    funnel_stale = (funnel_updated is None or timezone.now() - funnel_updated
+                    > datetime.timedelta(seconds=settings.FUNNEL_REFRESH_SECONDS))
+
+    by = request.GET.get('by', 'source')
+    if by not in FUNNEL_DIMENSIONS:
+        by = 'source'
+
+    totals = funnel_totals()
+    stuck_days = settings.STUCK_APPLICATION_DAYS
+    stuck_applications = stuck(stuck_days).select_related('candidate', 'vacancy')
 
     return render(request, 'candidates/analytics.html', {
-        'total_candidates': total_candidates,
-        'approved_candidates': approved_candidates,
-        'approval_rate': 0
+        'total_candidates': totals['candidates'],
+        'approved_candidates': totals['approved'],
+        'approval_rate': totals['overall_rate'],
+        'totals': totals,
+        'funnel_rows': funnel_report(by),
+        'by': by,
+        'dimensions': FUNNEL_DIMENSIONS,
+        'current_stages': current_stage_durations(),
+        'completed_stages': completed_stage_durations(),
+        'stuck_days': stuck_days,
+        'stuck_count': stuck_applications.count(),
+        'stuck_applications': stuck_applications[:20],
+        'funnel_updated': funnel_updated,
+        'funnel_stale': funnel_stale,
     })
 
+
+@role_required(['admin'])
+@require_POST
+def candidate_analytics_refresh(request):
+    """Пересчет воронки в фоне; прогресс - на странице задачи"""
+    job = run_write(enqueue, refresh_funnel_rollups, title='Пересчет воронки подбора', user=request.user)
+    return redirect('job_detail', job_id=job.id)
+
+class _Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
 @role_required(['manager', 'admin'])
 def candidate_export(request):
-    """Экспорт данных кандидатов - для менеджеров и админов"""
-    # Здесь будет логика экспорта данных
-    return render(request, 'candidates/export.html')
+    """Экспорт данных кандидатов в CSV - для менеджеров и админов.
+    GET - сразу потоком, POST - фоновой задачей со страницей прогресса"""
+    if request.method == 'POST':
+        job = run_write(enqueue, export_candidates_csv, title='Выгрузка кандидатов в CSV', user=request.user)
+        return redirect('job_detail', job_id=job.id)
+
+    # Строки сразу отдаются клиенту, весь файл в памяти не собирается
+    rows = export_rows()
+    writer = csv.writer(_Echo(), delimiter=';')
+
+    def stream():
+        yield '\ufeff'  # BOM, чтобы Excel распознал UTF-8
+        yield writer.writerow([title for _, title in EXPORT_FIELDS])
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="candidates.csv"'
+    return response
 
 @role_required(['admin'])
 def system_settings(request):
@@ -253,72 +570,82 @@ def create_user(request):
     return render(request, 'admin/create_user.html')
 
 
+def manager_dashboard_queries():
+    """Независимые запросы панели менеджера: имя -> функция, возвращающая готовые данные"""
+    User = get_user_model()
+    return {
+        'total_candidates': Candidate.objects.count,
+        # Счетчики вакансий по статусу и формату работы - одним запросом
+        'vacancies': lambda: Vacancy.objects.aggregate(
+            total=Count('id'),
+            open=Count('id', filter=Q(status='open')),
+            closed=Count('id', filter=Q(status='closed')),
+            office=Count('id', filter=Q(work_format='office')),
+            remote=Count('id', filter=Q(work_format='remote')),
+            hybrid=Count('id', filter=Q(work_format='hybrid')),
+        ),
+        # Число назначенных вакансий - в том же запросе, что и рекрутеры
+        'recruiters': lambda: list(
+            User.objects.filter(role='recruiter').annotate(assigned_count=Count('assigned_vacancies'))
+        ),
+        'recent_vacancies': lambda: list(Vacancy.objects.order_by('-created_at')[:5]),
+    }
+
+
 @login_required
-def manager_dashboard(request):
-    """Панель управления для менеджеров"""
+@read_from_replica
+async def manager_dashboard(request):
+    """Панель управления для менеджеров - запросы выполняются одновременно"""
     # Проверка роли через атрибут пользователя
-    if not hasattr(request.user, 'role') or request.user.role != 'manager':
+    user = await request.auser()
+    if getattr(user, 'role', None) != 'manager':
         from django.http import HttpResponseForbidden
         return HttpResponseForbidden("Доступ только для менеджеров")
 
-    # Статистика кандидатов
-    total_candidates = Candidate.objects.count()
-
-    # Статистика вакансий
-    from vacancies.models import Vacancy
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-
-    total_vacancies = Vacancy.objects.count()
-    open_vacancies = Vacancy.objects.filter(status='open').count()
-    closed_vacancies = Vacancy.objects.filter(status='closed').count()
-
-    # Статистика по формату работы
-    office_vacancies = Vacancy.objects.filter(work_format='office').count()
-    remote_vacancies = Vacancy.objects.filter(work_format='remote').count()
-    hybrid_vacancies = Vacancy.objects.filter(work_format='hybrid').count()
-
-    # Рекрутеры
-    recruiters = User.objects.filter(role='recruiter')
-    recruiters_count = recruiters.count()
-
-    # Последние вакансии
-    recent_vacancies = Vacancy.objects.all().order_by('-created_at')[:5]
+    data = await acached('manager_dashboard', partial(gather_queries, **manager_dashboard_queries()))
+    vacancies = data['vacancies']
 
     context = {
-        'total_candidates': total_candidates,
-        'total_vacancies': total_vacancies,
-        'open_vacancies': open_vacancies,
-        'closed_vacancies': closed_vacancies,
-        'office_vacancies': office_vacancies,
-        'remote_vacancies': remote_vacancies,
-        'hybrid_vacancies': hybrid_vacancies,
-        'recruiters': recruiters,
-        'recruiters_count': recruiters_count,
-        'recent_vacancies': recent_vacancies,
+        'total_candidates': data['total_candidates'],
+        'total_vacancies': vacancies['total'],
+        'open_vacancies': vacancies['open'],
+        'closed_vacancies': vacancies['closed'],
+        'office_vacancies': vacancies['office'],
+        'remote_vacancies': vacancies['remote'],
+        'hybrid_vacancies': vacancies['hybrid'],
+        'recruiters': data['recruiters'],
+        'recruiters_count': len(data['recruiters']),
+        'recent_vacancies': data['recent_vacancies'],
     }
-    return render(request, 'manager/dashboard.html', context)
+    return await sync_to_async(render)(request, 'manager/dashboard.html', context)
 
-@role_required(['admin'])
-def admin_dashboard(request):
-    """Административная панель"""
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
 
-    users = User.objects.all()
-    total_candidates = Candidate.objects.count()  # ИСПРАВЛЕНО: Candidate вместо PersonnelForm
+def admin_dashboard_queries():
+    """Независимые запросы административной панели"""
+    User = get_user_model()
+    return {
+        'total_candidates': Candidate.objects.count,
+        # Статистика по ролям - одним запросом
+        'roles': lambda: User.objects.aggregate(
+            recruiters=Count('id', filter=Q(role='recruiter')),
+            managers=Count('id', filter=Q(role='manager')),
+            admins=Count('id', filter=Q(role='admin')),
+        ),
+    }
 
-    # Статистика по ролям
-    recruiters = users.filter(role='recruiter').count()
-    managers = users.filter(role='manager').count()
-    admins = users.filter(role='admin').count()
 
-    return render(request, 'admin/dashboard.html', {
-        'users': users,
-        'total_candidates': total_candidates,
-        'recruiters_count': recruiters,
-        'managers_count': managers,
-        'admins_count': admins,
+@role_required(['admin'])
+@read_from_replica
+async def admin_dashboard(request):
+    """Административная панель"""
+    data = await acached('admin_dashboard', partial(gather_queries, **admin_dashboard_queries()))
+
+    return await sync_to_async(render)(request, 'admin/dashboard.html', {
+        'users': get_user_model().objects.all(),
+        'total_candidates': data['total_candidates'],
+        'recruiters_count': data['roles']['recruiters'],
+        'managers_count': data['roles']['managers'],
+        'admins_count': data['roles']['admins'],
     })
 
 @login_required
@@ -332,7 +659,7 @@ def candidate_create(request):
         form = RecruiterCandidateForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                candidate = form.save()
+                candidate = run_write(form.save)
                 messages.success(request, f'Кандидат {candidate.first_name} {candidate.last_name} успешно создан!')
                 return redirect('candidate_list')
             except Exception as e:
@@ -362,7 +689,7 @@ def candidate_edit(request, candidate_id):
     if request.method == 'POST':
         form = RecruiterCandidateForm(request.POST, request.FILES, instance=candidate)
         if form.is_valid():
-            candidate = form.save()
+            candidate = run_write(form.save)
             messages.success(request,
                              f'Данные кандидата {candidate.first_name} {candidate.last_name} успешно обновлены!')
             return redirect('candidate_detail', candidate_id=candidate_id)
@@ -402,6 +729,46 @@ def download_resume(request, candidate_id):
     return response
 
 
+def _document_response(request, kind, obj, back_url):
+    """PDF объекта: из хранилища или сверстанный сейчас, если объект изменился"""
+    try:
+        name = get_document(kind, obj)
+    except PdfUnavailable as e:
+        messages.error(request, f"PDF недоступен: {e}")
+        return redirect(back_url)
+    return FileResponse(document_storage().open(name, 'rb'), filename=download_name(kind, obj),
+                        content_type='application/pdf')
+
+
+@login_required
+def candidate_pdf(request, candidate_id):
+    """Профиль кандидата для печати"""
+    candidate = get_object_or_404(Candidate.objects.prefetch_related('skills'), id=candidate_id)
+    return _document_response(request, 'candidate', candidate, reverse('candidate_detail', args=[candidate.id]))
+
+
+@role_required(['manager', 'admin'])
+def personnel_form_pdf(request, form_id):
+    """Анкета сотрудника для печати"""
+    form = get_object_or_404(PersonnelForm.objects.prefetch_related('skills'), id=form_id)
+    return _document_response(request, 'personnel_form', form, reverse('personnel_form_list'))
+
+
+@role_required(['manager', 'admin'])
+@require_POST
+def personnel_form_archive(request):
+    """ZIP с PDF проверенных анкет (измененных начиная с даты) - фоновой задачей"""
+    try:
+        since = datetime.date.fromisoformat(request.POST['since']) if request.POST.get('since') else None
+    except ValueError:
+        messages.error(request, "Неверная дата")
+        return redirect('personnel_form_list')
+    title = 'PDF проверенных анкет' + (f' с {since:%d.%m.%Y}' if since else '')
+    job = run_write(enqueue, render_documents_archive, title=title, user=request.user,
+                    kind='personnel_form', approved=True, since=since and since.isoformat())
+    return redirect('job_detail', job_id=job.id)
+
+
 @login_required
 def attach_candidate_to_vacancy(request, candidate_id):
     """Прикрепление кандидата к вакансии"""
@@ -416,18 +783,10 @@ def attach_candidate_to_vacancy(request, candidate_id):
             return redirect('candidate_detail', candidate_id=candidate_id)
 
         try:
-            from vacancies.models import Vacancy
             vacancy = Vacancy.objects.get(id=vacancy_id)
 
-            # Создаем заявку (Application)
-            application, created = Application.objects.get_or_create(
-                candidate=candidate,
-                vacancy=vacancy,
-                defaults={
-                    'status': 'pending',
-                    'notes': notes
-                }
-            )
+            # Создаем заявку (Application); если она уже есть, вставка пропускается базой
+            created, _ = attach_candidates([candidate.id], [vacancy.id], notes)
 
             if created:
                 messages.success(request, f'Кандидат прикреплен к вакансии "{vacancy.title}"')
@@ -442,145 +801,268 @@ def attach_candidate_to_vacancy(request, candidate_id):
     return redirect('candidate_detail', candidate_id=candidate_id)
 
 
+def _parse_interview_form(request):
+    """Дата (с учетом часового пояса) и длительность из формы собеседования"""
+    scheduled_date = timezone.make_aware(
+        datetime.datetime.strptime(request.POST.get('interview_date', ''), '%Y-%m-%dT%H:%M')
+    )
+    duration = int(request.POST.get('duration_minutes') or Interview._meta.get_field('duration_minutes').default)
+    if not 5 <= duration <= Interview.MAX_DURATION_MINUTES:
+        raise ValueError(f"длительность должна быть от 5 до {Interview.MAX_DURATION_MINUTES} минут")
+    return scheduled_date, duration
+
+
+def _conflict_message(conflicts, slots):
+    busy = ", ".join(
+        f"{timezone.localtime(c.scheduled_date):%d.%m %H:%M}–{timezone.localtime(c.end_date):%H:%M} ({c.candidate})"
+        for c in conflicts
+    )
+    message = f"Время занято: {busy}."
+    if slots:
+        message += " Свободно: " + ", ".join(f"{timezone.localtime(slot):%d.%m.%Y %H:%M}" for slot in slots)
+    return message
+
+
 @login_required
 def schedule_interview(request, candidate_id):
-    """Планирование собеседования"""
+    """Планирование собеседования с проверкой пересечений у интервьюера и кандидата"""
     candidate = get_object_or_404(Candidate, id=candidate_id)
 
     if request.method == 'POST':
-        interview_date = request.POST.get('interview_date')
         interview_type = request.POST.get('interview_type')
         notes = request.POST.get('notes', '')
 
-        if not interview_date or not interview_type:
+        if not request.POST.get('interview_date') or not interview_type:
             messages.error(request, "Заполните все обязательные поля")
             return redirect('candidate_detail', candidate_id=candidate_id)
 
         try:
-            # Преобразуем строку в datetime с учетом часового пояса
-            from django.utils.timezone import make_aware
-            import datetime
-
-            naive_datetime = datetime.datetime.strptime(interview_date, '%Y-%m-%dT%H:%M')
-            aware_datetime = make_aware(naive_datetime)
+            scheduled_date, duration = _parse_interview_form(request)
+        except ValueError as e:
+            messages.error(request, f"Неверные данные: {str(e)}")
+            return redirect('candidate_detail', candidate_id=candidate_id)
 
-            # Создаем запись о собеседовании
-            interview = Interview.objects.create(
+        def create():
+            # Проверка и создание в одной транзакции записи
+            lock_participants(request.user.id, candidate.id)
+            conflicts = find_conflicts(scheduled_date, duration, request.user.id, candidate.id)
+            if conflicts:
+                return None, conflicts
+            return Interview.objects.create(
                 candidate=candidate,
-                scheduled_date=aware_datetime,
+                scheduled_date=scheduled_date,
+                duration_minutes=duration,
                 interview_type=interview_type,
                 notes=notes,
                 scheduled_by=request.user,
                 status='scheduled'
-            )
+            ), []
 
-            formatted_date = aware_datetime.strftime('%d.%m.%Y в %H:%M')
-            messages.success(request, f'Собеседование запланировано на {formatted_date}')
-
-        except ValueError as e:
-            messages.error(request, f"Неверный формат даты: {str(e)}")
+        try:
+            interview, conflicts = run_write(create)
         except Exception as e:
             messages.error(request, f"Ошибка при планировании: {str(e)}")
+            return redirect('candidate_detail', candidate_id=candidate_id)
+
+        if conflicts:
+            slots = free_slots(duration, scheduled_date, [request.user.id], [candidate.id])
+            messages.error(request, _conflict_message(conflicts, slots))
+        else:
+            formatted_date = timezone.localtime(scheduled_date).strftime('%d.%m.%Y в %H:%M')
+            messages.success(request, f'Собеседование запланировано на {formatted_date}')
 
     return redirect('candidate_detail', candidate_id=candidate_id)
 
+
 @login_required
-def schedule_interview(request, candidate_id):
-    """Планирование собеседования"""
-    candidate = get_object_or_404(Candidate, id=candidate_id)
+@require_POST
+def reschedule_interview(request, interview_id):
+    """Перенос собеседования: те же проверки пересечений, без учета самого собеседования"""
+    interview = get_object_or_404(Interview, id=interview_id)
+    if interview.scheduled_by_id != request.user.id and getattr(request.user, 'role', '') not in ['manager', 'admin']:
+        messages.error(request, "Переносить собеседование может только тот, кто его запланировал")
+        return redirect('upcoming_interviews')
 
-    if request.method == 'POST':
-        interview_date = request.POST.get('interview_date')
-        interview_type = request.POST.get('interview_type')
-        notes = request.POST.get('notes', '')
+    try:
+        scheduled_date, duration = _parse_interview_form(request)
+    except ValueError as e:
+        messages.error(request, f"Неверные данные: {str(e)}")
+        return redirect('upcoming_interviews')
+
+    def reschedule():
+        lock_participants(interview.scheduled_by_id, interview.candidate_id)
+        conflicts = find_conflicts(scheduled_date, duration, interview.scheduled_by_id, interview.candidate_id,
+                                   exclude_id=interview.pk)
+        if not conflicts:
+            interview.scheduled_date = scheduled_date
+            interview.duration_minutes = duration
+            interview.reminder_sent = False
+            interview.save()
+        return conflicts
+
+    conflicts = run_write(reschedule)
+    if conflicts:
+        slots = free_slots(duration, scheduled_date, [interview.scheduled_by_id], [interview.candidate_id],
+                           exclude_id=interview.pk)
+        messages.error(request, _conflict_message(conflicts, slots))
+    else:
+        messages.success(request, f"Собеседование перенесено на {timezone.localtime(scheduled_date):%d.%m.%Y в %H:%M}")
+    return redirect('upcoming_interviews')
 
-        if not interview_date or not interview_type:
-            messages.error(request, "Заполните все обязательные поля")
-            return redirect('candidate_detail', candidate_id=candidate_id)
 
-        try:
-            # Создаем запись о собеседовании
-            from .models import Interview
-            interview = Interview.objects.create(
-                candidate=candidate,
-                scheduled_date=interview_date,
-                interview_type=interview_type,
-                notes=notes,
-                scheduled_by=request.user,
-                status='scheduled'
-            )
+@login_required
+def interview_common_slots(request):
+    """Ближайшее общее свободное время для нескольких интервьюеров (JSON)"""
+    try:
+        interviewer_ids = [int(value) for value in request.GET.getlist('interviewers')]
+        candidate_ids = [int(value) for value in request.GET.getlist('candidates')]
+        duration = int(request.GET.get('duration', 60))
+        count = min(int(request.GET.get('count', 3)), 20)
+        after = (timezone.make_aware(datetime.datetime.fromisoformat(request.GET['after']))
+                 if request.GET.get('after') else timezone.now())
+    except ValueError:
+        return JsonResponse({'error': 'Некорректные параметры'}, status=400)
+    if not interviewer_ids or not 5 <= duration <= Interview.MAX_DURATION_MINUTES:
+        return JsonResponse({'error': 'Укажите интервьюеров и длительность'}, status=400)
+
+    slots = free_slots(duration, after, interviewer_ids, candidate_ids, count=count)
+    return JsonResponse({
+        'duration': duration,
+        'slots': [timezone.localtime(slot).isoformat() for slot in slots],
+    })
 
-            messages.success(request, f'Собеседование запланировано на {interview_date}')
 
-        except Exception as e:
-            messages.error(request, f"Ошибка при планировании: {str(e)}")
+@login_required
+@read_from_replica
+def upcoming_interviews(request):
+    """Предстоящие собеседования: на этой неделе и позже"""
+    now = timezone.now()
+    _, week_end = day_bounds(week_start(timezone.localdate()), 7)
+    _, feed_end = feed_window()
+
+    # Менеджеры и админы видят собеседования всей команды, рекрутеры - свои
+    interviewers = None
+    if getattr(request.user, 'role', '') not in ['manager', 'admin']:
+        interviewers = [request.user.id]
+
+    return render(request, 'candidates/upcoming_interviews.html', {
+        'upcoming_interviews': interviews_in_window(now, week_end, interviewers).filter(status='scheduled'),
+        'later_interviews': interviews_in_window(week_end, feed_end, interviewers).filter(status='scheduled')[:100],
+    })
 
-    return redirect('candidate_detail', candidate_id=candidate_id)
 
+@login_required
+@read_from_replica
+def interview_calendar(request):
+    """Календарь собеседований на неделю: свой или всей команды"""
+    can_see_team = getattr(request.user, 'role', '') in ['manager', 'admin']
 
-# candidates/management/commands/send_interview_reminders.py
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
-from candidates.models import Interview
-import datetime
+    try:
+        start_day = datetime.date.fromisoformat(request.GET.get('start', ''))
+    except ValueError:
+        start_day = timezone.localdate()
+    start_day = week_start(start_day)
+
+    interviewer = request.GET.get('interviewer', '')
+    if not can_see_team:
+        interviewers = [request.user.id]
+    elif interviewer.isdigit():
+        interviewers = [int(interviewer)]
+    elif interviewer == 'me':
+        interviewers = [request.user.id]
+    else:
+        interviewers = None
+
+    start, end = day_bounds(start_day, 7)
+    days = [{'date': start_day + datetime.timedelta(days=offset), 'interviews': []} for offset in range(7)]
+    for interview in interviews_in_window(start, end, interviewers):
+        days[(timezone.localtime(interview.scheduled_date).date() - start_day).days]['interviews'].append(interview)
+
+    return render(request, 'candidates/interview_calendar.html', {
+        'days': days,
+        'start_day': start_day,
+        'previous_week': start_day - datetime.timedelta(days=7),
+        'next_week': start_day + datetime.timedelta(days=7),
+        'can_see_team': can_see_team,
+        'interviewer': interviewer,
+        'interviewers': get_user_model().objects.filter(
+            role__in=['recruiter', 'manager', 'admin']
+        ).order_by('username') if can_see_team else [],
+        'feed_url': request.build_absolute_uri(reverse('interview_feed', args=[feed_token(request.user)])),
+    })
 
 
-class Command(BaseCommand):
-    help = 'Отправляет напоминания о предстоящих собеседованиях'
+@login_required
+@require_POST
+def interview_feed_reset(request):
+    """Новая ссылка на ленту .ics; прежняя перестает работать"""
+    run_write(reset_feed_key, request.user)
+    messages.success(request, "Ссылка на календарь заменена. Обновите подписку в календаре")
+    return redirect('interview_calendar')
+
+
+def _feed_user_id(request, token):
+    # Токен проверяется и для ETag, и для ленты - запрос к БД один
+    if not hasattr(request, 'feed_user_id'):
+        request.feed_user_id = user_id_from_token(token)
+    return request.feed_user_id
+
+
+def _interview_feed_etag(request, token):
+    user_id = _feed_user_id(request, token)
+    return feed_etag(user_id) if user_id is not None else None
+
+
+@condition(etag_func=_interview_feed_etag)
+def interview_feed(request, token):
+    """Лента .ics собеседований пользователя для подписки в календаре.
+
+    Доступ по подписанному токену из ссылки; токен отозванный или выданный
+    отключенному пользователю - 404. Клиент, приславший If-None-Match,
+    получает 304 без чтения собеседований, если ничего не изменилось.
+    """
+    user_id = _feed_user_id(request, token)
+    if user_id is None:
+        raise Http404("Календарь не найден")
+
+    response = StreamingHttpResponse(iter_feed(user_id, request.get_host()),
+                                     content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="interviews.ics"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    def handle(self, *args, **options):
-        now = timezone.now()
-        reminder_time = now + datetime.timedelta(hours=24)  # Напоминание за 24 часа
 
-        # Находим собеседования, которые будут через 24 часа и напоминание еще не отправлено
-        upcoming_interviews = Interview.objects.filter(
-            scheduled_date__lte=reminder_time,
-            scheduled_date__gt=now,
-            status='scheduled',
-            reminder_sent=False
-        )
+@role_required(['manager', 'admin'])
+def duplicate_queue(request):
+    """Очередь возможных дубликатов кандидатов"""
+    pairs = (
+        DuplicateCandidate.objects.filter(status='pending')
+        .select_related('candidate', 'duplicate')
+        .order_by('-score', 'id')
+    )
+    paginator = Paginator(pairs, 20)
+    return render(request, 'candidates/duplicate_queue.html', {
+        'pairs': paginator.get_page(request.GET.get('page')),
+    })
 
-        for interview in upcoming_interviews:
-            try:
-                # Отправляем email напоминание
-                subject = f'Напоминание: Собеседование с {interview.candidate}'
-                message = f'''
-Здравствуйте!
-
-Напоминаем о запланированном собеседовании:
-
-Кандидат: {interview.candidate.last_name} {interview.candidate.first_name} {interview.candidate.patronymic}
-Должность: {interview.candidate.specialization or "Не указана"}
-Дата и время: {interview.scheduled_date.strftime("%d.%m.%Y в %H:%M")}
-Тип собеседования: {interview.get_interview_type_display()}
-Заметки: {interview.notes or "Нет дополнительной информации"}
-
-С уважением,
-HR System
-                '''
-
-                # Отправляем email рекрутеру
-                if interview.scheduled_by.email:
-                    send_mail(
-                        subject,
-                        message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [interview.scheduled_by.email],
-                        fail_silently=False,
-                    )
-
-                # Помечаем, что напоминание отправлено
-                interview.reminder_sent = True
-                interview.reminder_date = now
-                interview.save()
-
-                self.stdout.write(
-                    self.style.SUCCESS(f'Напоминание отправлено для собеседования с {interview.candidate}')
-                )
 
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Ошибка при отправке напоминания: {e}')
-                )
\ No newline at end of file
+@role_required(['manager', 'admin'])
+@require_POST
+def duplicate_resolve(request, pair_id):
+    """Слияние пары (keep - id основной записи) или отметка «не дубликаты»"""
+    pair = get_object_or_404(DuplicateCandidate, id=pair_id, status='pending')
+
+    if request.POST.get('action') == 'dismiss':
+        run_write(dismiss_pair, pair, request.user)
+        messages.info(request, "Пара отмечена как разные кандидаты")
+        return redirect('duplicate_queue')
+
+    keep_id = request.POST.get('keep')
+    if keep_id not in (str(pair.candidate_id), str(pair.duplicate_id)):
+        messages.error(request, "Выберите основную запись")
+        return redirect('duplicate_queue')
+
+    keep = pair.candidate if keep_id == str(pair.candidate_id) else pair.duplicate
+    keep = run_write(merge_candidates, pair, keep, request.user)
+    messages.success(request, f"Кандидаты объединены: {keep}")
+    return redirect('duplicate_queue')
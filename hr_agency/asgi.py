@@ -11,6 +11,8 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+# DJANGO_ENV=production включает продакшен-профиль настроек
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings_production'
+                      if os.environ.get('DJANGO_ENV') == 'production' else 'hr_agency.settings')
 
 application = get_asgi_application()
@@ -0,0 +1,59 @@
+import contextvars
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+# Кто выполняет действие - для журналов изменений.
+# В запросе это текущий пользователь (запоминается middleware, пользователь
+# достается из запроса только при записи в журнал), в командах - acting_as().
+
+_request = contextvars.ContextVar('audit_request', default=None)
+_actor = contextvars.ContextVar('audit_actor', default=None)
+
+
+def get_current_actor():
+    """Пользователь, выполняющий действие, или None"""
+    actor = _actor.get()
+    if actor is not None:
+        return actor
+    request = _request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    return None
+
+
+@contextmanager
+def acting_as(user):
+    token = _actor.set(user)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+class CurrentUserMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# Версии объектов для кэширования фрагментов шаблонов.
+# Ключ фрагмента строится из updated_at объекта и счетчика связанных изменений
+# (навыки, отклики, собеседования), который увеличивается сигналами.
+
+def _version_key(label, pk=None):
+    if pk is None:
+        return f'version:{label}'
+    return f'version:{label}:{pk}'
+
+
+def get_version(label, pk=None):
+    """Текущая версия связанных данных объекта (или всей коллекции, если pk не указан)"""
+    key = _version_key(label, pk)
+    version = cache.get(key)
+    if version is None:
+        # Начальное значение - время, чтобы после вытеснения ключа
+        # не совпасть со старыми фрагментами
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(label, pk=None):
+    """Сбрасывает закэшированные фрагменты объекта"""
+    cache.set(_version_key(label, pk), time.time_ns(), timeout=None)
+
+
+def bump_versions(label, pks):
+    """Сброс фрагментов нескольких объектов одним обращением к кэшу"""
+    stamp = time.time_ns()
+    cache.set_many({_version_key(label, pk): stamp for pk in pks}, timeout=None)
+
+
+def object_version(obj, label):
+    """Версия объекта для ключа фрагмента: updated_at + счетчик связанных изменений"""
+    updated_at = getattr(obj, 'updated_at', None)
+    stamp = int(updated_at.timestamp() * 1000000) if updated_at else 0
+    return f'{stamp}.{get_version(label, obj.pk)}'
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60)
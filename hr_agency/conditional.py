@@ -0,0 +1,55 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+# Условные GET-запросы для часто обновляемых страниц.
+# ETag строится из дешевых отпечатков данных (число строк, последнее изменение,
+# версии объектов из hr_agency/cache.py), пользователя и адреса страницы.
+# Совпал с If-None-Match - ответ 304 без запросов страницы и рендера шаблона.
+
+
+def queryset_fingerprint(queryset, field='updated_at'):
+    """Число строк, последнее изменение и наибольший id - одним запросом"""
+    data = queryset.order_by().aggregate(count=Count('id'), changed=Max(field), last_id=Max('id'))
+    changed = int(data['changed'].timestamp() * 1000000) if data['changed'] else 0
+    return f"{data['count']}.{changed}.{data['last_id']}"
+
+
+def page_etag(request, *parts):
+    """ETag страницы для пользователя. None - отвечать без 304: есть непоказанные
+    сообщения, которые выводятся только при рендере"""
+    if len(get_messages(request)):
+        return None
+    user = request.user
+    raw = '|'.join(str(part) for part in (
+        user.pk, getattr(user, 'role', ''),
+        # В формах страницы - CSRF-токен, после смены cookie нужна свежая страница
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(), *parts,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def conditional_page(etag_func):
+    """condition(etag_func=...) для страниц пользователя: ответ зависит от сессии
+    (Vary: Cookie), браузер перепроверяет его при каждом открытии"""
+
+    def decorator(view_func):
+        conditional = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            patch_vary_headers(response, ['Cookie'])
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,253 @@
+import math
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Кэш дорогих страниц (статистика, панели, список вакансий).
+# Два уровня: LRU в памяти процесса с коротким временем жизни перед общим кэшем
+# CACHES[PAGE_CACHE_ALIAS] - в продакшене Redis или файловый кэш, в разработке память
+# процесса. Значение хранится вместе со сроком и временем, которое заняло вычисление:
+#  - раннее обновление (XFetch): чем ближе срок и дороже вычисление, тем вероятнее,
+#    что запрос пересчитает значение заранее - у воркеров оно не истекает одновременно;
+#  - один пересчет: считает тот, кто взял блокировку в общем кэше (cache.add), потоки
+#    процесса - по очереди; остальные отдают прежнее значение или ждут нового.
+#    Поэтому в общем кэше значение живет дольше своего срока (PAGE_CACHE_STALE_TIMEOUT);
+#  - счетчики попаданий и промахов копятся в процессе и периодически прибавляются
+#    к общим (cache_stats).
+# Значения из памяти процесса не копируются - изменять их нельзя.
+
+# Обращение - попадание (local_hits, shared_hits), промах, истекшее значение или раннее обновление;
+# остальные счетчики - чем закончились промахи и обновления
+METRICS = ('local_hits', 'shared_hits', 'misses', 'expired', 'early_refreshes', 'stale', 'waits', 'computes')
+
+LOCK_POLL_INTERVAL = 0.05
+# Блокировки пересчета в процессе: ключей много (фильтры списков), блокировок - фиксированное число
+KEY_LOCKS = 64
+
+
+def _metric_key(name):
+    return f'page-cache:metrics:{name}'
+
+
+class TieredCache:
+
+    def __init__(self, alias, local_entries, local_timeout, stale_timeout, lock_timeout, beta,
+                 metrics_interval):
+        self.shared = caches[alias]
+        self.local_entries = local_entries
+        self.local_timeout = local_timeout
+        self.stale_timeout = stale_timeout
+        self.lock_timeout = lock_timeout
+        self.beta = beta
+        self.metrics_interval = metrics_interval
+        # ключ -> (запись, до какого времени ее можно брать из памяти)
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCKS)]
+        self._counts = dict.fromkeys(METRICS, 0)
+        self._flushed_at = time.monotonic()
+
+    # Уровни кэша. Запись - (значение, время вычисления в сек, срок по time.time())
+
+    def _get_local(self, key, now):
+        if not self.local_entries:
+            return None
+        with self._local_lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            if item[1] <= now:
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return item[0]
+
+    def _set_local(self, key, entry, now):
+        if not self.local_entries:
+            return
+        with self._local_lock:
+            self._local[key] = (entry, min(now + self.local_timeout, entry[2]))
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_entries:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, key, now):
+        entry = self.shared.get(key)
+        if entry is not None:
+            self._set_local(key, entry, now)
+        return entry
+
+    def _store(self, key, compute, timeout):
+        started = time.monotonic()
+        value = compute()
+        entry = (value, time.monotonic() - started, time.time() + timeout)
+        self.shared.set(key, entry, timeout + self.stale_timeout)
+        self._set_local(key, entry, time.time())
+        self._count('computes')
+        return value
+
+    def _should_refresh(self, entry, now):
+        """XFetch: истекшая запись - всегда, свежая - с вероятностью, растущей к сроку"""
+        _, delta, expires = entry
+        return now - delta * self.beta * math.log(1.0 - random.random()) >= expires
+
+    # Чтение
+
+    def get_or_compute(self, key, compute, timeout):
+        now = time.time()
+        entry = self._get_local(key, now)
+        if entry is not None and not self._should_refresh(entry, now):
+            self._count('local_hits')
+            return entry[0]
+        if entry is None:
+            entry = self._get_shared(key, now)
+            if entry is not None and not self._should_refresh(entry, now):
+                self._count('shared_hits')
+                return entry[0]
+        return self._refresh(key, compute, timeout, entry)
+
+    def _refresh(self, key, compute, timeout, entry):
+        if entry is None:
+            self._count('misses')
+        elif entry[2] > time.time():
+            self._count('early_refreshes')
+        else:
+            self._count('expired')
+
+        key_lock = self._key_locks[hash(key) % KEY_LOCKS]
+        if not key_lock.acquire(blocking=entry is None):
+            # Значение уже пересчитывает другой поток процесса
+            return self._stale(entry)
+        try:
+            # Пока ждали, значение могли обновить другой поток или воркер
+            current = self._updated(key, entry)
+            if current is not None:
+                return current[0]
+
+            lock_key = f'{key}:lock'
+            token = secrets.token_hex(8)
+            if self.shared.add(lock_key, token, self.lock_timeout):
+                try:
+                    # Воркер, державший блокировку, мог сохранить значение и отпустить ее
+                    # между проверкой выше и add
+                    current = self._updated(key, entry)
+                    if current is not None:
+                        return current[0]
+                    return self._store(key, compute, timeout)
+                finally:
+                    if self.shared.get(lock_key) == token:
+                        self.shared.delete(lock_key)
+
+            # Пересчитывает другой воркер
+            if entry is not None:
+                return self._stale(entry)
+            return self._wait(key, lock_key, compute, timeout)
+        finally:
+            key_lock.release()
+
+    def _updated(self, key, entry):
+        """Свежая запись общего кэша, новее entry, или None"""
+        now = time.time()
+        current = self.shared.get(key)
+        if current is not None and current[2] > now and (entry is None or current[2] > entry[2]):
+            self._set_local(key, current, now)
+            return current
+        return None
+
+    def _stale(self, entry):
+        self._count('stale')
+        return entry[0]
+
+    def _wait(self, key, lock_key, compute, timeout):
+        """Ждет значение от воркера с блокировкой; не дождался за lock_timeout - считает сам"""
+        self._count('waits')
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            now = time.time()
+            entry = self.shared.get(key)
+            if entry is not None and entry[2] > now:
+                self._set_local(key, entry, now)
+                return entry[0]
+            if self.shared.get(lock_key) is None:
+                break
+        return self._store(key, compute, timeout)
+
+    # Счетчики
+
+    def _count(self, name):
+        flush = False
+        with self._local_lock:
+            self._counts[name] += 1
+            if time.monotonic() - self._flushed_at >= self.metrics_interval:
+                counts, self._counts = self._counts, dict.fromkeys(METRICS, 0)
+                self._flushed_at = time.monotonic()
+                flush = True
+        if flush:
+            self._flush(counts)
+
+    def _flush(self, counts):
+        for name, value in counts.items():
+            if not value:
+                continue
+            key = _metric_key(name)
+            # add создает счетчик, если его нет; incr в Redis атомарен
+            if not self.shared.add(key, value, timeout=None):
+                try:
+                    self.shared.incr(key, value)
+                except ValueError:
+                    self.shared.set(key, value, timeout=None)
+
+    def metrics(self):
+        """Общие счетчики (всех процессов) вместе с еще не сброшенными счетчиками этого процесса"""
+        totals = self.shared.get_many([_metric_key(name) for name in METRICS])
+        with self._local_lock:
+            return {name: totals.get(_metric_key(name), 0) + self._counts[name] for name in METRICS}
+
+    def reset_metrics(self):
+        with self._local_lock:
+            self._counts = dict.fromkeys(METRICS, 0)
+        self.shared.delete_many([_metric_key(name) for name in METRICS])
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = TieredCache(
+                    settings.PAGE_CACHE_ALIAS,
+                    local_entries=settings.PAGE_CACHE_LOCAL_ENTRIES,
+                    local_timeout=settings.PAGE_CACHE_LOCAL_TIMEOUT,
+                    stale_timeout=settings.PAGE_CACHE_STALE_TIMEOUT,
+                    lock_timeout=settings.PAGE_CACHE_LOCK_TIMEOUT,
+                    beta=settings.PAGE_CACHE_BETA,
+                    metrics_interval=settings.PAGE_CACHE_METRICS_INTERVAL,
+                )
+    return _page_cache
+
+
+def cached(key, compute, timeout=None):
+    """Значение compute() из кэша страниц; timeout - срок свежести (сек)"""
+    return get_page_cache().get_or_compute(f'page:{key}', compute, timeout or settings.PAGE_CACHE_TIMEOUT)
+
+
+async def acached(key, compute, timeout=None):
+    """То же для асинхронных страниц: compute - корутинная функция без аргументов.
+    Обращения к кэшу и ожидание пересчета идут в отдельном потоке"""
+    return await sync_to_async(cached, thread_sensitive=False)(key, async_to_sync(compute), timeout)
+
+
+def page_cache_metrics():
+    return get_page_cache().metrics()
@@ -0,0 +1,48 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+
+# Одновременное выполнение независимых запросов для асинхронных страниц-отчетов.
+# Асинхронный ORM Django выполняет запросы по одному в общем потоке, поэтому
+# каждый запрос отдается отдельному потоку пула - со своим соединением с БД.
+# Пул общий для всех запросов страницы и событийных циклов (и под ASGI, и под WSGI),
+# соединения потоков живут по тем же правилам, что у запросов (CONN_MAX_AGE).
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.PARALLEL_QUERY_WORKERS,
+                                               thread_name_prefix='db-query')
+    return _executor
+
+
+def _run_query(func):
+    try:
+        return func()
+    finally:
+        for connection in connections.all(initialized_only=True):
+            connection.close_if_unusable_or_obsolete()
+
+
+async def gather_queries(**queries):
+    """Выполняет функции-запросы одновременно, возвращает {имя: результат}.
+    Функция должна вернуть готовые данные (число, словарь, список), а не ленивый queryset.
+    Контекст (чтение с реплики) переносится в потоки"""
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    futures = [
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run_query, func)
+        for func in queries.values()
+    ]
+    return dict(zip(queries, await asyncio.gather(*futures)))
@@ -0,0 +1,160 @@
+import contextvars
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.utils import DatabaseError
+
+
+# Маршрутизация чтения на реплики.
+# Чтение уходит на реплику только внутри read_from_replica / use_replica:
+# страницы-отчеты (списки, дашборды, статистика) и отчетные команды.
+# Все остальное, включая запись, работает с основной БД ('default').
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+# Пользователь недавно что-то записал - читаем только с основной БД
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+# В текущем запросе была запись
+_wrote = contextvars.ContextVar('wrote_to_primary', default=False)
+
+PIN_COOKIE = 'pin_primary'
+
+_counter = itertools.count()
+_health = {}  # alias -> (healthy, checked_at)
+_health_lock = threading.Lock()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+def _is_healthy(alias):
+    """Проверка реплики не чаще раза в REPLICA_HEALTH_INTERVAL секунд"""
+    now = time.monotonic()
+    healthy, checked_at = _health.get(alias, (True, None))
+    if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH_INTERVAL:
+        return healthy
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        healthy = True
+    except DatabaseError:
+        healthy = False
+    with _health_lock:
+        _health[alias] = (healthy, now)
+    return healthy
+
+
+def choose_replica():
+    """Следующая исправная реплика по кругу или None"""
+    aliases = replica_aliases()
+    if not aliases:
+        return None
+    start = next(_counter)
+    for offset in range(len(aliases)):
+        alias = aliases[(start + offset) % len(aliases)]
+        if _is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _pinned.get() and not _wrote.get():
+            return choose_replica() or 'default'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+@contextmanager
+def use_replica():
+    """Чтение с реплики внутри блока (для отчетных команд)"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Чтение только с основной БД внутри блока - для пересчетов, которые
+    читают и сразу пишут (устаревшее чтение с реплики исказило бы результат)"""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_from_replica(view_func):
+    """Декоратор для страниц, которые только читают данные (синхронных и асинхронных)"""
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            with use_replica():
+                return await view_func(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with use_replica():
+            return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes: после записи чтение пользователя на REPLICA_PIN_SECONDS
+    закрепляется за основной БД, пока реплики не догонят"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pin(self, response):
+        if _wrote.get() and replica_aliases():
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pinned_token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote_token = _wrote.set(False)
+        try:
+            return self._pin(self.get_response(request))
+        finally:
+            _pinned.reset(pinned_token)
+            _wrote.reset(wrote_token)
+
+    async def __acall__(self, request):
+        pinned_token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote_token = _wrote.set(False)
+        try:
+            return self._pin(await self.get_response(request))
+        finally:
+            _pinned.reset(pinned_token)
+            _wrote.reset(wrote_token)
@@ -34,15 +34,21 @@ INSTALLED_APPS = [
     'users',
     'candidates',
     'vacancies',
+    'api',
+    'jobs',
+    'outbox',
+    'notifications',
 ]
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'hr_agency.replicas.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hr_agency.audit.CurrentUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -70,12 +76,85 @@ WSGI_APPLICATION = 'hr_agency.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# По умолчанию SQLite. PostgreSQL включается переменной окружения POSTGRES_DB
+# (дополнительно POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT)
+
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # За PgBouncer в режиме transaction серверные курсоры нужно отключить
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS') == '1',
+            'OPTIONS': {},
+        }
     }
-}
+    # Пул соединений psycopg 3 (psycopg[pool]) - свой на каждый воркер.
+    # DB_POOL_MAX_SIZE подбирается так, чтобы воркеры * размер пула < max_connections
+    if os.environ.get('DB_POOL', '1') == '1':
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+    # Режим производительности SQLite (SQLITE_TUNED=0 отключает):
+    # WAL - читатели не блокируют писателя, BEGIN IMMEDIATE - транзакция сразу
+    # берет блокировку записи и ждет busy_timeout вместо ошибки "database is locked"
+    if os.environ.get('SQLITE_TUNED', '1') == '1':
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-64000;'  # 64 МБ
+                'PRAGMA mmap_size=268435456;'  # 256 МБ
+                'PRAGMA busy_timeout=20000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        }
+
+# Реплики для чтения: DB_REPLICAS - через запятую пути к файлам SQLite
+# или хосты PostgreSQL (host[:port]). Страницы-отчеты читают с реплик (hr_agency/replicas.py)
+for number, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    replica_config = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica_config['ENGINE'] == 'django.db.backends.sqlite3':
+        replica_config['NAME'] = replica.strip()
+    else:
+        host, _, port = replica.strip().partition(':')
+        replica_config['HOST'] = host
+        replica_config['PORT'] = port or replica_config['PORT']
+    DATABASES[f'replica{number}'] = replica_config
+
+DATABASE_ROUTERS = ['hr_agency.replicas.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает только с основной БД
+REPLICA_PIN_SECONDS = 10
+# Как часто проверять доступность реплики (сек)
+REPLICA_HEALTH_INTERVAL = 30
+
+# Очередь записи: изменения из разных потоков выполняются по очереди
+# одним потоком-писателем (только для SQLite, см. hr_agency/sqlite.py)
+SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE') == '1'
+
+# Потоки для одновременных запросов асинхронных дашбордов (hr_agency/parallel.py).
+# У каждого потока свое соединение с БД - учитывайте в DB_POOL_MAX_SIZE
+PARALLEL_QUERY_WORKERS = int(os.environ.get('PARALLEL_QUERY_WORKERS', 8))
+
+# Размер пачки при потоковой выборке (.iterator()) в экспорте и фоновых командах.
+# На PostgreSQL это серверный курсор, строки не загружаются в память целиком
+DB_ITERATOR_CHUNK_SIZE = 2000
 
 
 # Password validation
@@ -123,6 +202,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Указываем Django использовать нашу модель пользователя
 AUTH_USER_MODEL = 'users.User'
 
+# Пользователь сессии берется из кэша (см. users/backends.py)
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
+# Сессии читаются из кэша, запись идет и в кэш, и в БД
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Настройка bootstrap5
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -136,5 +221,120 @@ LOGIN_URL = 'login'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Закрытые файлы (PDF анкет с паспортными данными, ИНН, СНИЛС) - вне MEDIA_ROOT:
+# по адресу /media/ они недоступны, отдаются только представлениями с проверкой прав
+PRIVATE_FILES_ROOT = os.environ.get('DJANGO_PRIVATE_FILES_ROOT', os.path.join(BASE_DIR, 'private'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'private': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': PRIVATE_FILES_ROOT},
+    },
+}
+
 # Настройки для напоминаний
-INTERVIEW_REMINDER_HOURS = 24  # За сколько часов отправлять напоминание
\ No newline at end of file
+INTERVIEW_REMINDER_HOURS = 24  # За сколько часов отправлять напоминание
+
+# Кэш. В разработке - память процесса (заменяет общий кэш), в продакшене -
+# Redis или файловый кэш (settings_production.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hr-agency',
+    }
+}
+
+# Кэш дорогих страниц (hr_agency/page_cache.py): общий уровень - алиас из CACHES,
+# срок свежести (сек), сколько еще отдавать устаревшее значение, пока его пересчитывают (сек),
+# LRU в памяти процесса (записей и сек), блокировка пересчета (сек), коэффициент раннего
+# обновления (больше - раньше) и как часто прибавлять счетчики процесса к общим (сек)
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 60
+PAGE_CACHE_STALE_TIMEOUT = 5 * 60
+PAGE_CACHE_LOCAL_ENTRIES = 500
+PAGE_CACHE_LOCAL_TIMEOUT = 5
+PAGE_CACHE_LOCK_TIMEOUT = 30
+PAGE_CACHE_BETA = 1.0
+PAGE_CACHE_METRICS_INTERVAL = 10
+
+# Время жизни закэшированных фрагментов шаблонов (сек).
+# Фрагменты инвалидируются сигналами, таймаут - страховка
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Агрегаты воронки пересчитывает update_funnel_rollups по крону; если с пересчета
+# прошло больше (сек), страница аналитики предупреждает, что данные устарели
+FUNNEL_REFRESH_SECONDS = 5 * 60
+
+# Отклик считается зависшим, если столько дней не меняет статус
+STUCK_APPLICATION_DAYS = 14
+
+# Максимум объектов в одной массовой операции
+BULK_ACTION_LIMIT = 1000
+
+# JSON API: размер страницы по умолчанию и максимальный (?limit=)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+# Очередь фоновых задач (jobs/queue.py): процессов в run_workers, опрос очереди (сек),
+# таймаут задачи (сек), попыток, задержка перед первым повтором (сек, дальше удваивается)
+# и запас аренды сверх таймаута (сек)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = 1.0
+JOB_TIMEOUT = 600
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 30
+JOB_LEASE_GRACE = 60
+
+# Почта. Для проверки без SMTP: EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend
+# (или filebased с EMAIL_FILE_PATH), либо локальная заглушка SMTP на EMAIL_HOST:EMAIL_PORT
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS') == '1'
+EMAIL_TIMEOUT = 30
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'sent_emails'))
+
+# Исходящая очередь писем (outbox/dispatcher.py): писем в пачке (на одно соединение),
+# писем в секунду (0 - без ограничения), попыток до пометки "не доставлено",
+# задержка перед первым повтором (сек, дальше удваивается), аренда (сек; продлевается
+# перед отправкой каждого письма, должна быть больше EMAIL_TIMEOUT),
+# опрос очереди в send_outbox --loop (сек)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_RATE_LIMIT = float(os.environ.get('OUTBOX_RATE_LIMIT', 10))
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BACKOFF = 60
+OUTBOX_LEASE = 300
+OUTBOX_POLL_INTERVAL = 5.0
+
+# Уведомления о смене статусов (notifications/digest.py): события за это время (сек)
+# уходят адресату одним письмом; событий за один проход рассылки
+NOTIFICATION_DIGEST_DELAY = 5 * 60
+NOTIFICATION_DIGEST_BATCH = 1000
+
+# PDF-документы (candidates/documents.py): TTF-шрифты с кириллицей и число процессов
+# пакетной верстки (render_documents)
+PDF_FONT_PATH = os.environ.get('PDF_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+PDF_BOLD_FONT_PATH = os.environ.get('PDF_BOLD_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf')
+DOCUMENT_WORKERS = int(os.environ.get('DOCUMENT_WORKERS', os.cpu_count() or 2))
+
+# Календарь собеседований: окно ленты .ics (дней)
+CALENDAR_FEED_PAST_DAYS = 30
+CALENDAR_FEED_FUTURE_DAYS = 365
+
+# Поиск свободного времени для собеседований: рабочие часы (пн-пт), шаг слота (мин), горизонт (дней)
+INTERVIEW_WORKDAY_START = 9
+INTERVIEW_WORKDAY_END = 19
+INTERVIEW_SLOT_MINUTES = 30
+INTERVIEW_SLOT_SEARCH_DAYS = 14
+
+# Дубликаты кандидатов: минимальная оценка пары и максимальный размер блока сравнения
+DUPLICATE_SCORE_THRESHOLD = 0.7
+DUPLICATE_MAX_BLOCK = 50
@@ -0,0 +1,49 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+# Очередь записи для SQLite.
+# SQLite допускает одного писателя: при большом числе потоков, пишущих одновременно,
+# они конкурируют за блокировку и ждут busy_timeout. Очередь передает запись
+# единственному потоку-писателю, и транзакции выполняются строго по очереди.
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite-writer')
+    return _executor
+
+
+def _run_in_transaction(func, args, kwargs):
+    try:
+        with transaction.atomic():
+            return func(*args, **kwargs)
+    finally:
+        # Соединение потока-писателя остается открытым между задачами,
+        # но сломанное соединение нужно закрыть
+        connection.close_if_unusable_or_obsolete()
+
+
+def run_write(func, *args, **kwargs):
+    """Выполняет func в транзакции; при SQLITE_WRITE_QUEUE - в потоке-писателе.
+
+    Если вызывающий код уже внутри transaction.atomic(), запись выполняется
+    сразу: поток-писатель ждал бы блокировку, которую держит эта транзакция.
+    """
+    if (not settings.SQLITE_WRITE_QUEUE or connection.vendor != 'sqlite'
+            or connection.in_atomic_block):
+        with transaction.atomic():
+            return func(*args, **kwargs)
+    # Контекст (текущий пользователь, маршрутизация чтения) переносится в поток-писатель
+    context = contextvars.copy_context()
+    return _get_executor().submit(context.run, _run_in_transaction, func, args, kwargs).result()
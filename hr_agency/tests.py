@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .page_cache import TieredCache
+
+
+def tiered_cache(**options):
+    # Каждый экземпляр - отдельный процесс-воркер со своей памятью и блокировками;
+    # общий уровень - кэш default (память этого процесса)
+    options = {'local_entries': 0, 'local_timeout': 5, 'stale_timeout': 60, 'lock_timeout': 5, 'beta': 1.0,
+               'metrics_interval': 3600, **options}
+    return TieredCache('default', **options)
+
+
+class PageCacheSingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value='fresh', started=None, release=None):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            if started is not None:
+                started.set()
+            if release is not None:
+                release.wait(5)
+            else:
+                time.sleep(0.1)
+            return value
+        return compute
+
+    def run_threads(self, target, count):
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(target(i))) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        return results
+
+    def test_threads_of_one_process_compute_once(self):
+        page_cache = tiered_cache()
+
+        results = self.run_threads(lambda i: page_cache.get_or_compute('page:stats', self.compute(), 60), 8)
+
+        self.assertEqual(results, ['fresh'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_workers_wait_for_value_computed_by_lock_owner(self):
+        workers = [tiered_cache() for _ in range(4)]
+        results = self.run_threads(
+            lambda i: workers[i % 4].get_or_compute('page:stats', self.compute(), 60), 8
+        )
+
+        self.assertEqual(results, ['fresh'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_is_served_while_other_worker_recomputes(self):
+        owner, other = tiered_cache(), tiered_cache()
+        # Значение истекло, но еще лежит в общем кэше
+        cache.set('page:stats', ('stale', 0.1, time.time() - 1), 60)
+        started, release = threading.Event(), threading.Event()
+        refresh = threading.Thread(
+            target=owner.get_or_compute, args=('page:stats', self.compute(started=started, release=release), 60)
+        )
+        refresh.start()
+        started.wait(5)
+
+        value = other.get_or_compute('page:stats', self.compute(), 60)
+        release.set()
+        refresh.join(5)
+
+        self.assertEqual(value, 'stale')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(other.get_or_compute('page:stats', self.compute(), 60), 'fresh')
+        self.assertEqual(other.metrics()['stale'], 1)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from users import views as user_views
 from candidates import views as candidate_views
+from hr_agency import views as hr_views
 from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
@@ -12,13 +13,19 @@ urlpatterns = [
     path('candidates/', include('candidates.urls')),
     path('vacancies/', include('vacancies.urls')),
     path('users/', include('users.urls')),
+    path('api/', include('api.urls')),
+    path('jobs/', include('jobs.urls')),
     path('manager/dashboard/', candidate_views.manager_dashboard, name='manager_dashboard'),
     path('admin/dashboard/', candidate_views.admin_dashboard, name='admin_dashboard'),
+    path('statistics/', hr_views.statistics, name='statistics'),
+    path('statistics/trends/', hr_views.statistics_trends, name='statistics_trends'),
 
     # Аутентификация
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
+# Медиафайлы раздает Django только в режиме разработки,
+# в продакшене - веб-сервер
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,6 +1,14 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import Count, Q
+from .page_cache import acached
+from .parallel import gather_queries
+from .replicas import read_from_replica
 
 def home(request):
     """Главная страница"""
@@ -38,60 +46,76 @@ def home(request):
 
     return render(request, 'home.html', context)
 
+def statistics_queries():
+    """Независимые запросы страницы статистики: имя -> функция, возвращающая готовые данные"""
+    from candidates.models import Candidate, Application
+    from vacancies.models import SkillDemand, Vacancy
+    from vacancies.skill_demand import shortage_report
+
+    return {
+        'candidates_count': Candidate.objects.count,
+        # Счетчики по статусам - одним запросом на таблицу
+        'applications': lambda: Application.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            approved=Count('id', filter=Q(status='approved')),
+            rejected=Count('id', filter=Q(status='rejected')),
+        ),
+        'vacancies': lambda: Vacancy.objects.aggregate(
+            total=Count('id'),
+            open=Count('id', filter=Q(status='open')),
+            closed=Count('id', filter=Q(status='closed')),
+            draft=Count('id', filter=Q(status='draft')),
+        ),
+        # Самые популярные навыки - из предрассчитанной таблицы спроса
+        # (счетчики поддерживаются сигналами, см. vacancies/skill_demand.py)
+        'popular_skills': lambda: list(
+            SkillDemand.objects.select_related('skill').order_by('-candidates_count', 'skill__name')[:10]
+        ),
+        'shortage_skills': lambda: list(shortage_report()[:5]),
+        'recent_applications': lambda: list(
+            Application.objects.select_related('candidate', 'vacancy').order_by('-applied_date')[:5]
+        ),
+    }
+
+
 @login_required
-def statistics(request):
-    """Расширенная страница статистики"""
-    try:
-        from candidates.models import Candidate, Application
-        from vacancies.models import Vacancy, Skill
-
-        # Базовая статистика
-        candidates_count = Candidate.objects.count()
-        vacancies_count = Vacancy.objects.count()
-        responses_count = Application.objects.count()
-
-        # Статистика по статусам откликов
-        pending_responses = Application.objects.filter(status='pending').count()
-        approved_responses = Application.objects.filter(status='approved').count()
-        rejected_responses = Application.objects.filter(status='rejected').count()
-
-        # Самые популярные навыки
-        from django.db.models import Count
-        popular_skills = Skill.objects.annotate(
-            candidate_count=Count('candidate'),
-            vacancy_count=Count('vacancy')
-        ).order_by('-candidate_count')[:10]
-
-        # Статистика по вакансиям
-        open_vacancies = Vacancy.objects.filter(status='open').count()
-        closed_vacancies = Vacancy.objects.filter(status='closed').count()
-        draft_vacancies = Vacancy.objects.filter(status='draft').count()
-
-        # Последние отклики
-        recent_applications = Application.objects.select_related('candidate', 'vacancy').order_by('-applied_date')[:5]
-
-    except ImportError as e:
-        # Резервные значения при ошибках импорта
-        candidates_count = vacancies_count = responses_count = 0
-        pending_responses = approved_responses = rejected_responses = 0
-        popular_skills = []
-        open_vacancies = closed_vacancies = draft_vacancies = 0
-        recent_applications = []
-
-    return render(request, 'statistics.html', {
-        'candidates_count': candidates_count,
-        'vacancies_count': vacancies_count,
-        'responses_count': responses_count,
-        'pending_responses': pending_responses,
-        'approved_responses': approved_responses,
-        'rejected_responses': rejected_responses,
-        'popular_skills': popular_skills,
-        'open_vacancies': open_vacancies,
-        'closed_vacancies': closed_vacancies,
-        'draft_vacancies': draft_vacancies,
-        'recent_applications': recent_applications,
+@read_from_replica
+async def statistics(request):
+    """Расширенная страница статистики - запросы выполняются одновременно,
+    результат общий для всех пользователей и кэшируется (hr_agency/page_cache.py)"""
+    data = await acached('statistics', partial(gather_queries, **statistics_queries()))
+    applications = data['applications']
+    vacancies = data['vacancies']
+
+    return await sync_to_async(render)(request, 'statistics.html', {
+        'candidates_count': data['candidates_count'],
+        'vacancies_count': vacancies['total'],
+        'responses_count': applications['total'],
+        'pending_responses': applications['pending'],
+        'approved_responses': applications['approved'],
+        'rejected_responses': applications['rejected'],
+        'popular_skills': data['popular_skills'],
+        'shortage_skills': data['shortage_skills'],
+        'open_vacancies': vacancies['open'],
+        'closed_vacancies': vacancies['closed'],
+        'draft_vacancies': vacancies['draft'],
+        'recent_applications': data['recent_applications'],
     })
 
+@login_required
+@read_from_replica
+def statistics_trends(request):
+    """Данные для графиков статистики (JSON) - только из дневных срезов"""
+    from candidates.snapshots import trend_series
+
+    try:
+        days = min(max(int(request.GET.get('days', 90)), 1), 730)
+    except ValueError:
+        days = 90
+
+    return JsonResponse(trend_series(days))
+
 @login_required
 def profile(request):
     """Профиль пользователя"""
@@ -2,6 +2,8 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+# DJANGO_ENV=production включает продакшен-профиль настроек
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings_production'
+                      if os.environ.get('DJANGO_ENV') == 'production' else 'hr_agency.settings')
 
 application = get_wsgi_application()
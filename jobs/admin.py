@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'title', 'status', 'priority', 'attempts', 'progress', 'created_by', 'created_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'title']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'locked_by', 'locked_until']
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import run_pool, work, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Воркеры очереди фоновых задач: пул процессов, работающий до Ctrl+C / SIGTERM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS, help='Число процессов')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи в текущем процессе и выйти (для cron)')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = work(worker_id(), once=True)
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+            return
+        run_pool(options['workers'], log=self.stdout.write)
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import models
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди (см. jobs/queue.py)"""
+    STATUS_CHOICES = (
+        ('queued', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('succeeded', 'Выполнена'),
+        ('failed', 'Ошибка'),
+    )
+
+    task = models.CharField(max_length=200, verbose_name="Задача")
+    # В очереди не может быть двух задач с одним ключом (enqueue(unique_key=...))
+    unique_key = models.CharField(max_length=200, null=True, blank=True, verbose_name="Ключ единственности")
+    title = models.CharField(max_length=200, blank=True, verbose_name="Описание")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Параметры")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name="Статус")
+    priority = models.SmallIntegerField(default=0, verbose_name="Приоритет")
+
+    # Повторы: после ошибки задача снова встает в очередь с run_at в будущем
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="Максимум попыток")
+    run_at = models.DateTimeField(verbose_name="Выполнить не раньше")
+    timeout = models.PositiveIntegerField(verbose_name="Таймаут (сек)")
+
+    # Аренда: воркер владеет задачей до locked_until, потом ее может забрать другой
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Воркер")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Аренда до")
+
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Выполнено, %")
+    progress_message = models.CharField(max_length=200, blank=True, verbose_name="Этап")
+    result = models.JSONField(null=True, blank=True, verbose_name="Результат")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='jobs', verbose_name="Запустил")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начата")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ['-created_at']
+        indexes = [
+            # Выбор следующей задачи: статус, приоритет, время
+            models.Index(fields=['status', '-priority', 'run_at'], name='job_claim_idx'),
+            models.Index(fields=['created_by', '-created_at'], name='job_owner_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['unique_key'], condition=models.Q(status='queued'),
+                                    name='job_queued_unique_key'),
+        ]
+
+    def __str__(self):
+        return self.title or self.task
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def report_progress(self, percent, message=''):
+        """Прогресс для страницы задачи - сразу в БД, без сохранения остальных полей"""
+        self.progress = max(0, min(int(percent), 100))
+        self.progress_message = message[:200]
+        Job.objects.filter(id=self.id).update(progress=self.progress, progress_message=self.progress_message)
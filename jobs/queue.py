@@ -0,0 +1,181 @@
+import datetime
+import signal
+import threading
+import traceback
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+
+# Очередь фоновых задач в БД, без внешнего брокера.
+# Задача - функция, отмеченная @task; воркер вызывает ее с объектом Job первым
+# аргументом и параметрами из Job.kwargs (только JSON-совместимые значения).
+#
+# Воркер берет задачу в аренду до locked_until. На PostgreSQL следующая задача
+# выбирается SELECT ... FOR UPDATE SKIP LOCKED - воркеры не ждут друг друга.
+# SQLite так не умеет: задача захватывается условным UPDATE, который срабатывает
+# только для еще свободной задачи, при неудаче пробуется следующая.
+# Аренда истекла (воркер упал или завис) - задачу забирает другой воркер.
+
+_TASKS = {}
+
+# Сколько задач-кандидатов перебрать за один захват на SQLite
+CLAIM_CANDIDATES = 10
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу"""
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    _TASKS[func.task_name] = func
+    return func
+
+
+def get_task(name):
+    if name not in _TASKS:
+        # Задачи регистрируются при импорте своего модуля
+        import_module(name.rsplit('.', 1)[0])
+    return _TASKS[name]
+
+
+def enqueue(func, *, title='', user=None, priority=0, timeout=None, max_attempts=None, delay=0, unique_key=None,
+            **kwargs):
+    """Ставит задачу в очередь. Чем больше priority, тем раньше она будет выполнена.
+
+    unique_key - не больше одной ожидающей задачи с этим ключом (уникальный индекс,
+    без гонки между проверкой и вставкой): если такая уже в очереди, новая не ставится
+    и возвращается ожидающая (None, если ее только что забрал воркер).
+    """
+    job = Job(
+        task=func.task_name,
+        unique_key=unique_key,
+        title=title,
+        kwargs=kwargs,
+        priority=priority,
+        timeout=timeout or settings.JOB_TIMEOUT,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if unique_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return Job.objects.filter(unique_key=unique_key, status='queued').first()
+    return job
+
+
+def _ready_jobs(now):
+    return Job.objects.filter(
+        Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+    ).order_by('-priority', 'run_at', 'id')
+
+
+def _lease(job, now):
+    return now + datetime.timedelta(seconds=job.timeout + settings.JOB_LEASE_GRACE)
+
+
+def claim_job(worker_id):
+    """Следующая готовая задача, взятая в аренду этим воркером, или None"""
+    now = timezone.now()
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _ready_jobs(now).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status = 'running'
+            job.locked_by = worker_id
+            job.locked_until = _lease(job, now)
+            job.attempts += 1
+            job.started_at = now
+            job.save(update_fields=['status', 'locked_by', 'locked_until', 'attempts', 'started_at'])
+            return job
+
+    for job_id, timeout in _ready_jobs(now).values_list('id', 'timeout')[:CLAIM_CANDIDATES]:
+        claimed = _ready_jobs(now).filter(id=job_id).update(
+            status='running',
+            locked_by=worker_id,
+            locked_until=now + datetime.timedelta(seconds=timeout + settings.JOB_LEASE_GRACE),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+@contextmanager
+def _time_limit(seconds):
+    """Прерывает задачу по таймауту (SIGALRM - только Unix и главный поток;
+    иначе задачу освободит истечение аренды)"""
+    if not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum, frame):
+        raise JobTimeout(f'Задача выполнялась дольше {seconds} сек')
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _owned(job):
+    # Если аренда истекла и задачу забрал другой воркер, результат этого не записывается
+    return Job.objects.filter(id=job.id, status='running', locked_by=job.locked_by)
+
+
+def _finish_failed(job, error):
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        # Экспоненциальная задержка: 30 с, 60 с, 120 с...
+        delay = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        try:
+            with transaction.atomic():
+                _owned(job).update(status='queued', run_at=now + datetime.timedelta(seconds=delay),
+                                   locked_by='', locked_until=None, error=error)
+            return
+        except IntegrityError:
+            # В очереди уже есть задача с тем же unique_key - повтор не нужен, работу сделает она
+            pass
+    _owned(job).update(status='failed', finished_at=now, locked_by='', locked_until=None, error=error)
+
+
+def run_job(job):
+    """Выполняет взятую в аренду задачу и записывает результат или ошибку"""
+    if job.attempts > job.max_attempts:
+        # Аренда истекала на каждой попытке - воркер падает на этой задаче
+        _finish_failed(job, job.error or 'Воркер не завершил задачу за отведенное время')
+        return
+    try:
+        func = get_task(job.task)
+    except (ImportError, KeyError):
+        job.attempts = job.max_attempts
+        _finish_failed(job, f'Неизвестная задача: {job.task}')
+        return
+
+    try:
+        with _time_limit(job.timeout):
+            result = func(job, **job.kwargs)
+    except Exception:
+        _finish_failed(job, traceback.format_exc())
+    else:
+        _owned(job).update(status='succeeded', result=result, progress=100, finished_at=timezone.now(),
+                           locked_by='', locked_until=None, error='')
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim_job, enqueue, run_job, task
+
+
+@task
+def failing_task(job):
+    raise RuntimeError('Ошибка задачи')
+
+
+class UniqueJobTests(TestCase):
+
+    def test_unique_key_keeps_one_queued_job(self):
+        first = enqueue(failing_task, unique_key='failing')
+        second = enqueue(failing_task, unique_key='failing')
+
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_retry_is_dropped_when_same_key_is_queued(self):
+        enqueue(failing_task, unique_key='failing', max_attempts=3)
+        job = claim_job('test-worker')
+        queued = enqueue(failing_task, unique_key='failing', delay=60)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(list(Job.objects.filter(status='queued')), [queued])
+
+    def test_failed_job_is_retried(self):
+        enqueue(failing_task, unique_key='failing', max_attempts=3)
+        job = claim_job('test-worker')
+
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_at, timezone.now())
@@ -0,0 +1,61 @@
+import os
+
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+
+from .models import Job
+
+
+def _visible_jobs(user):
+    """Администраторы видят все задачи, остальные - свои"""
+    jobs = Job.objects.select_related('created_by')
+    if getattr(user, 'role', '') != 'admin':
+        jobs = jobs.filter(created_by=user)
+    return jobs
+
+
+@login_required
+def job_list(request):
+    """Фоновые задачи пользователя"""
+    paginator = Paginator(_visible_jobs(request.user).order_by('-created_at'), 20)
+    return render(request, 'jobs/job_list.html', {
+        'jobs': paginator.get_page(request.GET.get('page')),
+    })
+
+
+@login_required
+def job_detail(request, job_id):
+    """Страница задачи: прогресс обновляется запросами к job_status"""
+    return render(request, 'jobs/job_detail.html', {
+        'job': get_object_or_404(_visible_jobs(request.user), id=job_id),
+    })
+
+
+@login_required
+def job_status(request, job_id):
+    job = get_object_or_404(_visible_jobs(request.user), id=job_id)
+    return JsonResponse({
+        'id': job.id,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'progress_message': job.progress_message,
+        'attempts': job.attempts,
+        'finished': job.is_finished,
+        'has_file': bool(job.result and job.result.get('file')),
+        'error': job.error.strip().splitlines()[-1] if job.status == 'failed' and job.error else '',
+    })
+
+
+@login_required
+def job_download(request, job_id):
+    """Файл - результат задачи (например, выгрузка). Отдается только владельцу задачи"""
+    job = get_object_or_404(_visible_jobs(request.user), id=job_id, status='succeeded')
+    name = (job.result or {}).get('file')
+    if not name or not default_storage.exists(name):
+        raise Http404("Файл не найден")
+    return FileResponse(default_storage.open(name, 'rb'), as_attachment=True,
+                        filename=(job.result.get('filename') or os.path.basename(name)))
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+
+# Воркеры очереди задач (jobs/queue.py).
+# run_pool запускает несколько процессов и перезапускает упавшие; каждый процесс
+# по очереди берет задачи из БД. Модели импортируются внутри функций: при запуске
+# процесса методом spawn (Windows, macOS) Django настраивается уже в нем.
+
+
+def work(worker_id, stop_event=None, once=False):
+    """Цикл воркера. once=True - выполнить готовые задачи и выйти. Возвращает число задач"""
+    from django.conf import settings
+    from django.db import close_old_connections
+    from .queue import claim_job, run_job
+
+    done = 0
+    while stop_event is None or not stop_event.is_set():
+        job = claim_job(worker_id)
+        if job is None:
+            if once:
+                break
+            close_old_connections()
+            if stop_event is not None:
+                stop_event.wait(settings.JOB_POLL_INTERVAL)
+            else:
+                time.sleep(settings.JOB_POLL_INTERVAL)
+            continue
+        try:
+            run_job(job)
+        finally:
+            # Соединение могло сломаться, если задачу прервал таймаут
+            close_old_connections()
+        done += 1
+    return done
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _process_main(stop_event):
+    import django
+
+    django.setup()
+    # Ctrl+C получает вся группа процессов - останавливает воркеры родитель через stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(worker_id(), stop_event)
+
+
+def run_pool(workers, log=print):
+    """Пул процессов-воркеров до Ctrl+C / SIGTERM. Текущие задачи дорабатываются"""
+    from django.db import connections
+
+    context = multiprocessing.get_context()
+    stop_event = context.Event()
+    # Соединение родителя не должно достаться дочерним процессам при fork
+    connections.close_all()
+
+    def start():
+        process = context.Process(target=_process_main, args=(stop_event,), daemon=False)
+        process.start()
+        log(f'Запущен воркер {process.pid}')
+        return process
+
+    def request_stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    processes = [start() for _ in range(workers)]
+    try:
+        while not stop_event.is_set():
+            time.sleep(1)
+            for index, process in enumerate(processes):
+                if not process.is_alive() and not stop_event.is_set():
+                    log(f'Воркер {process.pid} завершился (код {process.exitcode}), перезапуск')
+                    processes[index] = start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        log('Остановка: ожидание текущих задач')
+        for process in processes:
+            process.join()
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings')
+    # DJANGO_ENV=production включает продакшен-профиль настроек
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_agency.settings_production'
+                          if os.environ.get('DJANGO_ENV') == 'production' else 'hr_agency.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import NotificationEvent
+
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'application', 'interview', 'actor', 'created_at', 'processed_at']
+    list_filter = ['event']
+    list_select_related = ['application__candidate', 'application__vacancy', 'interview__candidate', 'actor']
+    raw_id_fields = ['application', 'interview', 'actor']
+    readonly_fields = ['created_at', 'processed_at']
@@ -0,0 +1,105 @@
+import functools
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone, translation
+
+from jobs.queue import enqueue, task
+from outbox.mail import queue_email
+from .models import NotificationEvent
+
+
+# Рассылка уведомлений дайджестами: фоновая задача собирает все неразосланные
+# события, определяет адресатов и ставит в исходящую очередь одно письмо на
+# адресата. Текст события рендерится один раз, сколько бы адресатов его ни получили.
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    # Скомпилированный шаблон на весь процесс воркера; язык подставляется при рендеринге
+    return get_template(name)
+
+
+def render_event(event):
+    return _template(f'notifications/{event.event}.txt').render({
+        'event': event,
+        'application': event.application,
+        'interview': event.interview,
+    }).strip()
+
+
+def _recipient_ids(events):
+    """Адресаты каждого события: автор и рекрутер вакансии, ответственный за кандидата.
+    Автору изменения о нем не пишем"""
+    candidates = {event.id: (event.application or event.interview).candidate for event in events}
+    by_username = dict(get_user_model().objects.filter(
+        username__in={candidate.assigned_recruiter for candidate in candidates.values() if candidate.assigned_recruiter}
+    ).values_list('username', 'id'))
+
+    recipients = {}
+    for event in events:
+        ids = {by_username.get(candidates[event.id].assigned_recruiter)}
+        if event.application_id:
+            ids |= {event.application.vacancy.created_by_id, event.application.vacancy.assigned_recruiter_id}
+        recipients[event.id] = ids - {None, event.actor_id}
+    return recipients
+
+
+@task
+def send_notification_digests(job):
+    """Письмо каждому адресату со всеми его новыми событиями"""
+    events_count = emails_count = 0
+    with translation.override(settings.LANGUAGE_CODE):
+        while True:
+            events = list(
+                NotificationEvent.objects.filter(processed_at__isnull=True)
+                .select_related('actor', 'application__candidate', 'application__vacancy', 'interview__candidate')
+                .order_by('id')[:settings.NOTIFICATION_DIGEST_BATCH]
+            )
+            if not events:
+                break
+            recipients = _recipient_ids(events)
+            users = get_user_model().objects.filter(
+                id__in=set().union(*recipients.values()), is_active=True
+            ).exclude(email='').in_bulk()
+
+            texts = {}
+            digests = defaultdict(list)
+            for event in events:
+                for user_id in recipients[event.id] & users.keys():
+                    if event.id not in texts:
+                        texts[event.id] = render_event(event)
+                    digests[user_id].append(event)
+
+            # Письма и отметка о рассылке - в одной транзакции; ключ не даст
+            # поставить тот же дайджест дважды, если задачи пересеклись
+            with transaction.atomic():
+                for user_id, user_events in digests.items():
+                    user = users[user_id]
+                    queue_email(
+                        f'HR System: новых событий - {len(user_events)}',
+                        _template('notifications/digest.txt').render({
+                            'user': user,
+                            'items': [texts[event.id] for event in user_events],
+                        }),
+                        [user.email],
+                        key=f'notification-digest:{user_id}:{user_events[0].id}',
+                    )
+                NotificationEvent.objects.filter(
+                    id__in=[event.id for event in events], processed_at__isnull=True
+                ).update(processed_at=timezone.now())
+
+            events_count += len(events)
+            emails_count += len(digests)
+    return {'events': events_count, 'emails': emails_count}
+
+
+def schedule_digest():
+    """Одна отложенная рассылка на все события за NOTIFICATION_DIGEST_DELAY секунд.
+    Место в очереди занимается атомарно (unique_key): одновременные коммиты не ставят
+    несколько рассылок, которые собрали бы дайджесты из разных пачек событий"""
+    enqueue(send_notification_digests, title='Рассылка уведомлений', delay=settings.NOTIFICATION_DIGEST_DELAY,
+            unique_key=send_notification_digests.task_name)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('candidates', '0017_phone_normalized'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('application_approved', 'Отклик одобрен'), ('application_rejected', 'Отклик отклонен'), ('interview_scheduled', 'Назначено собеседование')], max_length=50, verbose_name='Событие')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Разослано')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто изменил')),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='candidates.application', verbose_name='Отклик')),
+                ('interview', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='candidates.interview', verbose_name='Собеседование')),
+            ],
+            options={
+                'verbose_name': 'Событие для уведомления',
+                'verbose_name_plural': 'События для уведомлений',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import models
+
+
+class NotificationEvent(models.Model):
+    """Событие, о котором нужно уведомить сотрудников. Записывается в транзакции
+    изменения, адресаты определяются и письма собираются в фоне (notifications/digest.py)"""
+    EVENT_CHOICES = (
+        ('application_approved', 'Отклик одобрен'),
+        ('application_rejected', 'Отклик отклонен'),
+        ('interview_scheduled', 'Назначено собеседование'),
+    )
+
+    event = models.CharField(max_length=50, choices=EVENT_CHOICES, verbose_name="Событие")
+    application = models.ForeignKey('candidates.Application', on_delete=models.CASCADE, null=True, blank=True,
+                                    related_name='notification_events', verbose_name="Отклик")
+    interview = models.ForeignKey('candidates.Interview', on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name='notification_events', verbose_name="Собеседование")
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='+', verbose_name="Кто изменил")
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Время, когда событие попало в письма адресатам; пусто - еще не разослано
+    processed_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name="Разослано")
+
+    class Meta:
+        verbose_name = "Событие для уведомления"
+        verbose_name_plural = "События для уведомлений"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.get_event_display()
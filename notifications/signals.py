@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.dispatch import receiver
+
+from candidates.events import status_changed
+from candidates.models import Application, Interview
+from .digest import schedule_digest
+from .models import NotificationEvent
+
+
+# Запись событий для уведомлений. В запросе - только вставка строк в той же
+# транзакции, что и смена статуса; письма собирает отложенная фоновая задача
+
+@receiver(status_changed)
+def record_notification_events(sender, changes, actor, **kwargs):
+    events = []
+    for pk, previous, status in changes:
+        if sender is Application and status in ('approved', 'rejected'):
+            events.append(NotificationEvent(event=f'application_{status}', application_id=pk, actor=actor))
+        elif sender is Interview and status == 'scheduled' and not previous:
+            events.append(NotificationEvent(event='interview_scheduled', interview_id=pk, actor=actor))
+    if events:
+        NotificationEvent.objects.bulk_create(events)
+        transaction.on_commit(schedule_digest)
@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from candidates.models import Application, Candidate
+from jobs.models import Job
+from jobs.queue import claim_job, run_job
+from outbox.models import OutgoingEmail
+from users.models import User
+from vacancies.models import Vacancy
+from .digest import schedule_digest, send_notification_digests
+from .models import NotificationEvent
+
+
+class NotificationDigestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        cls.recruiter = User.objects.create_user('recruiter', 'recruiter@example.com', 'pass', role='recruiter')
+        vacancy = Vacancy.objects.create(title='Разработчик', description='Описание', required_experience=1,
+                                         status='open', work_format='office', created_by=cls.manager,
+                                         assigned_recruiter=cls.recruiter)
+        candidate = Candidate.objects.create(first_name='Иван', last_name='Петров', email='petrov@example.com')
+        cls.application = Application.objects.create(candidate=candidate, vacancy=vacancy)
+
+    def digest_jobs(self):
+        return Job.objects.filter(task=send_notification_digests.task_name, status='queued')
+
+    def run_digest(self):
+        self.digest_jobs().update(run_at=timezone.now())
+        job = claim_job('test-worker')
+        run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_status_change_queues_single_digest(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application.status = 'approved'
+            self.application.save()
+        # Повторные коммиты не ставят вторую рассылку, пока первая ждет в очереди
+        schedule_digest()
+        schedule_digest()
+
+        self.assertEqual(NotificationEvent.objects.filter(application=self.application).count(), 1)
+        self.assertEqual(self.digest_jobs().count(), 1)
+
+    def test_digest_skips_actor_and_marks_events(self):
+        NotificationEvent.objects.create(event='application_approved', application=self.application,
+                                         actor=self.recruiter)
+        schedule_digest()
+
+        job = self.run_digest()
+
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'events': 1, 'emails': 1})
+        self.assertEqual([email.to for email in OutgoingEmail.objects.all()], [['manager@example.com']])
+        self.assertFalse(NotificationEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_next_digest_is_queued_while_previous_runs(self):
+        schedule_digest()
+        job = self.digest_jobs().get()
+        Job.objects.filter(id=job.id).update(status='running')
+
+        schedule_digest()
+
+        self.assertEqual(self.digest_jobs().count(), 1)
+        self.assertNotEqual(self.digest_jobs().get().id, job.id)
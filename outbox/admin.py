@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to', 'key']
+    readonly_fields = ['created_at', 'sent_at', 'locked_by', 'locked_until', 'last_error']
+    actions = ['retry']
+
+    @admin.action(description="Отправить повторно")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), locked_by='', locked_until=None)
+        self.message_user(request, f"Поставлено в очередь писем: {count}")
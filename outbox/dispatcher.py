@@ -0,0 +1,149 @@
+import contextlib
+import datetime
+import smtplib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+# Отправка писем из исходящей очереди (outbox/mail.py).
+# Диспетчер берет пачку готовых писем в аренду и отправляет их через одно
+# соединение с почтовым сервером, не чаще OUTBOX_RATE_LIMIT писем в секунду.
+# Ошибка - повтор с удвоением задержки; после OUTBOX_MAX_ATTEMPTS попыток или
+# при постоянной ошибке (код 5xx) письмо помечается недоставленным (dead) и
+# ждет разбора в админке. Аренда истекла (диспетчер упал) - письмо берет другой.
+# Перед отправкой письма его аренда продлевается условным UPDATE: если пачка
+# отправлялась дольше аренды и письмо уже забрал другой диспетчер, оно пропускается.
+
+
+def _due(now):
+    return OutgoingEmail.objects.filter(
+        Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', locked_until__lt=now)
+    ).order_by('next_attempt_at', 'id')
+
+
+def claim_batch(size):
+    """Пачка готовых писем, взятых в аренду. Попытка засчитывается при захвате"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    lease = {
+        'status': 'sending',
+        'locked_by': token,
+        'locked_until': now + datetime.timedelta(seconds=settings.OUTBOX_LEASE),
+        'attempts': F('attempts') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(_due(now).select_for_update(skip_locked=True).values_list('id', flat=True)[:size])
+            OutgoingEmail.objects.filter(id__in=ids).update(**lease)
+    else:
+        # SQLite: условный UPDATE срабатывает только для писем, которые еще никто
+        # не взял; свои письма находятся по токену пачки
+        ids = list(_due(now).values_list('id', flat=True)[:size])
+        _due(now).filter(id__in=ids).update(**lease)
+    return list(OutgoingEmail.objects.filter(locked_by=token, status='sending').order_by('id'))
+
+
+class RateLimiter:
+    """Не больше rate писем в секунду (rate=0 - без ограничения)"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def _is_permanent(exc):
+    # 5xx от SMTP-сервера (адрес не существует, письмо отклонено) повтором не исправить
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def _owned(email):
+    # Если аренда истекла и письмо забрала другая пачка, результат этой не записывается
+    return OutgoingEmail.objects.filter(id=email.id, status='sending', locked_by=email.locked_by)
+
+
+def _renew_lease(email):
+    """Продлевает аренду письма перед отправкой. False - письмо уже забрал другой
+    диспетчер (пачка отправлялась дольше аренды): отправлять его нельзя, уйдет дубль"""
+    locked_until = timezone.now() + datetime.timedelta(seconds=settings.OUTBOX_LEASE)
+    return _owned(email).update(locked_until=locked_until) == 1
+
+
+def _mark_failed(email, exc):
+    error = f'{type(exc).__name__}: {exc}'
+    if _is_permanent(exc) or email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        _owned(email).update(status='dead', locked_by='', locked_until=None, last_error=error)
+        return
+    # Экспоненциальная задержка: 1 мин, 2 мин, 4 мин...
+    delay = settings.OUTBOX_RETRY_BACKOFF * 2 ** (email.attempts - 1)
+    _owned(email).update(status='pending', locked_by='', locked_until=None, last_error=error,
+                         next_attempt_at=timezone.now() + datetime.timedelta(seconds=delay))
+
+
+def _message(email, mail_connection):
+    message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to,
+                                     connection=mail_connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def send_batch(emails, mail_connection=None, limiter=None):
+    """Отправляет письма через одно соединение. Возвращает (отправлено, ошибок)"""
+    mail_connection = mail_connection or get_connection()
+    limiter = limiter or RateLimiter(settings.OUTBOX_RATE_LIMIT)
+    sent = failed = 0
+    with mail_connection:
+        for email in emails:
+            limiter.wait()
+            if not _renew_lease(email):
+                continue
+            try:
+                # После ошибки соединение закрыто - open() подключится заново,
+                # для открытого соединения он ничего не делает
+                mail_connection.open()
+                mail_connection.send_messages([_message(email, mail_connection)])
+            except Exception as exc:
+                failed += 1
+                _mark_failed(email, exc)
+                with contextlib.suppress(Exception):
+                    mail_connection.close()
+            else:
+                sent += 1
+                # Отметка сразу после отправки: если диспетчер упадет посреди пачки,
+                # повторно уйдут только неотмеченные письма
+                _owned(email).update(status='sent', sent_at=timezone.now(), locked_by='', locked_until=None)
+    return sent, failed
+
+
+def dispatch(batch_size=None, mail_connection=None):
+    """Отправляет все готовые письма пачками. Возвращает (отправлено, ошибок)"""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    limiter = RateLimiter(settings.OUTBOX_RATE_LIMIT)
+    total_sent = total_failed = 0
+    while True:
+        emails = claim_batch(batch_size)
+        if not emails:
+            return total_sent, total_failed
+        sent, failed = send_batch(emails, mail_connection, limiter)
+        total_sent += sent
+        total_failed += failed
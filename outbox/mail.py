@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def queue_email(subject, body, to, *, html_body='', from_email=None, key=None):
+    """Ставит письмо в исходящую очередь.
+
+    Письмо сохраняется в текущей транзакции: если изменение, ради которого оно
+    отправляется, откатится, письмо тоже не уйдет. Письмо с уже известным key
+    повторно не ставится. Возвращает письмо или None, если получателей нет.
+    """
+    recipients = [address for address in to if address]
+    if not recipients:
+        return None
+    fields = {
+        'subject': subject[:255],
+        'body': body,
+        'html_body': html_body,
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+        'to': recipients,
+        'next_attempt_at': timezone.now(),
+    }
+    if key is None:
+        return OutgoingEmail.objects.create(**fields)
+    email, _ = OutgoingEmail.objects.get_or_create(key=key, defaults=fields)
+    return email
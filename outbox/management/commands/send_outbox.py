@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outbox.dispatcher import dispatch
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из исходящей очереди (по крону или постоянно с --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Писем на одно соединение с почтовым сервером')
+        parser.add_argument('--loop', action='store_true', help='Работать до Ctrl+C, опрашивая очередь')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = dispatch(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}, ошибок: {failed}'))
+            if not options['loop']:
+                return
+            close_old_connections()
+            try:
+                time.sleep(settings.OUTBOX_POLL_INTERVAL)
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в исходящей очереди (см. outbox/dispatcher.py)"""
+    STATUS_CHOICES = (
+        ('pending', 'Ожидает отправки'),
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлено'),
+        ('dead', 'Не доставлено'),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    html_body = models.TextField(blank=True, verbose_name="HTML")
+    from_email = models.CharField(max_length=255, verbose_name="Отправитель")
+    to = models.JSONField(default=list, verbose_name="Получатели")
+    # Ключ идемпотентности: одно и то же письмо (например, напоминание о собеседовании)
+    # не попадет в очередь дважды
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True, verbose_name="Ключ")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Статус")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")
+    next_attempt_at = models.DateTimeField(verbose_name="Следующая попытка")
+    # Аренда: пачка писем принадлежит диспетчеру до locked_until, потом ее может забрать другой
+    locked_by = models.CharField(max_length=32, blank=True, verbose_name="Пачка")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Аренда до")
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Отправлено")
+
+    class Meta:
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)}"
@@ -0,0 +1,27 @@
+import datetime
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from .dispatcher import RateLimiter, claim_batch, send_batch
+from .mail import queue_email
+from .models import OutgoingEmail
+
+
+class SendBatchTests(TestCase):
+
+    def test_email_taken_by_another_dispatcher_is_not_sent_twice(self):
+        for number in range(3):
+            queue_email(f'Письмо {number}', 'Текст', ['user@example.com'])
+        batch = claim_batch(10)
+
+        # Пачка отправляется дольше аренды: второе письмо забирает другой диспетчер
+        OutgoingEmail.objects.filter(id=batch[1].id).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        other = claim_batch(10)
+        self.assertEqual([email.id for email in other], [batch[1].id])
+
+        self.assertEqual(send_batch(batch, limiter=RateLimiter(0)), (2, 0))
+        self.assertEqual(send_batch(other, limiter=RateLimiter(0)), (1, 0))
+        self.assertEqual(sorted(message.subject for message in mail.outbox), ['Письмо 0', 'Письмо 1', 'Письмо 2'])
+        self.assertFalse(OutgoingEmail.objects.exclude(status='sent').exists())
@@ -0,0 +1,55 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from hr_agency.cache import get_version, bump_version
+
+
+# Время жизни закэшированного пользователя (сек); при сохранении User версия сбрасывается
+# сигналом, при User.objects.filter(...).update() - в UserQuerySet.update
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Поля пользователя в кэше: то, что проверяется при каждом запросе.
+# Пароль не кэшируется - вместо него хранится хэш для проверки сессии
+CACHED_USER_FIELDS = ['id', 'username', 'role', 'email', 'is_active', 'is_staff', 'is_superuser']
+
+
+def _user_cache_key(user_id):
+    return f'auth_user:{user_id}:{get_version("user", user_id)}'
+
+
+def invalidate_cached_user(user_id):
+    bump_version('user', user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берет пользователя сессии из кэша, а не из БД.
+
+    Кэшируются только CACHED_USER_FIELDS и хэш сессии, поэтому проверки ролей
+    в role_required не обращаются к БД. Остальные поля пользователя отложены
+    и загружаются из БД при первом обращении к ним.
+    """
+
+    def get_user(self, user_id):
+        key = _user_cache_key(user_id)
+        data = cache.get(key)
+        if data is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            data = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+            data['session_auth_hash'] = user.get_session_auth_hash()
+            cache.set(key, data, USER_CACHE_TIMEOUT)
+        user = self._build_user(data)
+        return user if self.user_can_authenticate(user) else None
+
+    def _build_user(self, data):
+        from .models import User
+
+        # from_db ждет значения в порядке полей модели
+        names = [field.attname for field in User._meta.concrete_fields if field.attname in data]
+        user = User.from_db(DEFAULT_DB_ALIAS, names, [data[name] for name in names])
+        # Хэш сессии считается от пароля - берем готовый, чтобы не загружать пароль из БД
+        # (User.get_session_auth_hash; после set_password хэш снова считается от пароля)
+        user.cached_session_auth_hash = data['session_auth_hash']
+        return user
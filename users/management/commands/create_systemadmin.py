@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Создает системного администратора (systemadmin), если его еще нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--password', default='SystemAdmin123!', help='Пароль системного администратора')
+        parser.add_argument('--email', default='system@hr-agency.ru', help='Email системного администратора')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+
+        if User.objects.filter(username='systemadmin').exists():
+            self.stdout.write('Системный администратор уже существует')
+            return
+
+        User.objects.create_user(
+            username='systemadmin',
+            password=options['password'],
+            role='admin',
+            email=options['email'],
+            first_name='System',
+            last_name='Administrator'
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Системный администратор создан: systemadmin'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:38
+
+import users.models
+from django.db import migrations, models
+
+
+def generate_calendar_feed_keys(apps, schema_editor):
+    # AddField вычисляет default один раз - у существующих пользователей ключи одинаковые
+    User = apps.get_model('users', 'User')
+    for user in User.objects.only('pk'):
+        user.calendar_feed_key = users.models.new_calendar_feed_key()
+        user.save(update_fields=['calendar_feed_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_manager'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='calendar_feed_key',
+            field=models.CharField(default=users.models.new_calendar_feed_key, editable=False, max_length=32),
+        ),
+        migrations.RunPython(generate_calendar_feed_keys, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,30 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+import secrets
+
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.db import models, transaction
+
+from hr_agency.cache import bump_versions
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Массовое изменение (действия админки, скрипты) не вызывает post_save -
+        закэшированные пользователи сессий (users/backends.py) сбрасываются здесь"""
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        transaction.on_commit(lambda: bump_versions('user', user_ids), using=self.db)
+        return rows
+
+    update.alters_data = True
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+def new_calendar_feed_key():
+    return secrets.token_hex(16)
 
 
 class User(AbstractUser):
@@ -11,6 +36,18 @@ class User(AbstractUser):
 
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='recruiter')
     phone_number = models.CharField(max_length=20)
+    # Ключ ссылки на ленту собеседований (candidates/calendar.py): новый ключ отзывает старые ссылки
+    calendar_feed_key = models.CharField(max_length=32, default=new_calendar_feed_key, editable=False)
+
+    objects = UserManager()
+
+    # Хэш сессии из кэша (users/backends.py) - у пользователя сессии пароль не загружен
+    cached_session_auth_hash = None
+
+    def get_session_auth_hash(self):
+        if self.cached_session_auth_hash is not None and 'password' in self.get_deferred_fields():
+            return self.cached_session_auth_hash
+        return super().get_session_auth_hash()
 
     def get_role_display(self):
         return dict(self.ROLE_CHOICES).get(self.role, self.role)
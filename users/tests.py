@@ -1,3 +1,61 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .backends import CachedModelBackend, _user_cache_key
+from .models import User
+
+
+class CachedModelBackendTests(TestCase):
+    """Пользователь сессии из кэша: без пароля, сбрасывается и при save(), и при update()"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        self.client.login(username='manager', password='pass')
+        # Первый запрос кладет пользователя в кэш
+        self.client.get(reverse('vacancy_list'))
+
+    def test_cache_holds_projection_without_password(self):
+        data = cache.get(_user_cache_key(self.user.pk))
+        self.assertEqual(data['role'], 'manager')
+        self.assertNotIn('password', data)
+        self.assertNotIn(self.user.password, data.values())
+
+    def test_session_user_is_not_loaded_from_db(self):
+        with self.assertNumQueries(0):
+            user = CachedModelBackend().get_user(self.user.pk)
+            self.assertEqual((user.username, user.role, user.email), ('manager', 'manager', 'manager@example.com'))
+        # Остальные поля загружаются при обращении
+        with self.assertNumQueries(1):
+            self.assertEqual(user.phone_number, '')
+
+    def test_queryset_update_invalidates_cached_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(role='recruiter')
+        response = self.client.get(reverse('vacancy_create'))
+        self.assertEqual(response.status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(reverse('vacancy_list'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_change_ends_session(self):
+        self.user.set_password('new-pass')
+        self.user.save()
+        response = self.client.get(reverse('vacancy_list'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_own_password_change_keeps_session(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.client.get(reverse('admin:index'))
+        response = self.client.post(reverse('admin:password_change'), {
+            'old_password': 'pass', 'new_password1': 'Nov-parol-2026', 'new_password2': 'Nov-parol-2026',
+        })
+        self.assertRedirects(response, reverse('admin:password_change_done'))
+
+        # update_session_auth_hash сохранил хэш нового пароля - сессия продолжается
+        response = self.client.get(reverse('admin:index'))
+        self.assertEqual(response.status_code, 200)
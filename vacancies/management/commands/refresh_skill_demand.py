@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from vacancies.skill_demand import recount_skills, roll_baseline
+
+
+class Command(BaseCommand):
+    help = 'Полный пересчет спроса и предложения по навыкам и сдвиг даты отсчета динамики'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset-baseline', action='store_true',
+                            help='Сделать текущие значения точкой отсчета для всех навыков')
+
+    def handle(self, *args, **options):
+        recount_skills()
+        roll_baseline(force=options['reset_baseline'])
+        self.stdout.write(self.style.SUCCESS('Спрос на навыки пересчитан'))
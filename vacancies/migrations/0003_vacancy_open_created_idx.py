@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Триграммный GIN-индекс для поиска по названию (title__icontains).
+# Только для PostgreSQL, на SQLite миграция ничего не делает
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS vacancy_title_trgm_idx '
+        'ON vacancies_vacancy USING gin (UPPER(title) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS vacancy_title_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vacancies', '0002_alter_vacancy_options_vacancy_assigned_recruiter_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['-created_at'], name='vacancy_open_created_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
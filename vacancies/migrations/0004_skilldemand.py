@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_skill_demand(apps, schema_editor):
+    Skill = apps.get_model('vacancies', 'Skill')
+    SkillDemand = apps.get_model('vacancies', 'SkillDemand')
+    Vacancy = apps.get_model('vacancies', 'Vacancy')
+    Candidate = apps.get_model('candidates', 'Candidate')
+
+    candidates = dict(
+        Candidate.skills.through.objects.values('skill_id').annotate(n=models.Count('candidate_id'))
+        .values_list('skill_id', 'n').order_by()
+    )
+    vacancies = dict(
+        Vacancy.required_skills.through.objects.filter(vacancy__status='open')
+        .values('skill_id').annotate(n=models.Count('vacancy_id')).values_list('skill_id', 'n').order_by()
+    )
+    SkillDemand.objects.bulk_create([
+        SkillDemand(
+            skill_id=skill_id,
+            candidates_count=candidates.get(skill_id, 0),
+            open_vacancies_count=vacancies.get(skill_id, 0),
+            ratio=round(candidates.get(skill_id, 0) / vacancies[skill_id], 2) if vacancies.get(skill_id) else None,
+        )
+        for skill_id in Skill.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0012_dailysnapshot'),
+        ('vacancies', '0003_vacancy_open_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidates_count', models.IntegerField(default=0, verbose_name='Кандидатов с навыком')),
+                ('open_vacancies_count', models.IntegerField(db_index=True, default=0, verbose_name='Открытых вакансий с навыком')),
+                ('ratio', models.FloatField(db_index=True, null=True, verbose_name='Кандидатов на вакансию')),
+                ('baseline_candidates', models.IntegerField(default=0, verbose_name='Кандидатов на дату отсчета')),
+                ('baseline_open_vacancies', models.IntegerField(default=0, verbose_name='Вакансий на дату отсчета')),
+                ('baseline_date', models.DateField(null=True, verbose_name='Дата отсчета')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('skill', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='demand', to='vacancies.skill', verbose_name='Навык')),
+            ],
+            options={
+                'verbose_name': 'Спрос на навык',
+                'verbose_name_plural': 'Спрос на навыки',
+            },
+        ),
+        migrations.RunPython(populate_skill_demand, migrations.RunPython.noop),
+    ]
@@ -58,4 +58,37 @@ class Vacancy(models.Model):
     class Meta:
         verbose_name = "Вакансия"
         verbose_name_plural = "Вакансии"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Частичный индекс: список открытых вакансий - самый частый запрос
+            models.Index(fields=['-created_at'], condition=models.Q(status='open'),
+                         name='vacancy_open_created_idx'),
+        ]
+
+class SkillDemand(models.Model):
+    """Спрос и предложение по навыку (vacancies/skill_demand.py)"""
+    skill = models.OneToOneField(Skill, on_delete=models.CASCADE, related_name='demand', verbose_name="Навык")
+    candidates_count = models.IntegerField(default=0, verbose_name="Кандидатов с навыком")
+    open_vacancies_count = models.IntegerField(default=0, db_index=True, verbose_name="Открытых вакансий с навыком")
+    # Кандидатов на одну открытую вакансию; null - открытых вакансий нет
+    ratio = models.FloatField(null=True, db_index=True, verbose_name="Кандидатов на вакансию")
+    # Значения на дату отсчета для расчета динамики
+    baseline_candidates = models.IntegerField(default=0, verbose_name="Кандидатов на дату отсчета")
+    baseline_open_vacancies = models.IntegerField(default=0, verbose_name="Вакансий на дату отсчета")
+    baseline_date = models.DateField(null=True, verbose_name="Дата отсчета")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.skill}: {self.candidates_count} / {self.open_vacancies_count}"
+
+    @property
+    def candidates_trend(self):
+        return self.candidates_count - self.baseline_candidates
+
+    @property
+    def open_vacancies_trend(self):
+        return self.open_vacancies_count - self.baseline_open_vacancies
+
+    class Meta:
+        verbose_name = "Спрос на навык"
+        verbose_name_plural = "Спрос на навыки"
@@ -0,0 +1,66 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from hr_agency.cache import bump_version
+from .models import Skill, Vacancy
+from .skill_demand import recount_skills
+
+
+# Инвалидация закэшированных фрагментов vacancy_detail и списка открытых вакансий,
+# ETag страниц vacancy_list (hr_agency/conditional.py)
+
+@receiver([post_save, post_delete], sender=Vacancy)
+def vacancy_changed(sender, instance, **kwargs):
+    bump_version('vacancy', instance.pk)
+    # Список открытых вакансий в candidate_detail
+    bump_version('vacancies')
+
+
+@receiver(m2m_changed, sender=Vacancy.required_skills.through)
+def vacancy_skills_changed(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Vacancy):
+        bump_version('vacancy', instance.pk)
+    else:
+        for vacancy_id in pk_set or ():
+            bump_version('vacancy', vacancy_id)
+    # Навыки выводятся в vacancy_list
+    bump_version('vacancies')
+
+
+# Счетчики спроса и предложения по навыкам (vacancies/skill_demand.py)
+
+@receiver(post_save, sender=Skill)
+def skill_created(sender, instance, created, **kwargs):
+    if created:
+        recount_skills([instance.pk])
+
+
+@receiver(post_save, sender=Vacancy)
+def vacancy_demand_changed(sender, instance, created, **kwargs):
+    # Статус мог измениться - пересчитываем только навыки этой вакансии.
+    # У новой вакансии навыков еще нет, их добавит m2m_changed
+    if not created:
+        recount_skills(instance.required_skills.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Vacancy.required_skills.through)
+def vacancy_skills_demand(sender, instance, action, pk_set, **kwargs):
+    if action == 'pre_clear' and isinstance(instance, Vacancy):
+        instance._cleared_skill_ids = list(instance.required_skills.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        recount_skills(pk_set if isinstance(instance, Vacancy) else [instance.pk])
+    elif action == 'post_clear':
+        recount_skills(getattr(instance, '_cleared_skill_ids', None) if isinstance(instance, Vacancy)
+                       else [instance.pk])
+
+
+@receiver(pre_delete, sender=Vacancy)
+def vacancy_deleting(sender, instance, **kwargs):
+    instance._deleted_skill_ids = list(instance.required_skills.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Vacancy)
+def vacancy_deleted_demand(sender, instance, **kwargs):
+    recount_skills(getattr(instance, '_deleted_skill_ids', []))
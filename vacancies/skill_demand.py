@@ -0,0 +1,99 @@
+import datetime
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Skill, SkillDemand, Vacancy
+
+
+# Спрос и предложение по навыкам.
+# Кандидаты и вакансии считаются отдельными групповыми запросами по таблицам связей:
+# соединение обеих M2M-таблиц в одном запросе перемножает строки и завышает счетчики.
+# Счетчики пересчитываются только для затронутых навыков - по сигналам m2m_changed
+# и при изменении вакансии (см. candidates/signals.py, vacancies/signals.py).
+
+# Дата отсчета динамики сдвигается не чаще, чем раз в столько дней
+BASELINE_DAYS = 7
+
+COUNTER_FIELDS = ['candidates_count', 'open_vacancies_count', 'ratio', 'updated_at']
+
+
+def _candidate_counts(skill_ids=None):
+    from candidates.models import Candidate
+
+    links = Candidate.skills.through.objects.all()
+    if skill_ids is not None:
+        links = links.filter(skill_id__in=skill_ids)
+    return dict(links.values('skill_id').annotate(n=Count('candidate_id')).values_list('skill_id', 'n').order_by())
+
+
+def _open_vacancy_counts(skill_ids=None):
+    links = Vacancy.required_skills.through.objects.filter(vacancy__status='open')
+    if skill_ids is not None:
+        links = links.filter(skill_id__in=skill_ids)
+    return dict(links.values('skill_id').annotate(n=Count('vacancy_id')).values_list('skill_id', 'n').order_by())
+
+
+def _ratio(candidates, vacancies):
+    return round(candidates / vacancies, 2) if vacancies else None
+
+
+def recount_skills(skill_ids=None):
+    """Пересчет счетчиков для указанных навыков (None - для всех)"""
+    if skill_ids is None:
+        skill_ids = list(Skill.objects.values_list('id', flat=True))
+        candidates = _candidate_counts()
+        vacancies = _open_vacancy_counts()
+    else:
+        skill_ids = list(set(skill_ids))
+        candidates = _candidate_counts(skill_ids)
+        vacancies = _open_vacancy_counts(skill_ids)
+    if not skill_ids:
+        return
+
+    rows = []
+    for skill_id in skill_ids:
+        candidates_count = candidates.get(skill_id, 0)
+        open_vacancies_count = vacancies.get(skill_id, 0)
+        rows.append(SkillDemand(
+            skill_id=skill_id,
+            candidates_count=candidates_count,
+            open_vacancies_count=open_vacancies_count,
+            ratio=_ratio(candidates_count, open_vacancies_count),
+        ))
+    SkillDemand.objects.bulk_create(rows, update_conflicts=True, unique_fields=['skill'], update_fields=COUNTER_FIELDS)
+
+
+def roll_baseline(force=False):
+    """Запоминает текущие значения как точку отсчета динамики"""
+    today = timezone.localdate()
+    demands = SkillDemand.objects.all()
+    if not force:
+        demands = demands.filter(
+            Q(baseline_date__isnull=True) | Q(baseline_date__lte=today - datetime.timedelta(days=BASELINE_DAYS))
+        )
+    demands = list(demands)
+    for demand in demands:
+        demand.baseline_candidates = demand.candidates_count
+        demand.baseline_open_vacancies = demand.open_vacancies_count
+        demand.baseline_date = today
+    SkillDemand.objects.bulk_update(demands, ['baseline_candidates', 'baseline_open_vacancies', 'baseline_date'])
+
+
+SHORTAGE_SORTS = {
+    'ratio': 'Кандидатов на вакансию',
+    '-open_vacancies_count': 'Открытых вакансий',
+    '-candidates_count': 'Кандидатов',
+    'skill__name': 'Навык',
+}
+
+
+def shortage_report(sort='ratio'):
+    """Навыки, которые требуются в открытых вакансиях, - в начале самые дефицитные"""
+    if sort not in SHORTAGE_SORTS:
+        sort = 'ratio'
+    return (
+        SkillDemand.objects.filter(open_vacancies_count__gt=0)
+        .select_related('skill')
+        .order_by(sort, 'skill__name')
+    )
@@ -1,3 +1,121 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from candidates.models import Application, Candidate
+from users.models import User
+from .models import Vacancy
+
+
+def create_vacancy(user, title, **fields):
+    fields.setdefault('status', 'open')
+    fields.setdefault('work_format', 'office')
+    return Vacancy.objects.create(title=title, description='Описание', required_experience=1,
+                                  created_by=user, **fields)
+
+
+class VacancyIndexTests(TestCase):
+
+    def constraints(self):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, 'vacancies_vacancy')
+
+    def test_open_vacancies_partial_index_exists(self):
+        self.assertIn('vacancy_open_created_idx', self.constraints())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Триграммный индекс создается только на PostgreSQL')
+    def test_title_trigram_index_exists(self):
+        self.assertIn('vacancy_title_trgm_idx', self.constraints())
+
+
+class VacancyListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        for number in range(12):
+            create_vacancy(cls.manager, f'Python-разработчик {number}', status='open' if number % 3 else 'closed')
+        create_vacancy(cls.manager, 'Бухгалтер', work_format='remote')
+
+    def setUp(self):
+        # Счетчики и страница списка хранятся в кэше страниц
+        cache.clear()
+        self.client.force_login(self.manager)
+
+    def test_counts_and_pagination(self):
+        response = self.client.get(reverse('vacancy_list'))
+        self.assertEqual(response.context['total_vacancies'], 13)
+        self.assertEqual(response.context['open_vacancies'], 9)
+        self.assertEqual(len(response.context['vacancies']), 10)
+
+        response = self.client.get(reverse('vacancy_list'), {'page': 2})
+        page = response.context['vacancies']
+        self.assertEqual((page.number, len(page), page.paginator.num_pages), (2, 3, 2))
+
+    def test_search_and_filters(self):
+        response = self.client.get(reverse('vacancy_list'), {'search': 'PYTHON', 'status': 'open'})
+        self.assertEqual(response.context['total_vacancies'], 8)
+        self.assertTrue(all(vacancy.status == 'open' for vacancy in response.context['vacancies']))
+
+        response = self.client.get(reverse('vacancy_list'), {'work_format': 'remote'})
+        self.assertEqual([vacancy.title for vacancy in response.context['vacancies']], ['Бухгалтер'])
+
+    def test_new_vacancy_is_shown_immediately(self):
+        self.client.get(reverse('vacancy_list'))
+        create_vacancy(self.manager, 'Аналитик')
+
+        response = self.client.get(reverse('vacancy_list'))
+        self.assertEqual(response.context['total_vacancies'], 14)
+        self.assertEqual(response.context['vacancies'][0].title, 'Аналитик')
+
+    def test_cached_page_needs_no_list_queries(self):
+        self.client.get(reverse('vacancy_list'))
+        # Остается только отпечаток для ETag: сессия и пользователь - в кэше,
+        # счетчики и строки списка - в кэше страниц
+        with self.assertNumQueries(1):
+            self.client.get(reverse('vacancy_list'))
+
+
+class ApplicationBulkStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='manager')
+        cls.assigned = User.objects.create_user('assigned', 'assigned@example.com', 'pass', role='recruiter')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'pass', role='recruiter')
+        cls.vacancy = create_vacancy(cls.manager, 'Разработчик', assigned_recruiter=cls.assigned)
+        # Кандидат, за которого отвечает неназначенный рекрутер
+        candidate = Candidate.objects.create(first_name='Иван', last_name='Петров', email='petrov@example.com',
+                                             assigned_recruiter='other')
+        cls.application = Application.objects.create(candidate=candidate, vacancy=cls.vacancy)
+
+    def change_status(self, user, status='approved'):
+        self.client.force_login(user)
+        return self.client.post(reverse('application_bulk_status', args=[self.vacancy.id]),
+                                {'status': status, 'application_ids': [self.application.id, 0]})
+
+    def test_assigned_recruiter_changes_statuses(self):
+        response = self.change_status(self.assigned)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], {'0': 'not_found', str(self.application.id): 'updated'})
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'approved')
+        response = self.client.get(reverse('vacancy_detail', args=[self.vacancy.id]))
+        self.assertContains(response, 'application-select" value=')
+
+        response = self.change_status(self.manager, 'rejected')
+        self.assertEqual(response.json()['updated'], 1)
+
+    def test_not_assigned_recruiter_is_forbidden_even_for_own_candidates(self):
+        response = self.change_status(self.other)
+        self.assertEqual(response.status_code, 403)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'pending')
 
-# Create your tests here.
+        # На странице вакансии у него нет элементов смены статуса
+        response = self.client.get(reverse('vacancy_detail', args=[self.vacancy.id]))
+        self.assertFalse(response.context['can_change_status'])
+        self.assertNotContains(response, 'application-select" value=')
@@ -4,8 +4,10 @@ from . import views
 urlpatterns = [
     path('', views.vacancy_list, name='vacancy_list'),
     path('create/', views.vacancy_create, name='vacancy_create'),
+    path('skills/shortage/', views.skill_shortage, name='skill_shortage'),
     path('<int:vacancy_id>/', views.vacancy_detail, name='vacancy_detail'),
     path('<int:vacancy_id>/edit/', views.vacancy_edit, name='vacancy_edit'),
     path('<int:vacancy_id>/delete/', views.vacancy_delete, name='vacancy_delete'),
     path('<int:vacancy_id>/status/<str:new_status>/', views.vacancy_change_status, name='vacancy_change_status'),
+    path('<int:vacancy_id>/applications/status/', views.application_bulk_status, name='application_bulk_status'),
 ]
\ No newline at end of file
@@ -1,10 +1,24 @@
+import hashlib
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.db.models import Q, Count
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from hr_agency.cache import bump_version, bump_versions, get_version, object_version, fragment_timeout
+from hr_agency.page_cache import cached
+from hr_agency.conditional import conditional_page, page_etag, queryset_fingerprint
+from hr_agency.sqlite import run_write
+from hr_agency.replicas import read_from_replica
 from .models import Vacancy
 from .forms import VacancyForm
+from .skill_demand import SHORTAGE_SORTS, shortage_report
+
+VACANCIES_PAGE_SIZE = 10
 
 
 def role_required(allowed_roles):
@@ -22,18 +36,66 @@ def role_required(allowed_roles):
     return decorator
 
 
+def _vacancy_list_etag(request):
+    # Версия коллекции учитывает и навыки вакансий
+    return page_etag(request, queryset_fingerprint(_filter_vacancies(request.GET)), get_version('vacancies'))
+
+
 @login_required
+@read_from_replica
+@conditional_page(_vacancy_list_etag)
 def vacancy_list(request):
     """Список вакансий с фильтрацией"""
-    vacancies_list = Vacancy.objects.all().order_by('-created_at')
+    vacancies_list = _filter_vacancies(request.GET).order_by('-created_at')
+    status_filter = request.GET.get('status', '')
+    search_query = request.GET.get('search', '')
+    work_format_filter = request.GET.get('work_format', '')
+    page_number = request.GET.get('page')
+
+    # Счетчики и страница - в кэше страниц; версия коллекции в ключе сбрасывает их при изменениях
+    key = hashlib.md5(f'{status_filter}|{search_query}|{work_format_filter}|{page_number}'.encode()).hexdigest()
+    data = cached(f"vacancy_list:{key}:{get_version('vacancies')}",
+                  lambda: _vacancy_list_data(vacancies_list, page_number))
+
+    paginator = Paginator(vacancies_list, VACANCIES_PAGE_SIZE)
+    paginator.count = data['total']
+
+    return render(request, 'vacancies/vacancy_list.html', {
+        'vacancies': Page(data['vacancies'], data['number'], paginator),
+        'search_query': search_query,
+        'status_filter': status_filter,
+        'work_format_filter': work_format_filter,
+        'total_vacancies': data['total'],
+        'open_vacancies': data['open'],
+    })
+
+
+def _vacancy_list_data(vacancies_list, page_number):
+    """Статистика и вакансии страницы со всем, что выводит шаблон"""
+    paginator = Paginator(
+        vacancies_list.select_related('created_by', 'assigned_recruiter').prefetch_related('required_skills'),
+        VACANCIES_PAGE_SIZE,
+    )
+    page = paginator.get_page(page_number)
+    return {
+        'total': paginator.count,
+        'open': vacancies_list.filter(status='open').count(),
+        'number': page.number,
+        'vacancies': list(page.object_list),
+    }
+
+
+def _filter_vacancies(params):
+    """Вакансии по параметрам фильтров списка"""
+    vacancies_list = Vacancy.objects.all()
 
     # Фильтрация по статусу
-    status_filter = request.GET.get('status', '')
+    status_filter = params.get('status', '')
     if status_filter:
         vacancies_list = vacancies_list.filter(status=status_filter)
 
     # Поиск по названию
-    search_query = request.GET.get('search', '')
+    search_query = params.get('search', '')
     if search_query:
         vacancies_list = vacancies_list.filter(
             Q(title__icontains=search_query) |
@@ -41,26 +103,25 @@ def vacancy_list(request):
         )
 
     # Фильтрация по формату работы
-    work_format_filter = request.GET.get('work_format', '')
+    work_format_filter = params.get('work_format', '')
     if work_format_filter:
         vacancies_list = vacancies_list.filter(work_format=work_format_filter)
 
-    # Статистика
-    total_vacancies = vacancies_list.count()
-    open_vacancies = vacancies_list.filter(status='open').count()
+    return vacancies_list
 
-    # Пагинация
-    paginator = Paginator(vacancies_list, 10)
-    page_number = request.GET.get('page')
-    vacancies = paginator.get_page(page_number)
 
-    return render(request, 'vacancies/vacancy_list.html', {
-        'vacancies': vacancies,
-        'search_query': search_query,
-        'status_filter': status_filter,
-        'work_format_filter': work_format_filter,
-        'total_vacancies': total_vacancies,
-        'open_vacancies': open_vacancies,
+@login_required
+@read_from_replica
+def skill_shortage(request):
+    """Отчет по дефицитным навыкам: меньше всего кандидатов на открытую вакансию"""
+    sort = request.GET.get('sort', 'ratio')
+    if sort not in SHORTAGE_SORTS:
+        sort = 'ratio'
+
+    return render(request, 'vacancies/skill_shortage.html', {
+        'skills': shortage_report(sort),
+        'sort': sort,
+        'sorts': SHORTAGE_SORTS,
     })
 
 
@@ -70,7 +131,7 @@ def vacancy_create(request):
     if request.method == 'POST':
         form = VacancyForm(request.POST, request=request)
         if form.is_valid():
-            vacancy = form.save()
+            vacancy = run_write(form.save)
             messages.success(request, f'Вакансия "{vacancy.title}" успешно создана!')
             return redirect('vacancy_list')
         else:
@@ -99,7 +160,7 @@ def vacancy_edit(request, vacancy_id):
     if request.method == 'POST':
         form = VacancyForm(request.POST, instance=vacancy, request=request)
         if form.is_valid():
-            vacancy = form.save()
+            vacancy = run_write(form.save)
             messages.success(request, f'Вакансия "{vacancy.title}" успешно обновлена!')
             return redirect('vacancy_list')
         else:
@@ -116,7 +177,23 @@ def vacancy_edit(request, vacancy_id):
     })
 
 
+def _applications_scope(user, vacancy):
+    """Чьи отклики на вакансию видит пользователь: 'all' или username рекрутера.
+    Рекрутер, не назначенный на вакансию, видит только своих кандидатов"""
+    if getattr(user, 'role', '') == 'recruiter' and vacancy.assigned_recruiter_id != user.id:
+        return user.username
+    return 'all'
+
+
+def _vacancy_detail_etag(request, vacancy_id):
+    vacancy = Vacancy.objects.filter(id=vacancy_id).only('id', 'updated_at', 'status', 'assigned_recruiter').first()
+    if vacancy is None:
+        return None
+    return page_etag(request, object_version(vacancy, 'vacancy'), _applications_scope(request.user, vacancy))
+
+
 @login_required
+@conditional_page(_vacancy_detail_etag)
 def vacancy_detail(request, vacancy_id):
     """Детальная страница вакансии"""
     vacancy = get_object_or_404(Vacancy, id=vacancy_id)
@@ -134,19 +211,33 @@ def vacancy_detail(request, vacancy_id):
             messages.error(request, "У вас нет прав для просмотра этой вакансии")
             return redirect('vacancy_list')
 
+    vacancy_version = object_version(vacancy, 'vacancy')
+    is_assigned = vacancy.assigned_recruiter_id == request.user.id
+    # От области видимости зависит ключ закэшированного списка откликов
+    applications_scope = _applications_scope(request.user, vacancy)
+
     # Получаем связанные заявки кандидатов
-    applications_count = 0
-    approved_applications = 0
+    counts = {'total': 0, 'approved': 0, 'pending': 0, 'rejected': 0}
     applications = []
 
     try:
         from candidates.models import Application
         applications = Application.objects.filter(vacancy=vacancy).select_related('candidate')
-        applications_count = applications.count()
-        approved_applications = applications.filter(status='approved').count()
+
+        # Счетчики одним запросом, кэшируются до следующего изменения вакансии
+        counts = cache.get_or_set(
+            f'vacancy_counts:{vacancy.pk}:{vacancy_version}',
+            lambda: applications.aggregate(
+                total=Count('id'),
+                approved=Count('id', filter=Q(status='approved')),
+                pending=Count('id', filter=Q(status='pending')),
+                rejected=Count('id', filter=Q(status='rejected')),
+            ),
+            fragment_timeout(),
+        )
 
         # Если рекрутер НЕ назначен на эту вакансию - показываем только его кандидатов
-        if user_role == 'recruiter' and vacancy.assigned_recruiter != request.user:
+        if applications_scope != 'all':
             applications = applications.filter(candidate__assigned_recruiter=request.user.username)
 
     except Exception as e:
@@ -155,11 +246,70 @@ def vacancy_detail(request, vacancy_id):
     return render(request, 'vacancies/vacancy_detail.html', {
         'vacancy': vacancy,
         'applications': applications,
-        'applications_count': applications_count,
-        'approved_applications': approved_applications,
+        'applications_count': counts['total'],
+        'approved_applications': counts['approved'],
+        'pending_applications': counts['pending'],
+        'rejected_applications': counts['rejected'],
         'user_role': user_role,
+        # Версии для кэширования фрагментов шаблона
+        'vacancy_version': vacancy_version,
+        'is_assigned': is_assigned,
+        'applications_scope': applications_scope,
+        # Те же права, что в application_bulk_status
+        'can_change_status': user_role in ['manager', 'admin', 'recruiter'] and applications_scope == 'all',
+        'fragment_timeout': fragment_timeout(),
     })
 
+@role_required(['manager', 'admin', 'recruiter'])
+@require_POST
+def application_bulk_status(request, vacancy_id):
+    """Смена статуса нескольких откликов на вакансию одним запросом.
+
+    Права проверяются один раз для вакансии (как в vacancy_detail): рекрутер, не
+    назначенный на вакансию, статусы не меняет. Статус меняется одним UPDATE,
+    в ответе - результат по каждому id.
+    """
+    from candidates.history import bulk_set_status
+    from candidates.models import Application
+
+    vacancy = get_object_or_404(Vacancy, id=vacancy_id)
+    if _applications_scope(request.user, vacancy) != 'all':
+        return JsonResponse({'error': 'Менять статусы откликов может только ответственный рекрутер'}, status=403)
+
+    status = request.POST.get('status')
+    if status not in dict(Application.STATUS_CHOICES):
+        return JsonResponse({'error': 'Неизвестный статус'}, status=400)
+    try:
+        ids = {int(value) for value in request.POST.getlist('application_ids')}
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный id отклика'}, status=400)
+    if not ids:
+        return JsonResponse({'error': 'Не выбраны отклики'}, status=400)
+    if len(ids) > settings.BULK_ACTION_LIMIT:
+        return JsonResponse({'error': f'Не больше {settings.BULK_ACTION_LIMIT} откликов за раз'}, status=400)
+
+    applications = Application.objects.filter(vacancy=vacancy, id__in=ids)
+    changed_ids, unchanged_ids = run_write(bulk_set_status, applications, status)
+
+    if changed_ids:
+        # Сигналы при update() не срабатывают - сбрасываем кэш один раз на всю операцию
+        bump_version('vacancy', vacancy.pk)
+        bump_versions('candidate', set(
+            Application.objects.filter(id__in=changed_ids).values_list('candidate_id', flat=True)
+        ))
+
+    # Отклики чужой вакансии не отличаются от несуществующих
+    results = {pk: 'not_found' for pk in ids}
+    results.update({pk: 'unchanged' for pk in unchanged_ids})
+    results.update({pk: 'updated' for pk in changed_ids})
+
+    return JsonResponse({
+        'status': status,
+        'updated': len(changed_ids),
+        'results': {str(pk): result for pk, result in sorted(results.items())},
+    })
+
+
 @role_required(['manager', 'admin'])
 def vacancy_delete(request, vacancy_id):
     """Удаление вакансии"""